@@ -1,45 +1,91 @@
 # backend/agentcore_app/orchestrator.py
+"""
+Agent pipeline for the AgentCore runtime.
+
+State that is expensive to build lives at module level and survives across
+invocations of a warm runtime: the worker pool that batched events run on,
+the compiled rulesets and the RAG model/index (warm_up(), run once on
+import unless AGENTCORE_PRELOAD=false).
+"""
+from __future__ import annotations
+
+import concurrent.futures as cf
+import os
+import time
+from typing import Any, Dict, List
+
 from backend.agents.transcript_analyzer import transcript_analyzer_agent
 from backend.agents.sales_coach import sales_coach_agent
 from backend.agents.objection_expert import objection_expert_agent
 from backend.agents.final_report import generate_final_report
+from backend.rules.ruleset import get_ruleset
 
-from typing import Any, Dict
-import concurrent.futures as cf
+# Events of one batch processed at once (agents are mostly CPU, RAG mostly I/O)
+AGENTCORE_WORKERS = int(os.getenv("AGENTCORE_WORKERS", str(min(8, (os.cpu_count() or 1) + 2))))
+AGENTCORE_PRELOAD = os.getenv("AGENTCORE_PRELOAD", "true").lower() == "true"
 
-# ✅ Use relative imports inside the package
-from .agents.transcript_analyzer import transcript_analyzer_agent
-from .agents.sales_coach import sales_coach_agent
-from .agents.objection_expert import objection_expert_agent
-from .agents.final_report import generate_final_report
+_executor = cf.ThreadPoolExecutor(max_workers=AGENTCORE_WORKERS, thread_name_prefix="agentcore")
 
+# Filled by warm_up(): what it loaded and how long each part took
+warm_state: Dict[str, Any] = {"warmed": False}
 
-def run_pipeline(payload: Dict[str, Any]) -> Dict[str, Any]:
-    transcript: str = payload["transcript"]["text"]
 
-    # Optional inputs from FastAPI (fine if absent)
-    sentiment = payload.get("sentiment")          # can be None
-    # You are currently NOT passing rag_context into sales_coach_agent (it doesn't accept it)
+def warm_up() -> Dict[str, Any]:
+    """
+    Compiles the default ruleset and loads the retriever (model + index, or
+    BM25 postings) so the first event doesn't pay for it. Failures are
+    recorded, not raised: events still run and load lazily.
+    """
+    timings = {}
+
+    t0 = time.perf_counter()
+    get_ruleset()
+    timings["ruleset_ms"] = round((time.perf_counter() - t0) * 1000, 1)
 
-    # Run in parallel (like your old RunnableParallel)
-    with cf.ThreadPoolExecutor(max_workers=3) as ex:
-        # ✅ transcript_analyzer_agent(transcript: str)
-        f1 = ex.submit(transcript_analyzer_agent, transcript)
+    from backend.rag.query_rag import RAG_MODE, USE_FAKE_RAG, preload
 
-        # ✅ sales_coach_agent(transcript: str, sentiment: Optional[str] = None)
-        f2 = ex.submit(sales_coach_agent, transcript, sentiment)
+    if not USE_FAKE_RAG:
+        t0 = time.perf_counter()
+        try:
+            preload()
+            timings["rag_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            timings["rag_mode"] = RAG_MODE
+        except Exception as e:
+            print("⚠️ AgentCore RAG preload failed, loading on first use:", e)
+            timings["rag_error"] = f"{e.__class__.__name__}: {e}"
 
-        # ✅ objection_expert_agent(transcript: str, sentiment: str)
-        # If sentiment is None, pass a safe default so it doesn’t crash.
-        f3 = ex.submit(objection_expert_agent, transcript, sentiment or "Neutral")
+    warm_state.update(warmed=True, **timings)
+    return warm_state
 
-        transcript_analysis = f1.result()
-        sales_feedback = f2.result()
-        objection_feedback = f3.result()
+
+def run_pipeline(payload: Dict[str, Any]) -> Dict[str, Any]:
+    transcript: str = payload["transcript"]["text"]
+    company = payload.get("company")
+    ruleset = get_ruleset(company)
+
+    transcript_analysis = transcript_analyzer_agent(transcript, ruleset=ruleset, company=company)
+    # Sentiment from FastAPI if it sent one, else the analyzer's
+    sentiment = payload.get("sentiment") or transcript_analysis.get("sentiment") or "Neutral"
+    sales_feedback = sales_coach_agent(transcript, sentiment, ruleset=ruleset, company=company)
+    objection_feedback = objection_expert_agent(transcript, sentiment, company=company, ruleset=ruleset)
 
     # Aggregate into final report
     return generate_final_report(
         transcript_analysis,
         sales_feedback,
         objection_feedback,
-    )
\ No newline at end of file
+        ruleset_version=ruleset.version,
+    )
+
+
+def run_batch(payloads: List[Dict[str, Any]], run_one) -> List[Dict[str, Any]]:
+    """
+    run_one(payload) for every payload on the shared pool; results in input order.
+    """
+    if len(payloads) == 1:
+        return [run_one(payloads[0])]
+    return list(_executor.map(run_one, payloads))
+
+
+if AGENTCORE_PRELOAD:
+    warm_up()
@@ -1,3 +1,6 @@
+from __future__ import annotations
+
+
 def build_agent_consensus(
     transcript_analysis: dict,
     sales_feedback: dict,
@@ -75,13 +78,21 @@ def build_agent_consensus(
 
     return {"overall_assessment": assessment}
 
-def generate_final_report(transcript_analysis: dict, sales_feedback: dict, objection_feedback: dict) -> dict:
+def generate_final_report(
+    transcript_analysis: dict,
+    sales_feedback: dict,
+    objection_feedback: dict,
+    conversation_dynamics: dict | None = None,
+    ruleset_version: str | None = None,
+) -> dict:
     transcript_analysis = transcript_analysis or {}
     sales_feedback = sales_feedback or {}
     objection_feedback = objection_feedback or {}
 
-    return {
+    report = {
         "report_version": "v1",
+        # Phrase lists + weights the agents scored with (backend/rules)
+        "ruleset_version": ruleset_version,
 
         "call_summary": (
             transcript_analysis.get("call_summary")
@@ -102,6 +113,8 @@ def generate_final_report(transcript_analysis: dict, sales_feedback: dict, objec
             "buying_signals": objection_feedback.get("buying_signals") or [],
             "missed_opportunities": objection_feedback.get("missed_opportunities") or [],
             "rag_context_used": objection_feedback.get("rag_context_used"),
+            # Per-segment playbook snippets keyed on what was said
+            "segment_guidance": objection_feedback.get("segment_guidance"),
         },
 
         "recommended_next_actions": sales_feedback.get("recommended_next_actions") or [],
@@ -116,4 +129,10 @@ def generate_final_report(transcript_analysis: dict, sales_feedback: dict, objec
             transcript_analysis, sales_feedback, objection_feedback
         ),
 
-    }
\ No newline at end of file
+    }
+
+    # Talk ratio / monologues / interruptions (only when word timings exist)
+    if conversation_dynamics:
+        report["conversation_dynamics"] = conversation_dynamics
+
+    return report
\ No newline at end of file
@@ -1,9 +1,22 @@
 # backend/agents/objection_expert.py
 
+from __future__ import annotations
+
 from backend.rag.query_rag import query_knowledge_base
+from backend.rag.segment_retrieval import retrieve_for_segments
+from backend.rules.ruleset import Ruleset, get_ruleset
+
+# Fixed RAG queries (no transcript in them): pipeline.py prefetches them while Transcribe runs
+RAG_QUERY = "common sales objections and effective objection handling techniques"
+NEGATIVE_RAG_QUERY = "handling negative or resistant sales conversations: de-escalation, empathy, and graceful exit"
 
 
-def objection_expert_agent(transcript: str, sentiment: str) -> dict:
+def objection_expert_agent(
+    transcript: str,
+    sentiment: str,
+    company: str = None,
+    ruleset: Ruleset | None = None,
+) -> dict:
     """
     Objection & Opportunity Expert.
 
@@ -11,10 +24,13 @@ def objection_expert_agent(transcript: str, sentiment: str) -> dict:
     - Detect objections / buying signals / missed opportunities *from the transcript*.
     - Use RAG as best-practice grounding (shown in output as proof).
     - Keep outputs dynamic and appropriate for negative calls vs normal calls.
+    - Attach playbook snippets to each objection/pricing/negative segment
+      actually said in the call (segment_guidance).
     """
 
     transcript = transcript or ""
-    t = transcript.lower()
+    ruleset = ruleset or get_ruleset(company)
+    hits = ruleset.scan(transcript)
 
     # -------------------------
     # 1) Negative-call pathway
@@ -22,17 +38,11 @@ def objection_expert_agent(transcript: str, sentiment: str) -> dict:
     # If the call is negative, coach for recovery (de-escalate + preserve relationship),
     # NOT for closing and pushing next steps.
     if (sentiment or "").strip().lower() == "negative":
-        rag_context = query_knowledge_base(
-            "handling negative or resistant sales conversations: de-escalation, empathy, and graceful exit"
-        )
+        rag_context = query_knowledge_base(NEGATIVE_RAG_QUERY, company=company)
 
         # Try to ground in transcript with a couple of lightweight cues
-        hard_rejection = any(
-            p in t for p in ["not interested", "stop calling", "don't call", "do not call", "leave me alone"]
-        )
-        anger = any(
-            p in t for p in ["annoyed", "angry", "frustrated", "upset", "rude", "waste of time"]
-        )
+        hard_rejection = hits.any("objection.hard_rejection")
+        anger = hits.any("objection.anger")
 
         missed_objections = []
         buying_signals = []
@@ -60,37 +70,19 @@ def objection_expert_agent(transcript: str, sentiment: str) -> dict:
             "buying_signals": buying_signals,
             "missed_opportunities": missed_opportunities,
             "rag_context_used": rag_context,
+            "segment_guidance": retrieve_for_segments(transcript, company=company, ruleset=ruleset),
         }
 
     # ---------------------------------
     # 2) Normal-call pathway (heuristic)
     # ---------------------------------
 
-    # Expanded phrase sets for better recall (still simple & explainable)
-    budget_phrases = [
-        "budget", "price", "pricing", "cost", "afford", "expensive",
-        "reasonable", "within range", "approved", "discount"
-    ]
-    timeline_phrases = [
-        "timeline", "deadline", "by when", "this month", "next month", "this quarter",
-        "asap", "soon", "right away", "later this year"
-    ]
-    current_solution_phrases = [
-        "currently using", "current solution", "existing system", "today we use", "right now we use"
-    ]
-    competitor_phrases = [
-        "competitor", "alternative", "other vendor", "other option"
-    ]
-    positive_phrases = [
-        "sounds good", "interested", "makes sense", "that helps",
-        "that works", "okay", "great", "perfect", "go ahead", "let's do it"
-    ]
-
-    mentioned_budget = any(p in t for p in budget_phrases)
-    mentioned_timeline = any(p in t for p in timeline_phrases)
-    mentioned_current_solution = any(p in t for p in current_solution_phrases)
-    mentioned_competitor = any(p in t for p in competitor_phrases)
-    positive_language = any(p in t for p in positive_phrases)
+    # Phrase sets ("objection.*") live in the ruleset (still simple & explainable)
+    mentioned_budget = hits.any("objection.budget")
+    mentioned_timeline = hits.any("objection.timeline")
+    mentioned_current_solution = hits.any("objection.current_solution")
+    mentioned_competitor = hits.any("objection.competitor")
+    positive_language = hits.any("objection.positive")
 
     missed_objections = []
     buying_signals = []
@@ -122,13 +114,12 @@ def objection_expert_agent(transcript: str, sentiment: str) -> dict:
         missed_objections.append("No explicit objections were raised or missed in this call.")
 
     # RAG grounding
-    rag_context = query_knowledge_base(
-        "common sales objections and effective objection handling techniques"
-    )
+    rag_context = query_knowledge_base(RAG_QUERY, company=company)
 
     return {
         "missed_objections": missed_objections,
         "buying_signals": buying_signals,
         "missed_opportunities": missed_opportunities,
         "rag_context_used": rag_context,
+        "segment_guidance": retrieve_for_segments(transcript, company=company, ruleset=ruleset),
     }
\ No newline at end of file
@@ -3,44 +3,27 @@
 from __future__ import annotations
 
 from backend.rag.query_rag import query_knowledge_base
+from backend.rules.ruleset import Ruleset, get_ruleset
 
-def _simple_call_signals(transcript: str) -> dict:
+# Fixed RAG query (no transcript in it): pipeline.py prefetches it while Transcribe runs
+RAG_QUERY = "sales discovery questions, closing techniques, tone and empathy, and follow-up strategies"
+
+def _simple_call_signals(transcript: str, ruleset: Ruleset) -> dict:
     """
     Lightweight heuristics so the output feels transcript-grounded (no LLM).
     Works for both paragraph transcripts and conversation-formatted transcripts.
+    Phrase sets come from the ruleset ("coach.*").
     """
     transcript = transcript or ""
-    t = transcript.lower()
+    hits = ruleset.scan(transcript)
 
     asked_questions = transcript.count("?")
 
-    next_step_phrases = [
-        "next step", "next steps", "follow up", "follow-up",
-        "schedule", "calendar", "book a demo", "demo", "meeting", "call back",
-        "send you", "i'll email", "i will email", "let's meet", "set up"
-    ]
-    value_phrases = [
-        "value", "benefit", "roi", "save", "savings", "increase", "reduce",
-        "improve", "faster", "efficient", "time", "cost savings"
-    ]
-    pricing_phrases = [
-        "price", "pricing", "cost", "budget", "afford", "expensive",
-        "discount", "quote"
-    ]
-    timeline_phrases = [
-        "timeline", "by when", "when do you", "this quarter", "deadline",
-        "next month", "this month", "asap", "soon"
-    ]
-    empathy_phrases = [
-        "i understand", "that makes sense", "totally understand",
-        "thanks for sharing", "appreciate", "sorry to hear", "no worries"
-    ]
-
-    mentioned_next_steps = any(p in t for p in next_step_phrases)
-    mentioned_value = any(p in t for p in value_phrases)
-    mentioned_pricing = any(p in t for p in pricing_phrases)
-    mentioned_timeline = any(p in t for p in timeline_phrases)
-    showed_empathy = any(p in t for p in empathy_phrases)
+    mentioned_next_steps = hits.any("coach.next_step")
+    mentioned_value = hits.any("coach.value")
+    mentioned_pricing = hits.any("coach.pricing")
+    mentioned_timeline = hits.any("coach.timeline")
+    showed_empathy = hits.any("coach.empathy")
 
     return {
         "asked_questions_count": asked_questions,
@@ -52,26 +35,30 @@ def _simple_call_signals(transcript: str) -> dict:
     }
 
 
-def sales_coach_agent(transcript: str, sentiment: str | None = None) -> dict:
+def sales_coach_agent(
+    transcript: str,
+    sentiment: str | None = None,
+    ruleset: Ruleset | None = None,
+    company: str | None = None,
+) -> dict:
     """
     Evaluates selling technique + pulls best-practice guidance via RAG.
     Produces transcript-dependent coaching (no hardcoded one-size-fits-all).
     """
 
     transcript = transcript or ""
-    t = transcript.lower()
+    ruleset = ruleset or get_ruleset(company)
+    weights = ruleset.weights["coach"]
     sentiment_norm = (sentiment or "").strip().lower()
 
     # RAG call: best-practice grounding (proof for reviewers)
-    rag_snippets = query_knowledge_base(
-        "sales discovery questions, closing techniques, tone and empathy, and follow-up strategies"
-    )
+    rag_snippets = query_knowledge_base(RAG_QUERY, company=company)
     if isinstance(rag_snippets, str):
         rag_snippets_list = [s.strip() for s in rag_snippets.split("\n") if s.strip()]
     else:
         rag_snippets_list = list(rag_snippets)
 
-    signals = _simple_call_signals(transcript)
+    signals = _simple_call_signals(transcript, ruleset)
 
     # --------------------------
     # Transcript-grounded content
@@ -82,7 +69,7 @@ def sales_coach_agent(transcript: str, sentiment: str | None = None) -> dict:
     next_actions: list[str] = []
 
     # Strengths (derived from detected signals)
-    if signals["asked_questions_count"] >= 2:
+    if signals["asked_questions_count"] >= weights["min_questions"]:
         what_went_well.append("Asked multiple questions to understand the customer context (discovery).")
     else:
         what_to_improve.append("Ask more open-ended discovery questions to uncover pain points and impact.")
@@ -134,21 +121,22 @@ def sales_coach_agent(transcript: str, sentiment: str | None = None) -> dict:
     # Score (simple)
     # ----------------
     # Start from 7 and subtract for missing pillars; add a small bonus for empathy & good discovery.
-    score = 7.0
+    # Weights come from the ruleset's "coach" table.
+    score = weights["base"]
     if not signals["mentioned_value_prop"]:
-        score -= 0.7
+        score += weights["missing_value_prop"]
     if not signals["mentioned_next_steps"] and sentiment_norm != "negative":
-        score -= 0.6
-    if signals["asked_questions_count"] < 2:
-        score -= 0.4
+        score += weights["missing_next_steps"]
+    if signals["asked_questions_count"] < weights["min_questions"]:
+        score += weights["few_questions"]
     if signals["showed_empathy"]:
-        score += 0.3
+        score += weights["empathy"]
 
     # If negative call, keep score conservative
     if "negative" in sentiment_norm:
-        score = min(score, 5.5)
+        score = min(score, weights["negative_cap"])
 
-    score = max(1.0, min(10.0, round(score, 1)))
+    score = max(weights["min_score"], min(weights["max_score"], round(score, 1)))
 
     # Ensure UI sections never empty
     if not what_went_well:
@@ -163,6 +151,6 @@ def sales_coach_agent(transcript: str, sentiment: str | None = None) -> dict:
         "recommended_next_actions": next_actions,
         "signals_detected": signals,
         # RAG proof (kept simple & visible)
-        "rag_query": "sales discovery questions, closing techniques, tone and empathy, and follow-up strategies",
+        "rag_query": RAG_QUERY,
         "coaching_references": rag_snippets_list[:3],
     }
\ No newline at end of file
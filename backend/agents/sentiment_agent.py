@@ -3,62 +3,44 @@
 from __future__ import annotations
 from typing import Dict, List
 
+from backend.rules.ruleset import Ruleset, get_ruleset
 
-NEGATIVE_PHRASES = [
-    "not interested", "stop calling", "don't call", "do not call",
-    "waste of time", "annoying", "frustrated", "angry", "upset",
-    "terrible", "bad experience", "hate", "complaint",
-    "cancel", "refund", "no thanks", "not going to", "not worth"
-]
 
-POSITIVE_PHRASES = [
-    "sounds good", "interested", "makes sense", "that works",
-    "great", "perfect", "love it", "excited",
-    "let's do it", "go ahead", "sign me up", "okay let's", "sure"
-]
-
-NEUTRAL_MARKERS = [
-    "maybe", "not sure", "i'll think", "send me", "email me",
-    "can you share", "what is the price", "how much", "details"
-]
-
-
-def _label(score: float) -> str:
-    if score <= -2:
+def _label(score: float, weights: dict) -> str:
+    if score <= weights["negative_threshold"]:
         return "Negative"
-    if score >= 2:
+    if score >= weights["positive_threshold"]:
         return "Positive"
     return "Neutral"
 
 
-def sentiment_agent(transcript: str) -> Dict:
+def sentiment_agent(transcript: str, ruleset: Ruleset | None = None) -> Dict:
     """
     Lightweight sentiment detection with evidence.
     Not hardcoded to a single output: depends on transcript phrases.
+    Phrases and weights come from the coaching ruleset (backend/rules).
     """
-    t = (transcript or "").lower()
+    ruleset = ruleset or get_ruleset()
+    weights = ruleset.weights["sentiment"]
+    hits = ruleset.scan(transcript)
 
     score = 0.0
     evidence: List[str] = []
 
-    for p in NEGATIVE_PHRASES:
-        if p in t:
-            score -= 2
-            evidence.append(f"NEG: '{p}'")
+    for p in hits.hits("sentiment.negative"):
+        score += weights["negative_phrase"]
+        evidence.append(f"NEG: '{p}'")
 
-    for p in POSITIVE_PHRASES:
-        if p in t:
-            score += 2
-            evidence.append(f"POS: '{p}'")
+    for p in hits.hits("sentiment.positive"):
+        score += weights["positive_phrase"]
+        evidence.append(f"POS: '{p}'")
 
     # If no strong signals, look for neutral markers (doesn't change score much)
     if score == 0:
-        for p in NEUTRAL_MARKERS:
-            if p in t:
-                evidence.append(f"NEU: '{p}'")
-                break
+        for p in hits.hits("sentiment.neutral", limit=1):
+            evidence.append(f"NEU: '{p}'")
 
-    label = _label(score)
+    label = _label(score, weights)
 
     return {
         "sentiment_label": label,
@@ -3,86 +3,47 @@
 from __future__ import annotations
 
 from backend.rag.query_rag import query_knowledge_base
+from backend.rules.ruleset import Ruleset, get_ruleset
 
+# Fixed RAG query (no transcript in it): pipeline.py prefetches it while Transcribe runs
+RAG_QUERY = (
+    "how to identify customer intent and sentiment in sales calls; tone and empathy best practices; "
+    "follow-up strategies"
+)
 
-def _sentiment_label(score: float) -> str:
-    if score <= -2:
+
+def _sentiment_label(score: float, weights: dict) -> str:
+    if score <= weights["negative_threshold"]:
         return "Negative"
-    if score >= 2:
+    if score >= weights["positive_threshold"]:
         return "Positive"
     return "Neutral"
 
 
-def _extract_key_phrases(transcript: str, phrases: list[str], max_hits: int = 2) -> list[str]:
-    """
-    Returns short evidence phrases that appear in the transcript.
-    Keeps output reviewer-friendly and grounded.
-    """
-    t = (transcript or "").lower()
-    hits: list[str] = []
-    for p in phrases:
-        if p in t:
-            hits.append(p)
-            if len(hits) >= max_hits:
-                break
-    return hits
-
-
-def _analyze_transcript_signals(transcript: str) -> dict:
+def _analyze_transcript_signals(transcript: str, ruleset: Ruleset) -> dict:
     transcript = transcript or ""
-    t = transcript.lower()
-
-    # Strong phrases (sales-call realistic)
-    negative_phrases = [
-        "not interested", "stop calling", "don't call", "do not call",
-        "waste of time", "annoying", "frustrated", "angry", "upset",
-        "terrible", "bad experience", "hate", "complaint",
-        "cancel", "refund", "no thanks", "not going to", "leave me alone"
-    ]
-    positive_phrases = [
-        "sounds good", "interested", "makes sense", "that works",
-        "great", "perfect", "love it", "excited",
-        "let's do it", "go ahead", "sign me up", "okay", "works for us"
-    ]
-
-    budget_phrases = [
-        "budget", "pricing", "price", "cost", "afford", "expensive",
-        "cheap", "reasonable", "approved", "within range", "discount"
-    ]
-    timeline_phrases = [
-        "timeline", "deadline", "by when", "this month", "next month",
-        "this quarter", "soon", "asap", "right away", "later this year"
-    ]
-    follow_up_phrases = [
-        "follow up", "follow-up", "email", "send you", "calendar", "schedule",
-        "next step", "next steps", "meeting", "demo"
-    ]
-    empathy_phrases = [
-        "i understand", "that makes sense", "sorry to hear",
-        "thanks for sharing", "appreciate", "no worries"
-    ]
+    weights = ruleset.weights["analyzer"]
+
+    # Phrase sets live in the ruleset ("analyzer.*"); one scan serves all of them
+    hits = ruleset.scan(transcript)
 
     # Simple scoring
     score = 0.0
-    for p in negative_phrases:
-        if p in t:
-            score -= 2
-    for p in positive_phrases:
-        if p in t:
-            score += 2
+    score += weights["negative_phrase"] * hits.count("analyzer.negative")
+    score += weights["positive_phrase"] * hits.count("analyzer.positive")
 
     asked_questions = transcript.count("?")
-    mentions_budget = any(p in t for p in budget_phrases)
-    mentions_timeline = any(p in t for p in timeline_phrases)
-    mentions_follow_up = any(p in t for p in follow_up_phrases)
-    shows_empathy = any(p in t for p in empathy_phrases)
+    mentions_budget = hits.any("analyzer.budget")
+    mentions_timeline = hits.any("analyzer.timeline")
+    mentions_follow_up = hits.any("analyzer.follow_up")
+    shows_empathy = hits.any("analyzer.empathy")
 
-    sentiment = _sentiment_label(score)
+    sentiment = _sentiment_label(score, weights)
 
     # Evidence snippets (grounding)
     evidence = {
-        "negative_hits": _extract_key_phrases(transcript, negative_phrases, max_hits=2),
-        "positive_hits": _extract_key_phrases(transcript, positive_phrases, max_hits=2),
+        "negative_hits": hits.hits("analyzer.negative", limit=2),
+        "positive_hits": hits.hits("analyzer.positive", limit=2),
     }
 
     return {
@@ -97,19 +58,18 @@ def _analyze_transcript_signals(transcript: str) -> dict:
     }
 
 
-def transcript_analyzer_agent(transcript: str) -> dict:
+def transcript_analyzer_agent(transcript: str, ruleset: Ruleset | None = None, company: str | None = None) -> dict:
     """
     Produces summary, intent, sentiment + key moments grounded in transcript.
     Uses RAG for rubric-like guidance (what to look for), not to fabricate facts.
     """
     transcript = transcript or ""
+    ruleset = ruleset or get_ruleset(company)
 
     # RAG grounding: aligns with assignment knowledge base areas
-    rag_context = query_knowledge_base(
-        "how to identify customer intent and sentiment in sales calls; tone and empathy best practices; follow-up strategies"
-    )
+    rag_context = query_knowledge_base(RAG_QUERY, company=company)
 
-    signals = _analyze_transcript_signals(transcript)
+    signals = _analyze_transcript_signals(transcript, ruleset)
     sentiment = signals["sentiment"]
 
     # Dynamic intent + summary based on signals
@@ -0,0 +1 @@
+# backend/audio/__init__.py
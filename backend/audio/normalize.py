@@ -0,0 +1,224 @@
+# backend/audio/normalize.py
+"""
+Audio normalization before the upload to S3 / Transcribe.
+
+ffmpeg extracts the audio track (MP4 uploads are often screen recordings with
+video), downmixes to mono, resamples to 16 kHz (what Transcribe works at for
+speech), trims leading/trailing silence and encodes as FLAC (lossless,
+~5x smaller than a stereo 44.1 kHz WAV, encodes at ~500x realtime) or Ogg
+Opus (~60x smaller but ~50x realtime per core; worth it when the uplink to
+S3 is the bottleneck). Trimmed silence isn't transcribed either.
+
+Everything streams: leading silence is dropped by silenceremove, and
+silencedetect logs where the trailing silence starts, so the end is cut
+afterwards from the small encoded file (stream copy for Opus, a FLAC
+re-encode at ~1000x realtime) instead of buffering the whole decoded track.
+
+Both /upload-audio/ and /uploads/complete normalize (the latter downloads
+the verified object, at most UPLOAD_MAX_MB, to do it).
+
+ffmpeg is found via FFMPEG_BINARY, then PATH, then the imageio-ffmpeg wheel
+if installed. Without it (or if it fails on a file) the original is uploaded
+unchanged. Conversions run in a bounded pool (AUDIO_NORMALIZE_WORKERS) so a
+burst of uploads doesn't start unlimited encoders or block the event loop;
+split transcription's silence detection and segment extraction share it
+(run_bounded).
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from backend.profiling import traced
+
+AUDIO_NORMALIZE = os.getenv("AUDIO_NORMALIZE", "true").lower() == "true"
+AUDIO_NORMALIZE_WORKERS = int(os.getenv("AUDIO_NORMALIZE_WORKERS", "2"))
+AUDIO_NORMALIZE_TIMEOUT = float(os.getenv("AUDIO_NORMALIZE_TIMEOUT_SECONDS", "120"))
+
+# "flac" (lossless) or "ogg" (Opus, ~24 kbit/s); both are Transcribe media formats
+NORMALIZE_FORMAT = os.getenv("AUDIO_NORMALIZE_FORMAT", "flac").lower()
+OPUS_BITRATE = os.getenv("AUDIO_OPUS_BITRATE", "24k")
+# libopus 0-10; the default 10 is ~2x slower than 5 for no difference Transcribe can hear
+OPUS_COMPLEXITY = os.getenv("AUDIO_OPUS_COMPLEXITY", "5")
+SAMPLE_RATE = 16000
+
+# Silence: below SILENCE_DB for at least SILENCE_SECONDS at either end
+SILENCE_DB = int(os.getenv("AUDIO_SILENCE_DB", "-50"))
+SILENCE_SECONDS = float(os.getenv("AUDIO_SILENCE_SECONDS", "0.5"))
+
+_ENCODERS = {
+    "ogg": ["-c:a", "libopus", "-b:a", OPUS_BITRATE, "-application", "voip", "-compression_level", OPUS_COMPLEXITY],
+    "flac": ["-c:a", "flac", "-compression_level", "8"],
+}
+
+
+def ffmpeg_path() -> Optional[str]:
+    path = os.getenv("FFMPEG_BINARY") or shutil.which("ffmpeg")
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+# Silence kept before the cut at either end, so speech isn't clipped
+_KEEP_SECONDS = 0.25
+
+_SILENCE_EVENT = re.compile(r"silence_(start|end): (-?[0-9.]+)")
+_STATS_TIME = re.compile(r"time=(\d+):(\d+):([0-9.]+)")
+
+
+def normalization_available() -> bool:
+    return AUDIO_NORMALIZE and NORMALIZE_FORMAT in _ENCODERS and ffmpeg_path() is not None
+
+
+def _filters() -> str:
+    # Leading silence is removed in the stream; silencedetect only logs, and
+    # its last silence_start tells where the trailing silence begins
+    trim = (
+        f"silenceremove=start_periods=1:start_duration={SILENCE_SECONDS}"
+        f":start_threshold={SILENCE_DB}dB:start_silence={_KEEP_SECONDS}"
+    )
+    return f"aresample={SAMPLE_RATE},{trim},silencedetect=noise={SILENCE_DB}dB:d={SILENCE_SECONDS}"
+
+
+def _trailing_silence_start(stderr: str) -> Optional[float]:
+    """
+    Where the output's trailing silence starts, from the silencedetect log and
+    the final stats line (output duration); None if it doesn't end in silence.
+    """
+    events = _SILENCE_EVENT.findall(stderr)
+    if not events:
+        return None
+    kind, value = events[-1]
+    if kind == "start":
+        return float(value)  # still silent at EOF (older ffmpeg logs no end)
+    times = _STATS_TIME.findall(stderr)
+    starts = [float(v) for k, v in events if k == "start"]
+    if not times or not starts:
+        return None
+    h, m, sec = times[-1]
+    duration = int(h) * 3600 + int(m) * 60 + float(sec)
+    # ffmpeg >= 6 closes a silence at EOF with a silence_end at the duration
+    return starts[-1] if float(value) >= duration - 0.1 else None
+
+
+def _cut_end(ffmpeg: str, path: str, seconds: float) -> bool:
+    """
+    Truncates the encoded file at `seconds` (replacing it); False on failure.
+    """
+    tmp_path = f"{path}.cut.{NORMALIZE_FORMAT}"
+    # Opus packets can be copied as they are; FLAC's header carries the total
+    # sample count, so it is re-encoded (cheap at 16 kHz mono)
+    codec = ["-c", "copy"] if NORMALIZE_FORMAT == "ogg" else _ENCODERS[NORMALIZE_FORMAT]
+    cmd = [ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y", "-i", path, "-t", f"{seconds:.3f}", *codec, tmp_path]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, timeout=AUDIO_NORMALIZE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        _remove(tmp_path)
+        return False
+    if proc.returncode != 0 or not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+        _remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+@traced("audio.normalize")
+def normalize_audio(src_path: str, dst_dir: Optional[str] = None) -> Optional[dict]:
+    """
+    Writes <name>.norm.<format> next to src_path (or in dst_dir). Returns
+    {"path", "format", "bytes_in", "bytes_out", "seconds"}, or None when
+    normalization is off, ffmpeg is missing or the conversion failed.
+    """
+    if not normalization_available():
+        return None
+    ffmpeg = ffmpeg_path()
+
+    base = os.path.splitext(os.path.basename(src_path))[0]
+    dst_path = os.path.join(dst_dir or os.path.dirname(src_path), f"{base}.norm.{NORMALIZE_FORMAT}")
+
+    cmd = [
+        # info: silencedetect logs at that level (stderr is a few lines per pause)
+        ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "info", "-y",
+        "-i", src_path,
+        "-vn", "-sn", "-dn", "-map", "0:a:0",
+        "-ac", "1", "-af", _filters(), "-ar", str(SAMPLE_RATE),
+        *_ENCODERS[NORMALIZE_FORMAT],
+        dst_path,
+    ]
+    t = time.perf_counter()
+    try:
+        proc = subprocess.run(cmd, capture_output=True, timeout=AUDIO_NORMALIZE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print("⚠️ Audio normalization failed, uploading original:", e)
+        _remove(dst_path)
+        return None
+
+    stderr = proc.stderr.decode("utf-8", errors="ignore")
+    if proc.returncode != 0 or not os.path.exists(dst_path) or os.path.getsize(dst_path) == 0:
+        err = stderr.strip().splitlines()
+        print("⚠️ Audio normalization failed, uploading original:", err[-1] if err else proc.returncode)
+        _remove(dst_path)
+        return None
+
+    trailing = _trailing_silence_start(stderr)
+    if trailing is not None and not _cut_end(ffmpeg, dst_path, trailing + _KEEP_SECONDS):
+        print("⚠️ Trailing silence trim failed, keeping it")
+
+    return {
+        "path": dst_path,
+        "format": NORMALIZE_FORMAT,
+        "bytes_in": os.path.getsize(src_path),
+        "bytes_out": os.path.getsize(dst_path),
+        "seconds": round(time.perf_counter() - t, 3),
+    }
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    # ffmpeg already runs as its own process; the pool only bounds how many
+    # run at once and keeps the wait off the event loop
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=AUDIO_NORMALIZE_WORKERS, thread_name_prefix="audio-normalize"
+                )
+    return _executor
+
+
+def run_bounded(fn, *args):
+    """
+    Runs fn(*args) on the normalize pool and waits for it, from a worker
+    thread. Other ffmpeg work (split.plan_split / extract_segment) goes
+    through here so it shares the AUDIO_NORMALIZE_WORKERS bound.
+    """
+    return _pool().submit(contextvars.copy_context().run, fn, *args).result()
+
+
+async def normalize_audio_async(src_path: str, dst_dir: Optional[str] = None) -> Optional[dict]:
+    # copy_context so a profiled request keeps its profile in the pool thread
+    ctx = contextvars.copy_context()
+    return await asyncio.wrap_future(_pool().submit(ctx.run, normalize_audio, src_path, dst_dir))
@@ -0,0 +1,195 @@
+# backend/audio/split.py
+"""
+Splitting long recordings for parallel transcription.
+
+One Transcribe job takes time roughly proportional to the audio length, so a
+60-minute call waits for a 60-minute job. Above TRANSCRIBE_SPLIT_MIN_SECONDS
+the (normalized) audio is cut into ~TRANSCRIBE_SPLIT_SEGMENT_SECONDS pieces
+that are transcribed concurrently and stitched back together
+(backend/transcript/stitch.py).
+
+Cuts go in the longest pause (ffmpeg silencedetect) within
+TRANSCRIBE_SPLIT_WINDOW_SECONDS of each target, so words aren't cut in half;
+with no pause in the window the cut is made at the target. Each segment
+owns [start, end) of the original timeline but its audio starts
+TRANSCRIBE_SPLIT_OVERLAP_SECONDS earlier: the words heard in both
+segments are what maps one segment's speaker labels onto the previous one's.
+"""
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from backend.audio.normalize import SAMPLE_RATE, ffmpeg_path
+from backend.profiling import traced
+
+TRANSCRIBE_SPLIT = os.getenv("TRANSCRIBE_SPLIT", "true").lower() == "true"
+TRANSCRIBE_SPLIT_MIN_SECONDS = float(os.getenv("TRANSCRIBE_SPLIT_MIN_SECONDS", "900"))
+TRANSCRIBE_SPLIT_SEGMENT_SECONDS = float(os.getenv("TRANSCRIBE_SPLIT_SEGMENT_SECONDS", "600"))
+TRANSCRIBE_SPLIT_WINDOW_SECONDS = float(os.getenv("TRANSCRIBE_SPLIT_WINDOW_SECONDS", "60"))
+TRANSCRIBE_SPLIT_OVERLAP_SECONDS = float(os.getenv("TRANSCRIBE_SPLIT_OVERLAP_SECONDS", "15"))
+
+# Pauses between turns, not the near-digital silence normalize.py trims
+SPLIT_SILENCE_DB = int(os.getenv("TRANSCRIBE_SPLIT_SILENCE_DB", "-35"))
+SPLIT_SILENCE_SECONDS = float(os.getenv("TRANSCRIBE_SPLIT_SILENCE_SECONDS", "0.4"))
+SPLIT_TIMEOUT = float(os.getenv("TRANSCRIBE_SPLIT_TIMEOUT_SECONDS", "120"))
+
+_DURATION = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+_SILENCE_START = re.compile(r"silence_start:\s*(-?\d+(?:\.\d+)?)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?\d+(?:\.\d+)?)")
+
+
+@dataclass(frozen=True)
+class Segment:
+    """
+    Owns [start, end) seconds of the original; its audio starts at
+    audio_start (<= start, the overlap with the previous segment).
+    """
+
+    index: int
+    start: float
+    end: float
+    audio_start: float
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.end - self.audio_start
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """
+    Duration in seconds from the container header, None if unknown.
+    """
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        return None
+    try:
+        proc = subprocess.run(
+            [ffmpeg, "-nostdin", "-hide_banner", "-i", path],
+            capture_output=True, timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    # No output file given, so ffmpeg exits 1 after printing the input info
+    m = _DURATION.search(proc.stderr.decode("utf-8", errors="ignore"))
+    if not m:
+        return None
+    h, mnt, s = m.groups()
+    return int(h) * 3600 + int(mnt) * 60 + float(s)
+
+
+@traced("audio.detect_silences")
+def detect_silences(path: str) -> List[Tuple[float, float]]:
+    """
+    (start, end) of every pause of at least SPLIT_SILENCE_SECONDS below
+    SPLIT_SILENCE_DB. One decode pass, no output written.
+    """
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        return []
+    cmd = [
+        ffmpeg, "-nostdin", "-hide_banner", "-i", path, "-vn",
+        "-af", f"silencedetect=noise={SPLIT_SILENCE_DB}dB:d={SPLIT_SILENCE_SECONDS}",
+        "-f", "null", "-",
+    ]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, timeout=SPLIT_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print("⚠️ Silence detection failed:", e)
+        return []
+
+    silences = []
+    start = None
+    for line in proc.stderr.decode("utf-8", errors="ignore").splitlines():
+        m = _SILENCE_START.search(line)
+        if m:
+            start = max(0.0, float(m.group(1)))
+            continue
+        m = _SILENCE_END.search(line)
+        if m and start is not None:
+            silences.append((start, float(m.group(1))))
+            start = None
+    return silences
+
+
+def plan_segments(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    segment_seconds: float = TRANSCRIBE_SPLIT_SEGMENT_SECONDS,
+    window_seconds: float = TRANSCRIBE_SPLIT_WINDOW_SECONDS,
+    overlap_seconds: float = TRANSCRIBE_SPLIT_OVERLAP_SECONDS,
+) -> List[Segment]:
+    """
+    Cut points every ~segment_seconds, each moved to the middle of the
+    longest pause within window_seconds of its target. A remainder shorter
+    than a quarter segment is folded into the last segment.
+    """
+    cuts = [0.0]
+    while duration - cuts[-1] > segment_seconds * 1.25:
+        target = cuts[-1] + segment_seconds
+        nearby = [
+            (end - start, (start + end) / 2)
+            for start, end in silences
+            if abs((start + end) / 2 - target) <= window_seconds
+        ]
+        cut = max(nearby)[1] if nearby else target
+        cuts.append(cut)
+    cuts.append(duration)
+
+    return [
+        Segment(
+            index=i,
+            start=cuts[i],
+            end=cuts[i + 1],
+            audio_start=max(0.0, cuts[i] - overlap_seconds) if i else 0.0,
+        )
+        for i in range(len(cuts) - 1)
+    ]
+
+
+def plan_split(path: str) -> Optional[List[Segment]]:
+    """
+    Segments for a local audio file, or None when it should go to
+    Transcribe whole (splitting off, ffmpeg missing, short audio).
+    """
+    if not TRANSCRIBE_SPLIT or not path or not os.path.exists(path):
+        return None
+    duration = probe_duration(path)
+    if duration is None or duration < TRANSCRIBE_SPLIT_MIN_SECONDS:
+        return None
+    segments = plan_segments(duration, detect_silences(path))
+    if len(segments) < 2:
+        return None
+    print(
+        f"✅ Splitting {duration:.0f}s of audio into {len(segments)} segments at "
+        + ", ".join(f"{s.start:.1f}s" for s in segments[1:])
+    )
+    return segments
+
+
+@traced("audio.extract_segment")
+def extract_segment(src_path: str, segment: Segment, dst_dir: str) -> str:
+    """
+    Writes the segment's audio (overlap included) as FLAC; returns its path.
+    """
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg not available")
+    base = os.path.splitext(os.path.basename(src_path))[0]
+    dst_path = os.path.join(dst_dir, f"{base}.part{segment.index:02d}.flac")
+    cmd = [
+        ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-ss", f"{segment.audio_start:.3f}", "-t", f"{segment.audio_seconds:.3f}",
+        "-i", src_path,
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-c:a", "flac", "-compression_level", "5",
+        dst_path,
+    ]
+    proc = subprocess.run(cmd, capture_output=True, timeout=SPLIT_TIMEOUT)
+    if proc.returncode != 0 or not os.path.exists(dst_path):
+        err = proc.stderr.decode("utf-8", errors="ignore").strip().splitlines()
+        raise RuntimeError(f"Segment extraction failed: {err[-1] if err else proc.returncode}")
+    return dst_path
@@ -1,12 +1,44 @@
 # backend/aws/s3_utils.py
+import math
 import os
+import time
 import boto3
+from botocore.config import Config
+
+from backend.profiling import traced
+from backend.signing import sign, verify
 
 AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
 S3_BUCKET = os.getenv("S3_BUCKET")
 
-s3 = boto3.client("s3", region_name=AWS_REGION)
+# Point at an S3-compatible stand-in (MinIO, moto_server, ...) for local runs
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+
+# Direct browser uploads (POST /uploads/presign)
+UPLOAD_PREFIX = "uploads/"
+UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "25"))
+PRESIGN_EXPIRES_SECONDS = int(os.getenv("S3_PRESIGN_EXPIRES_SECONDS", "900"))
+MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16"))
+MULTIPART_PART_MB = max(5, int(os.getenv("S3_MULTIPART_PART_MB", "8")))  # S3 minimum part size is 5MB
+# /uploads/complete must follow the presign; the slack covers a part PUT started just before its URL expired
+UPLOAD_TOKEN_TTL = 2 * PRESIGN_EXPIRES_SECONDS
+
+# extension -> accepted Content-Types (first one is what we sign if the browser sends none)
+AUDIO_CONTENT_TYPES = {
+    "mp3": ("audio/mpeg", "audio/mp3"),
+    "wav": ("audio/wav", "audio/x-wav", "audio/wave"),
+    "m4a": ("audio/mp4", "audio/x-m4a", "audio/m4a"),
+    "mp4": ("video/mp4", "audio/mp4"),
+}
+
+s3 = boto3.client(
+    "s3",
+    region_name=AWS_REGION,
+    endpoint_url=S3_ENDPOINT_URL,
+    config=Config(signature_version="s3v4"),
+)
 
+@traced("s3.upload")
 def upload_file_to_s3(local_path: str, key: str) -> str:
     """
     Uploads a local file to S3 and returns the S3 URI.
@@ -15,4 +47,177 @@ def upload_file_to_s3(local_path: str, key: str) -> str:
         raise RuntimeError("S3_BUCKET env var not set")
 
     s3.upload_file(local_path, S3_BUCKET, key)
-    return f"s3://{S3_BUCKET}/{key}"
\ No newline at end of file
+    return s3_uri(key)
+
+
+@traced("s3.download")
+def download_from_s3(key: str, local_path: str) -> str:
+    """
+    Downloads an object to `local_path` and returns the path.
+    """
+    if not S3_BUCKET:
+        raise RuntimeError("S3_BUCKET env var not set")
+
+    s3.download_file(S3_BUCKET, key, local_path)
+    return local_path
+
+
+def s3_uri(key: str) -> str:
+    return f"s3://{S3_BUCKET}/{key}"
+
+
+def s3_key(uri: str) -> str:
+    """
+    Object key of an s3://bucket/key URI.
+    """
+    return uri.split("/", 3)[3]
+
+
+def delete_from_s3(key: str) -> None:
+    """
+    Best-effort delete of a temporary object.
+    """
+    try:
+        s3.delete_object(Bucket=S3_BUCKET, Key=key)
+    except Exception as e:
+        print("⚠️ Failed to delete s3 object", key, "-", e)
+
+
+def audio_content_type(ext: str, content_type: str = None) -> str:
+    """
+    Content-Type to sign for an upload, or ValueError if ext/type aren't allowed.
+    """
+    allowed = AUDIO_CONTENT_TYPES.get((ext or "").lower())
+    if not allowed:
+        raise ValueError(f"Invalid file type. Allowed: {', '.join(AUDIO_CONTENT_TYPES)}")
+    if not content_type:
+        return allowed[0]
+    if content_type.lower() not in allowed:
+        raise ValueError(f"Content-Type {content_type} not allowed for .{ext}")
+    return content_type.lower()
+
+
+def _upload_token(key: str, upload_id: str, expires: int) -> str:
+    return f"{expires}.{sign('upload', key, upload_id, str(expires))}"
+
+
+def check_upload_token(key: str, upload_id: str, token: str) -> None:
+    """
+    Raises ValueError unless `token` is the one presign_upload() issued for
+    this key / upload_id and hasn't expired.
+    """
+    expires, _, signature = (token or "").partition(".")
+    if not expires.isdigit() or not verify(signature, "upload", key, upload_id or "", expires):
+        raise ValueError("Invalid upload token")
+    if int(expires) < time.time():
+        raise ValueError("Upload token expired, upload the file again")
+
+
+def presign_upload(key: str, content_type: str, size_bytes: int) -> dict:
+    """
+    Presigned direct-to-S3 upload for `key`.
+
+    - up to S3_MULTIPART_THRESHOLD_MB: one presigned POST whose policy pins
+      the key and Content-Type and caps the size (content-length-range)
+    - above it: a multipart upload with one presigned PUT URL per part; size
+      and type are re-checked in finish_upload(), since part PUTs can't carry
+      a policy
+    """
+    if not S3_BUCKET:
+        raise RuntimeError("S3_BUCKET env var not set")
+
+    max_bytes = UPLOAD_MAX_MB * 1024 * 1024
+    if size_bytes <= 0 or size_bytes > max_bytes:
+        raise ValueError(f"File too large. Max {UPLOAD_MAX_MB}MB")
+
+    expires = int(time.time()) + UPLOAD_TOKEN_TTL
+    if size_bytes <= MULTIPART_THRESHOLD_MB * 1024 * 1024:
+        post = s3.generate_presigned_post(
+            S3_BUCKET,
+            key,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_bytes],
+            ],
+            ExpiresIn=PRESIGN_EXPIRES_SECONDS,
+        )
+        return {
+            "method": "post",
+            "key": key,
+            "url": post["url"],
+            "fields": post["fields"],
+            "upload_token": _upload_token(key, "", expires),
+        }
+
+    part_size = MULTIPART_PART_MB * 1024 * 1024
+    mpu = s3.create_multipart_upload(Bucket=S3_BUCKET, Key=key, ContentType=content_type)
+    upload_id = mpu["UploadId"]
+    parts = [
+        {
+            "part_number": n,
+            "url": s3.generate_presigned_url(
+                "upload_part",
+                Params={"Bucket": S3_BUCKET, "Key": key, "UploadId": upload_id, "PartNumber": n},
+                ExpiresIn=PRESIGN_EXPIRES_SECONDS,
+            ),
+        }
+        for n in range(1, math.ceil(size_bytes / part_size) + 1)
+    ]
+    return {
+        "method": "multipart",
+        "key": key,
+        "upload_id": upload_id,
+        "part_size": part_size,
+        "parts": parts,
+        "upload_token": _upload_token(key, upload_id, expires),
+    }
+
+
+@traced("s3.finish_upload")
+def finish_upload(key: str, upload_id: str = None, parts: list = None, upload_token: str = None) -> dict:
+    """
+    Completes a multipart upload (if any) and verifies the stored object:
+    issued by presign_upload() (upload_token), under UPLOAD_PREFIX, within
+    UPLOAD_MAX_MB, an allowed audio Content-Type. Objects failing the checks
+    are deleted. Returns {"size", "content_type"}.
+    """
+    if not key.startswith(UPLOAD_PREFIX) or ".." in key:
+        raise ValueError("Invalid upload key")
+    check_upload_token(key, upload_id, upload_token)
+
+    if upload_id:
+        s3.complete_multipart_upload(
+            Bucket=S3_BUCKET,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": int(p["part_number"]), "ETag": p["etag"]}
+                    for p in sorted(parts or [], key=lambda p: int(p["part_number"]))
+                ]
+            },
+        )
+
+    head = s3.head_object(Bucket=S3_BUCKET, Key=key)
+    size = head["ContentLength"]
+    content_type = (head.get("ContentType") or "").lower()
+    ext = key.rsplit(".", 1)[-1].lower()
+
+    problem = None
+    if size > UPLOAD_MAX_MB * 1024 * 1024:
+        problem = f"File too large. Max {UPLOAD_MAX_MB}MB"
+    elif content_type not in AUDIO_CONTENT_TYPES.get(ext, ()):
+        problem = f"Content-Type {content_type or '(none)'} not allowed for .{ext}"
+    if problem:
+        s3.delete_object(Bucket=S3_BUCKET, Key=key)
+        raise ValueError(problem)
+
+    return {"size": size, "content_type": content_type}
+
+
+def abort_upload(key: str, upload_id: str, upload_token: str = None) -> None:
+    if not key.startswith(UPLOAD_PREFIX):
+        raise ValueError("Invalid upload key")
+    check_upload_token(key, upload_id, upload_token)
+    s3.abort_multipart_upload(Bucket=S3_BUCKET, Key=key, UploadId=upload_id)
@@ -0,0 +1,263 @@
+# backend/aws/transcribe_scheduler.py
+"""
+Admission control for Transcribe jobs.
+
+AWS caps concurrent transcription jobs per account/region; above the cap
+StartTranscriptionJob fails with LimitExceededException. The scheduler keeps
+at most TRANSCRIBE_MAX_CONCURRENT_JOBS jobs in flight (per process, so divide
+the account budget by the number of workers), queues the excess by priority
+(interactive before batch, FIFO within a priority) and rejects new work when
+the queue is full, so the API can answer 429 + Retry-After up front instead
+of accepting an upload it can't transcribe.
+
+Admission only reserves a place; a job slot is granted in wait(), right
+before StartTranscriptionJob, so the save / normalize / S3 upload before it
+doesn't hold a slot (or count as in flight, or stretch the job-time
+estimate behind Retry-After). Reserved places count against the queue limit.
+
+Usage:
+    ticket = get_transcribe_scheduler().submit("interactive")   # or QueueFull
+    ...save, normalize, upload...
+    if ticket.wait(timeout):        # queues for, then holds a job slot
+        ...start job, wait for it...
+    ticket.release()                # always; idempotent
+
+A cancelled job that Transcribe still runs keeps its slot: ticket.hold()
+makes release() a no-op and returns the callback that frees the slot once
+the job is really gone (transcribe_utils.delete_job(on_done=...)).
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+TRANSCRIBE_MAX_CONCURRENT_JOBS = int(os.getenv("TRANSCRIBE_MAX_CONCURRENT_JOBS", "10"))
+TRANSCRIBE_QUEUE_MAX = int(os.getenv("TRANSCRIBE_QUEUE_MAX", "20"))
+# Batch work may only fill part of the queue so interactive uploads still get in
+TRANSCRIBE_BATCH_QUEUE_MAX = int(os.getenv("TRANSCRIBE_BATCH_QUEUE_MAX", str(TRANSCRIBE_QUEUE_MAX // 2)))
+TRANSCRIBE_QUEUE_WAIT_SECONDS = float(os.getenv("TRANSCRIBE_QUEUE_WAIT_SECONDS", "600"))
+# Starting guess for how long a slot is held, refined from completed jobs
+TRANSCRIBE_EXPECTED_JOB_SECONDS = float(os.getenv("TRANSCRIBE_EXPECTED_JOB_SECONDS", "60"))
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+_RESERVED, _QUEUED, _GRANTED, _RELEASED = "reserved", "queued", "granted", "released"
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Transcription queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """
+    One admitted unit of work: reserved, queued once it waits for a job
+    slot, then granted one.
+    """
+
+    __slots__ = ("_scheduler", "priority", "state", "submitted_at", "queued_at", "granted_at", "held")
+
+    def __init__(self, scheduler: "TranscribeScheduler", priority: str):
+        self._scheduler = scheduler
+        self.priority = priority
+        self.state = _RESERVED
+        self.submitted_at = time.monotonic()
+        self.queued_at: Optional[float] = None
+        self.granted_at: Optional[float] = None
+        self.held = False
+
+    def wait(self, timeout: Optional[float] = None, cancel=None) -> bool:
+        """
+        Joins the slot queue (by priority, FIFO within one) and returns True
+        once the ticket holds a slot; False on timeout or when `cancel` (a
+        CancelToken) fires first - the ticket is then dropped.
+        """
+        return self._scheduler._wait(self, timeout, cancel)
+
+    def release(self) -> None:
+        self._scheduler._release(self)
+
+    def hold(self) -> Callable[[], None]:
+        """
+        Keeps a granted slot past release() (and the context manager exit);
+        the returned callback frees it.
+        """
+        if self.state != _GRANTED:
+            return self.release
+        self.held = True
+        return lambda: self._scheduler._release(self, held=True)
+
+    def __enter__(self) -> "Ticket":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class TranscribeScheduler:
+    def __init__(
+        self,
+        max_in_flight: int = TRANSCRIBE_MAX_CONCURRENT_JOBS,
+        queue_max: int = TRANSCRIBE_QUEUE_MAX,
+        batch_queue_max: int = TRANSCRIBE_BATCH_QUEUE_MAX,
+        expected_job_seconds: float = TRANSCRIBE_EXPECTED_JOB_SECONDS,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.queue_max = queue_max
+        self.batch_queue_max = min(batch_queue_max, queue_max)
+
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        # Admitted, not holding a slot: reserved (still preparing) + queued (in wait())
+        self._reserved: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._queued: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._in_flight = 0
+
+        self._job_seconds = expected_job_seconds
+        self._waits_ms: Deque[float] = deque(maxlen=1000)
+        self._counters = {"admitted": 0, "rejected": 0, "timed_out": 0, "cancelled": 0, "completed": 0}
+
+    # ---- admission ----
+
+    def _queue_limit(self, priority: str) -> int:
+        return self.batch_queue_max if priority == "batch" else self.queue_max
+
+    def _waiting(self) -> int:
+        # Admitted work beyond the free slots, i.e. what a new request queues behind
+        pending = sum(self._reserved.values()) + sum(self._queued.values())
+        return max(0, pending - (self.max_in_flight - self._in_flight))
+
+    def _retry_after(self) -> int:
+        # Time for the queue ahead (plus this request) to drain through the slots
+        ahead = self._waiting() + 1
+        return max(1, math.ceil(self._job_seconds * math.ceil(ahead / self.max_in_flight)))
+
+    def has_capacity(self, priority: str = "interactive") -> bool:
+        with self._cond:
+            return self._waiting() < self._queue_limit(priority)
+
+    def retry_after(self) -> int:
+        with self._cond:
+            return self._retry_after()
+
+    def submit(self, priority: str = "interactive") -> Ticket:
+        """
+        Admits work or raises QueueFull. Never blocks.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Invalid priority. Allowed: {', '.join(PRIORITIES)}")
+
+        with self._cond:
+            if self._waiting() >= self._queue_limit(priority):
+                self._counters["rejected"] += 1
+                raise QueueFull(self._retry_after())
+
+            ticket = Ticket(self, priority)
+            self._reserved[priority] += 1
+            self._counters["admitted"] += 1
+            return ticket
+
+    def _dispatch(self) -> None:
+        granted = False
+        while self._heap and self._in_flight < self.max_in_flight:
+            _, _, ticket = heapq.heappop(self._heap)
+            if ticket.state != _QUEUED:
+                continue  # timed out / released while queued
+            self._queued[ticket.priority] -= 1
+            ticket.state = _GRANTED
+            ticket.granted_at = time.monotonic()
+            self._waits_ms.append((ticket.granted_at - ticket.queued_at) * 1000)
+            self._in_flight += 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _wait(self, ticket: Ticket, timeout: Optional[float], cancel=None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if ticket.state == _RESERVED:
+                ticket.state = _QUEUED
+                ticket.queued_at = time.monotonic()
+                self._reserved[ticket.priority] -= 1
+                self._queued[ticket.priority] += 1
+                heapq.heappush(self._heap, (PRIORITIES[ticket.priority], next(self._seq), ticket))
+                self._dispatch()
+            while ticket.state == _QUEUED:
+                if cancel is not None and cancel.cancelled:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                # Cancellation doesn't notify the condition: re-check it every 0.5s
+                self._cond.wait(0.5 if cancel is not None and (remaining is None or remaining > 0.5) else remaining)
+            if ticket.state == _QUEUED:
+                ticket.state = _RELEASED
+                self._queued[ticket.priority] -= 1
+                self._counters["cancelled" if cancel is not None and cancel.cancelled else "timed_out"] += 1
+                return False
+            return ticket.state == _GRANTED
+
+    def _release(self, ticket: Ticket, held: bool = False) -> None:
+        with self._cond:
+            if ticket.held and not held:
+                return
+            if ticket.state == _GRANTED:
+                self._in_flight -= 1
+                self._counters["completed"] += 1
+                # A held slot waited for a delete, not a job: keep it out of the estimate
+                if not held:
+                    duration = time.monotonic() - ticket.granted_at
+                    self._job_seconds = 0.8 * self._job_seconds + 0.2 * duration
+                self._dispatch()
+            elif ticket.state == _QUEUED:
+                self._queued[ticket.priority] -= 1
+            elif ticket.state == _RESERVED:
+                self._reserved[ticket.priority] -= 1
+            ticket.state = _RELEASED
+
+    # ---- metrics ----
+
+    def metrics(self) -> dict:
+        with self._cond:
+            waits = sorted(self._waits_ms)
+            oldest = min(
+                (t.submitted_at for _, _, t in self._heap if t.state == _QUEUED), default=None
+            )
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "reserved": dict(self._reserved),
+                "queue_depth": dict(self._queued),
+                "queue_max": self.queue_max,
+                "oldest_queued_seconds": round(time.monotonic() - oldest, 1) if oldest is not None else 0.0,
+                "wait_ms": {
+                    "p50": round(waits[len(waits) // 2], 1) if waits else 0.0,
+                    "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 1) if waits else 0.0,
+                    "max": round(waits[-1], 1) if waits else 0.0,
+                    "samples": len(waits),
+                },
+                "avg_job_seconds": round(self._job_seconds, 1),
+                "retry_after_seconds": self._retry_after(),
+                **self._counters,
+            }
+
+
+_scheduler: Optional[TranscribeScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_transcribe_scheduler() -> TranscribeScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = TranscribeScheduler()
+    return _scheduler
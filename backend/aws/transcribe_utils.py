@@ -1,28 +1,69 @@
 # backend/aws/transcribe_utils.py
 import os
+import threading
 import time
-import json
-import urllib.request
+from typing import Callable, Optional
+
 import boto3
+import urllib3
+from botocore.exceptions import ClientError
+
+from backend.profiling import traced
+from backend.transcript.timeline import TranscriptTimeline
+from backend.transcript.transcribe_json import parse_transcribe_stream
 
 AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
 
+# Speaker diarization is what makes rep vs customer talk metrics possible
+SHOW_SPEAKER_LABELS = os.getenv("TRANSCRIBE_SPEAKER_LABELS", "true").lower() == "true"
+MAX_SPEAKER_LABELS = int(os.getenv("TRANSCRIBE_MAX_SPEAKERS", "2"))
+
 transcribe = boto3.client("transcribe", region_name=AWS_REGION)
 
+# Shared keep-alive pool for transcript downloads (presigned S3 URLs)
+FETCH_ATTEMPTS = int(os.getenv("TRANSCRIPT_FETCH_ATTEMPTS", "3"))
+
+http = urllib3.PoolManager(
+    num_pools=4,
+    maxsize=int(os.getenv("TRANSCRIPT_HTTP_POOL_SIZE", "8")),
+    timeout=urllib3.Timeout(
+        connect=float(os.getenv("TRANSCRIPT_CONNECT_TIMEOUT", "5")),
+        read=float(os.getenv("TRANSCRIPT_READ_TIMEOUT", "30")),
+    ),
+    retries=urllib3.Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+    ),
+)
+
+@traced("transcribe.start_job")
 def start_transcription_job(job_name: str, media_s3_uri: str, media_format: str = "mp3", language_code: str = "en-US"):
+    kwargs = {}
+    if SHOW_SPEAKER_LABELS:
+        kwargs["Settings"] = {"ShowSpeakerLabels": True, "MaxSpeakerLabels": MAX_SPEAKER_LABELS}
+
     transcribe.start_transcription_job(
         TranscriptionJobName=job_name,
         Media={"MediaFileUri": media_s3_uri},
         MediaFormat=media_format,
         LanguageCode=language_code,
+        **kwargs,
     )
 
-def wait_for_job(job_name: str, timeout_seconds: int = 300) -> dict:
+@traced("transcribe.wait_for_job")
+def wait_for_job(job_name: str, timeout_seconds: int = 300, cancel=None) -> dict:
     """
-    Polls Transcribe until completed/failed.
+    Polls Transcribe until completed/failed. With a CancelToken
+    (backend/cancellation.py) the wait between polls ends early and
+    Cancelled is raised.
     """
     start = time.time()
     while True:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+
         resp = transcribe.get_transcription_job(TranscriptionJobName=job_name)
         status = resp["TranscriptionJob"]["TranscriptionJobStatus"]
 
@@ -32,14 +73,76 @@ def wait_for_job(job_name: str, timeout_seconds: int = 300) -> dict:
         if time.time() - start > timeout_seconds:
             raise TimeoutError("Transcribe job timed out")
 
-        time.sleep(3)
+        if cancel is not None:
+            cancel.wait(3)
+        else:
+            time.sleep(3)
+
+
+def delete_job(job_name: str, timeout_seconds: int = 900, on_done: Optional[Callable[[], None]] = None) -> None:
+    """
+    Deletes an abandoned job. Transcribe may refuse while the job is still
+    running; then a background thread deletes it once it has finished.
+    `on_done` runs when the job is gone (or the attempt is given up), e.g. to
+    free the job slot it still occupies.
+    """
+    try:
+        transcribe.delete_transcription_job(TranscriptionJobName=job_name)
+        if on_done is not None:
+            on_done()
+        return
+    except ClientError as ce:
+        code = ce.response.get("Error", {}).get("Code", "")
+        if code not in ("BadRequestException", "ConflictException"):
+            print("⚠️ Failed to delete Transcribe job", job_name, "-", code)
+            if on_done is not None:
+                on_done()
+            return
+
+    def _delete_when_done():
+        try:
+            deadline = time.time() + timeout_seconds
+            while time.time() < deadline:
+                time.sleep(15)
+                try:
+                    transcribe.delete_transcription_job(TranscriptionJobName=job_name)
+                    return
+                except ClientError as ce:
+                    if ce.response.get("Error", {}).get("Code", "") in ("NotFoundException",):
+                        return
+        finally:
+            if on_done is not None:
+                on_done()
+
+    threading.Thread(target=_delete_when_done, name=f"delete-{job_name}", daemon=True).start()
+
+@traced("transcribe.fetch_transcript")
+def fetch_transcript(transcript_file_uri: str) -> tuple[str, TranscriptTimeline]:
+    """
+    Streams the transcript JSON and returns (text, word timeline).
+    The document is parsed incrementally and never held in memory as a whole.
+    """
+    for attempt in range(1, FETCH_ATTEMPTS + 1):
+        resp = http.request("GET", transcript_file_uri, preload_content=False, decode_content=True)
+        try:
+            if resp.status != 200:
+                raise RuntimeError(f"Transcript download failed with HTTP {resp.status}")
+            return parse_transcribe_stream(resp)
+
+        except (urllib3.exceptions.ProtocolError, urllib3.exceptions.ReadTimeoutError):
+            # Connection dropped mid-stream: restart the download from scratch
+            if attempt == FETCH_ATTEMPTS:
+                raise
+            time.sleep(0.5 * attempt)
+
+        finally:
+            resp.drain_conn()
+            resp.release_conn()
+
 
 def fetch_transcript_text(transcript_file_uri: str) -> str:
     """
     Downloads the transcript JSON from the TranscriptFileUri and extracts the text.
     """
-    with urllib.request.urlopen(transcript_file_uri) as f:
-        data = json.loads(f.read().decode("utf-8"))
-
-    # Standard Transcribe JSON structure
-    return data["results"]["transcripts"][0]["transcript"]
\ No newline at end of file
+    text, _ = fetch_transcript(transcript_file_uri)
+    return text
\ No newline at end of file
@@ -0,0 +1,139 @@
+# backend/cancellation.py
+"""
+Cancellation for in-flight call analyses.
+
+Each /upload-audio/ or /uploads/complete request registers a CancelToken
+under its request id: the X-Request-Id header if it's one the server issued
+(POST /requests, signed so it can't be guessed or made up), otherwise a
+generated one nobody else knows. Only the holder of an issued id can cancel
+the request (POST /requests/{request_id}/cancel) or supersede it with a
+retry; any request is also cancelled when its client disconnects (the
+endpoint watches the connection). The pipeline checks
+it between stages, the Transcribe poll loop waits on it instead of sleeping,
+and a queued request gives up its place; the Transcribe job is deleted.
+
+Counters of the work that was skipped are served from /health/cancellations.
+"""
+from __future__ import annotations
+
+import secrets
+import threading
+import uuid
+from collections import Counter
+from typing import Dict, Optional
+
+from backend.signing import sign, verify
+
+
+class Cancelled(Exception):
+    def __init__(self, reason: str = "cancelled"):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelToken:
+    __slots__ = ("request_id", "reason", "_event")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str) -> bool:
+        if self._event.is_set():
+            return False
+        self.reason = reason
+        self._event.set()
+        return True
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Sleeps up to `timeout`, returning True early if cancelled.
+        """
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled(self.reason or "cancelled")
+
+
+_lock = threading.Lock()
+_tokens: Dict[str, CancelToken] = {}
+
+# Work saved by cancellations
+stats: Counter = Counter()
+
+
+def _count(key: str, n: int = 1) -> None:
+    with _lock:
+        stats[key] += n
+
+
+def issue_request_id() -> str:
+    """
+    A fresh request id for X-Request-Id: random, signed by the server.
+    """
+    nonce = secrets.token_hex(16)
+    return f"{nonce}.{sign('request_id', nonce)}"
+
+
+def is_issued(request_id: Optional[str]) -> bool:
+    nonce, _, signature = (request_id or "").strip().partition(".")
+    return bool(nonce) and verify(signature, "request_id", nonce)
+
+
+def register(request_id: Optional[str] = None) -> CancelToken:
+    """
+    `request_id` is the client's X-Request-Id; ids the server didn't issue
+    are replaced, so they can't be used to cancel someone else's request.
+    """
+    request_id = request_id.strip() if is_issued(request_id) else uuid.uuid4().hex
+    token = CancelToken(request_id)
+    with _lock:
+        # A retry with the same id supersedes the earlier attempt
+        previous = _tokens.get(request_id)
+        _tokens[request_id] = token
+    if previous is not None and previous.cancel("superseded"):
+        _count("cancelled.superseded")
+    return token
+
+
+def unregister(token: CancelToken) -> None:
+    with _lock:
+        if _tokens.get(token.request_id) is token:
+            del _tokens[token.request_id]
+
+
+def cancel(request_id: str, reason: str = "cancel_requested") -> bool:
+    """
+    Cancels a running request; False if it isn't running (anymore).
+    """
+    with _lock:
+        token = _tokens.get(request_id)
+    if token is None or not token.cancel(reason):
+        return False
+    _count(f"cancelled.{reason}")
+    return True
+
+
+def record_saved(what: str, n: int = 1) -> None:
+    """
+    Counts a unit of work skipped because of a cancellation, e.g.
+    "transcribe_polling_stopped", "transcribe_jobs_deleted", "agent_runs_skipped".
+    """
+    _count(f"saved.{what}", n)
+
+
+def metrics() -> dict:
+    with _lock:
+        active = len(_tokens)
+        counts = dict(stats)
+    return {
+        "active_requests": active,
+        "cancelled": {k.split(".", 1)[1]: v for k, v in counts.items() if k.startswith("cancelled.")},
+        "work_saved": {k.split(".", 1)[1]: v for k, v in counts.items() if k.startswith("saved.")},
+    }
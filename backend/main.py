@@ -1,7 +1,11 @@
 # backend/main.py
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse
-import shutil, os, uuid, traceback
+from fastapi import FastAPI, UploadFile, File, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+from datetime import datetime, timezone
+from typing import List, Optional
+import asyncio, shutil, os, uuid, traceback
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -13,18 +17,62 @@ if missing:
 
 from botocore.exceptions import ClientError
 
-from backend.agents.sentiment_agent import sentiment_agent
-
-from backend.agents.transcript_analyzer import transcript_analyzer_agent
-from backend.agents.sales_coach import sales_coach_agent
-from backend.agents.objection_expert import objection_expert_agent
-from backend.agents.final_report import generate_final_report
-
-from backend.aws.s3_utils import upload_file_to_s3
-from backend.aws.transcribe_utils import start_transcription_job, wait_for_job, fetch_transcript_text
-
-USE_MOCK_TRANSCRIPT = os.getenv("USE_MOCK_TRANSCRIPT", "false").lower() == "true"
-MOCK_TRANSCRIPT_PATH = os.path.join("backend", "sample_transcripts", "sample_call.txt")
+from backend.aws.s3_utils import (
+    AUDIO_CONTENT_TYPES,
+    UPLOAD_MAX_MB,
+    UPLOAD_PREFIX,
+    abort_upload,
+    audio_content_type,
+    check_upload_token,
+    download_from_s3,
+    finish_upload,
+    presign_upload,
+    s3_uri,
+    upload_file_to_s3,
+)
+from backend.audio.normalize import normalization_available, normalize_audio_async
+from backend.aws.transcribe_scheduler import get_transcribe_scheduler
+from backend.pipeline import PipelineError, admit, analyze_call, ensure_capacity, prepare_call, reanalyze_call
+from backend.cancellation import Cancelled, issue_request_id, register, unregister
+from backend.cancellation import cancel as cancel_request
+from backend.cancellation import metrics as cancellation_metrics
+from backend.profiling import (
+    finish_profile,
+    is_admin,
+    list_profiles,
+    profile_path,
+    should_profile,
+    stage,
+    start_profile,
+)
+from backend.responses import json_response, shape_call_body
+from backend.store.agent_memo import get_agent_memo
+from backend.store.call_store import get_call_store
+from backend.store.rollups import ROLLUP_SCOPES, iso_week
+from backend.memory_report import memory_breakdown
+from backend.rag.query_rag import USE_FAKE_RAG, RAG_MODE
+from backend.rag.query_rag import preload as preload_rag
+from backend.rag.query_rag import result_cache_metrics as rag_result_cache_metrics
+from backend.rag import service_client as rag_service
+from backend.rag.retriever import embedding_batch_metrics
+from backend.rag.tenant_indexes import RAG_PREWARM_COMPANIES, RAG_PREWARM_TOP, get_tenant_cache
+from backend.rag.tenant_indexes import prewarm as prewarm_tenant_indexes
+
+# Load the embedding model + FAISS index (and/or BM25 postings) at import time. Under gunicorn with
+# preload_app (gunicorn.conf.py) this runs once in the master, before fork.
+PRELOAD_RAG = os.getenv("PRELOAD_RAG", "false").lower() == "true"
+# (not with RAG_SERVICE_URL: the retrieval service holds them, and no client connection
+# should be opened before the fork)
+if PRELOAD_RAG and not USE_FAKE_RAG and not rag_service.RAG_SERVICE_URL:
+    preload_rag()
+    print(f"✅ RAG preloaded (RAG_MODE={RAG_MODE})")
+
+# Per-company indexes of the busiest tenants (backend/rag/tenant_indexes.py);
+# with RAG_SERVICE_URL the retrieval service holds them instead
+if not USE_FAKE_RAG and not rag_service.RAG_SERVICE_URL and (RAG_PREWARM_COMPANIES or RAG_PREWARM_TOP > 0):
+    warmed = prewarm_tenant_indexes()
+    if warmed:
+        print(f"✅ RAG indexes pre-warmed for: {', '.join(warmed)}")
 
 
 app = FastAPI()
@@ -32,6 +80,29 @@ app = FastAPI()
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """
+    Opt-in per-request profiling (backend/profiling.py); off unless PROFILING_ENABLED.
+    """
+    path = request.url.path
+    reason = None
+    if not path.startswith(("/admin", "/health")):
+        reason = should_profile(
+            request.headers.get("x-profile") or request.query_params.get("profile"),
+            request.headers.get("x-admin-token"),
+        )
+    if reason is None:
+        return await call_next(request)
+
+    profile, token = start_profile(f"{request.method} {path}", reason)
+    try:
+        response = await call_next(request)
+    finally:
+        finish_profile(profile, token)
+    response.headers["X-Profile-Id"] = profile.id
+    return response
+
 @app.get("/")
 def serve_ui():
     return FileResponse("frontend/index.html")
@@ -40,17 +111,430 @@ def serve_ui():
 def health():
     return {"status": "ok"}
 
+@app.get("/health/memory")
+def health_memory():
+    """
+    This worker's unique vs shared resident memory (see gunicorn.conf.py).
+    """
+    return memory_breakdown()
+
+@app.get("/health/transcribe")
+def health_transcribe():
+    """
+    Transcribe admission control: in-flight jobs vs quota, queue depth per
+    priority, queue wait percentiles, rejections.
+    """
+    return get_transcribe_scheduler().metrics()
+
+@app.get("/health/rag")
+def health_rag():
+    """
+    Per-company index cache: resident tenants and MB vs budget, hit rate,
+    loads, evictions; plus the query result cache the pipeline prefetches into
+    and the retrieval service client (RAG_SERVICE_URL), if used; plus the
+    query embedding micro-batches (batch sizes, queue wait, forward pass).
+    """
+    return {
+        **get_tenant_cache().metrics(),
+        "result_cache": rag_result_cache_metrics(),
+        "service": rag_service.metrics(),
+        "embed_batching": embedding_batch_metrics(),
+    }
+
+@app.get("/health/agent-memo")
+def health_agent_memo():
+    """
+    Memoized agent outputs: entries and MB vs budget, hit rate, evictions.
+    """
+    memo = get_agent_memo()
+    return memo.metrics() if memo is not None else {"enabled": False}
+
+def _admin_denied(request: Request) -> Optional[JSONResponse]:
+    if not is_admin(request.headers.get("x-admin-token")):
+        return JSONResponse(status_code=403, content={"error": "Admin token required"})
+    return None
+
+@app.get("/admin/profiles")
+def admin_list_profiles(request: Request, limit: int = 50):
+    denied = _admin_denied(request)
+    if denied:
+        return denied
+    return {"profiles": list_profiles(limit)}
+
+@app.get("/admin/profiles/{profile_id}")
+def admin_get_profile(profile_id: str, request: Request, format: str = "json"):
+    """
+    Stage trace (format=json) or CPU samples as folded stacks (format=folded),
+    e.g. `flamegraph.pl profile.folded > profile.svg` or drop into speedscope.
+    """
+    denied = _admin_denied(request)
+    if denied:
+        return denied
+    if format not in ("json", "folded"):
+        return JSONResponse(status_code=400, content={"error": "format must be json or folded"})
+    path = profile_path(profile_id, format)
+    if path is None:
+        return JSONResponse(status_code=404, content={"error": "Profile not found"})
+    if format == "json":
+        return FileResponse(path, media_type="application/json")
+    with open(path, "r", encoding="utf-8") as f:
+        return PlainTextResponse(
+            f.read(), headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'}
+        )
+
+def _pipeline_error(e: PipelineError) -> JSONResponse:
+    return JSONResponse(status_code=e.status_code, content=e.content, headers=e.headers)
+
+@app.get("/health/cancellations")
+def health_cancellations():
+    """
+    Requests cancelled (client gone / explicit cancel) and the work that saved.
+    """
+    return cancellation_metrics()
+
+@app.post("/requests")
+def new_request_id():
+    """
+    Issues a request id. Send it as `X-Request-Id` with /upload-audio/ or
+    /uploads/complete to be able to cancel that call; other ids are ignored.
+    """
+    return {"request_id": issue_request_id()}
+
+@app.post("/requests/{request_id}/cancel")
+def cancel_request_endpoint(request_id: str):
+    """
+    Cancels an in-flight /upload-audio/ or /uploads/complete call started
+    with `X-Request-Id: <request_id>` (an id from POST /requests).
+    """
+    if not cancel_request(request_id, "cancel_requested"):
+        return JSONResponse(status_code=404, content={"error": "No running request with that id"})
+    return {"cancelled": True, "request_id": request_id}
+
+async def _cancel_on_disconnect(request: Request, request_id: str) -> None:
+    while True:
+        if await request.is_disconnected():
+            cancel_request(request_id, "client_disconnected")
+            return
+        await asyncio.sleep(1)
+
+def _cancelled_response(e: Cancelled) -> JSONResponse:
+    # 499 = client closed request (nginx convention); usually nobody reads it
+    return JSONResponse(status_code=499, content={"error": "Cancelled", "reason": e.reason})
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    """
+    Accepts epoch seconds or an ISO date/datetime (naive = UTC).
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+@app.get("/calls")
+def list_calls(
+    rep: Optional[str] = None,
+    company: Optional[str] = None,
+    team: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+):
+    """
+    Lists stored calls, newest first. Pass `next_cursor` back as `cursor` for the next page.
+    """
+    try:
+        return get_call_store().list_calls(
+            rep=rep,
+            company=company,
+            team=team,
+            sentiment=sentiment.capitalize() if sentiment else None,
+            date_from=_parse_date(date_from),
+            date_to=_parse_date(date_to),
+            min_score=min_score,
+            max_score=max_score,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+
+def _call_response(request: Request, body: dict, fields: Optional[str], include: Optional[str], report_key: str = "dashboard"):
+    """
+    Call body with ?fields= / ?include= applied, compressed per Accept-Encoding
+    (see backend/responses.py).
+    """
+    try:
+        return json_response(shape_call_body(body, fields, include, report_key), request)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+
+@app.get("/calls/{call_id}")
+def get_call(call_id: str, request: Request, fields: Optional[str] = None, include: Optional[str] = None):
+    call = get_call_store().get_call(call_id)
+    if call is None:
+        return JSONResponse(status_code=404, content={"error": "Call not found"})
+    return _call_response(request, call, fields, include, report_key="report")
+
+@app.post("/calls/{call_id}/reanalyze")
+def reanalyze_call_endpoint(call_id: str, request: Request, fields: Optional[str] = None, include: Optional[str] = None):
+    """
+    Re-scores a stored call with the current agents/ruleset/RAG indexes.
+    Only agents whose inputs changed are re-run (see store/agent_memo.py);
+    `agents` says which were cached vs computed.
+    """
+    try:
+        body = reanalyze_call(call_id)
+    except PipelineError as e:
+        return _pipeline_error(e)
+    return _call_response(request, body, fields, include)
+
+
+@app.get("/analytics/{scope}/{scope_id}")
+def get_rollup(scope: str, scope_id: str, week: Optional[str] = None):
+    """
+    Weekly rep/team/company stats (avg score, sentiment mix, next-step rate,
+    top missed objections), read from incrementally maintained rollups.
+    `week` is an ISO week like 2026-W42 (defaults to the current week).
+    """
+    if scope not in ROLLUP_SCOPES:
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"Invalid scope. Allowed: {', '.join(ROLLUP_SCOPES)}"},
+        )
+    week = week or iso_week(datetime.now(timezone.utc).timestamp())
+    return get_call_store().get_rollup(scope, scope_id, week)
+
+
+class PresignRequest(BaseModel):
+    filename: str
+    size: int
+    content_type: Optional[str] = None
+    priority: str = "interactive"
+
+
+class UploadPart(BaseModel):
+    part_number: int
+    etag: str
+
+
+class CompleteUploadRequest(BaseModel):
+    key: str
+    upload_token: Optional[str] = None  # from /uploads/presign
+    filename: Optional[str] = None
+    upload_id: Optional[str] = None
+    parts: List[UploadPart] = []
+    rep: Optional[str] = None
+    company: Optional[str] = None
+    team: Optional[str] = None
+    priority: str = "interactive"
+
+
+def _safe_filename(filename: str) -> str:
+    name = os.path.basename(filename or "audio")
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in name) or "audio"
+
+
+@app.post("/uploads/presign")
+def presign_upload_endpoint(req: PresignRequest):
+    """
+    Issues a presigned direct-to-S3 upload (POST form, or multipart part URLs
+    for large files) so audio bytes never pass through the API server.
+    """
+    filename = _safe_filename(req.filename)
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    try:
+        content_type = audio_content_type(ext, req.content_type)
+        # Don't let the browser upload a file we'd have to turn away at /uploads/complete
+        ensure_capacity(req.priority)
+        return presign_upload(f"{UPLOAD_PREFIX}{uuid.uuid4()}-{filename}", content_type, req.size)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except PipelineError as e:
+        return _pipeline_error(e)
+
+
+@app.post("/uploads/complete")
+async def complete_upload_endpoint(
+    req: CompleteUploadRequest,
+    request: Request,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+):
+    """
+    Called by the browser once the S3 upload finished: verifies the object
+    (size/type), normalizes it like /upload-audio/ (download, convert, upload
+    the result next to it), then transcribes and analyses it.
+    """
+    # Admit before completing the upload: a 429 here can be retried with the same request
+    try:
+        ticket = admit(req.priority)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except PipelineError as e:
+        return _pipeline_error(e)
+
+    token = register(request.headers.get("x-request-id"))
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, token.request_id))
+    normalized = None
+    prepared = None
+    claimed = None
+    stored = False
+    try:
+        # One analysis per uploaded object: a repeat (double click, client retry)
+        # gets the first call's id instead of a second Transcribe job and call row
+        try:
+            check_upload_token(req.key, req.upload_id, req.upload_token)
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
+        store = get_call_store()
+        call_id = uuid.uuid4().hex
+        earlier = await run_in_threadpool(store.claim_upload, req.key, call_id)
+        if earlier is not None:
+            status = "stored" if await run_in_threadpool(store.get_call, earlier) else "in_progress"
+            return JSONResponse(
+                status_code=409,
+                content={"error": "Upload already completed", "call_id": earlier, "status": status},
+            )
+        claimed = call_id
+
+        # RAG warm-up / company index / fixed agent queries overlap the download,
+        # normalize and re-upload as well as Transcribe
+        prepared = prepare_call(req.company)
+        try:
+            await run_in_threadpool(
+                finish_upload, req.key, req.upload_id, [p.model_dump() for p in req.parts], req.upload_token
+            )
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
+        except ClientError as ce:
+            code = ce.response.get("Error", {}).get("Code", "")
+            if code in ("404", "NoSuchKey", "NoSuchUpload"):
+                return JSONResponse(status_code=404, content={"error": "Upload not found"})
+            raise
+
+        filename = req.filename or req.key.rsplit("/", 1)[-1]
+        media_key, media_format, local_path = req.key, req.key.rsplit(".", 1)[-1].lower(), None
+        if normalization_available():
+            # The object is at most UPLOAD_MAX_MB; the normalized copy is what gets transcribed
+            raw_path = os.path.join(UPLOAD_DIR, req.key.rsplit("/", 1)[-1])
+            try:
+                await run_in_threadpool(download_from_s3, req.key, raw_path)
+                normalized = await normalize_audio_async(raw_path)
+            finally:
+                if os.path.exists(raw_path):
+                    os.remove(raw_path)
+            if normalized:
+                media_format, local_path = normalized["format"], normalized["path"]
+                media_key = f"{req.key.rsplit('.', 1)[0]}.norm.{media_format}"
+                await run_in_threadpool(upload_file_to_s3, local_path, media_key)
+                print(
+                    f"✅ Normalized audio: {normalized['bytes_in']} -> {normalized['bytes_out']} bytes "
+                    f"in {normalized['seconds']}s"
+                )
+            token.raise_if_cancelled()
+
+        result = await run_in_threadpool(
+            analyze_call,
+            s3_uri(media_key),
+            media_format,
+            filename,
+            rep=req.rep,
+            company=req.company,
+            team=req.team,
+            ticket=ticket,
+            cancel=token,
+            local_path=local_path,
+            prepared=prepared,
+            call_id=call_id,
+        )
+        stored = result["call_id"] is not None
+        return _call_response(request, result, fields, include)
+    except Cancelled as e:
+        return _cancelled_response(e)
+    except PipelineError as e:
+        return _pipeline_error(e)
+    except Exception as e:
+        print("❌ ERROR in /uploads/complete:", traceback.format_exc())
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Internal Server Error", "message": str(e), "where": "complete_upload"},
+        )
+    finally:
+        watcher.cancel()
+        unregister(token)
+        if ticket is not None:
+            ticket.release()
+        if prepared is not None:
+            prepared.cancel()
+        if claimed is not None and not stored:
+            # Failed or cancelled: let the client complete the upload again
+            await run_in_threadpool(get_call_store().release_upload, req.key, claimed)
+        if normalized and os.path.exists(normalized["path"]):
+            os.remove(normalized["path"])
+
+
+@app.post("/uploads/abort")
+def abort_upload_endpoint(req: CompleteUploadRequest):
+    if not req.upload_id:
+        return JSONResponse(status_code=400, content={"error": "upload_id is required"})
+    try:
+        abort_upload(req.key, req.upload_id, req.upload_token)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return {"aborted": True}
+
+
 @app.post("/upload-audio/")
-async def upload_audio(file: UploadFile = File(...)):
+async def upload_audio(
+    request: Request,
+    file: UploadFile = File(...),
+    rep: Optional[str] = Form(None),
+    company: Optional[str] = Form(None),
+    team: Optional[str] = Form(None),
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    priority: str = "interactive",
+):
+    # 0) Reserve a Transcribe slot/queue place first: 429 + Retry-After when saturated
+    try:
+        ticket = admit(priority)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except PipelineError as e:
+        return _pipeline_error(e)
+
+    # Cancelled if the client goes away or POSTs /requests/{X-Request-Id}/cancel
+    token = register(request.headers.get("x-request-id"))
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, token.request_id))
+    normalized = None
+    prepared = None
+
     try:
+        # RAG warm-up / company index / fixed agent queries run while the file is saved,
+        # normalized, uploaded and transcribed
+        prepared = prepare_call(company)
+
         # 1) Save locally
         file_path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(file_path, "wb") as buffer:
+        with stage("upload.save"), open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
 
         # 2) Validate file extension
         ext = (file.filename.split(".")[-1] or "").lower()
-        allowed_exts = ("mp3", "wav", "m4a", "mp4")
+        allowed_exts = tuple(AUDIO_CONTENT_TYPES)
         if ext not in allowed_exts:
             os.remove(file_path)
             return JSONResponse(
@@ -59,7 +543,7 @@ async def upload_audio(file: UploadFile = File(...)):
             )
         
         # 3) Validate file size
-        max_mb = 25
+        max_mb = UPLOAD_MAX_MB
         size_mb = os.path.getsize(file_path) / (1024 * 1024)
         if size_mb > max_mb:
             os.remove(file_path)
@@ -68,92 +552,47 @@ async def upload_audio(file: UploadFile = File(...)):
                 content={"error": f"File too large. Max {max_mb}MB"}
             )
 
-        # 4) Upload to S3
-        ext = (file.filename.split(".")[-1] or "").lower()
-        if ext not in ("mp3", "wav", "m4a", "mp4"):
-            ext = "mp3"
-
-        s3_key = f"uploads/{uuid.uuid4()}-{file.filename}"
-        media_s3_uri = upload_file_to_s3(file_path, s3_key)
-        print("✅ Uploaded to S3:", media_s3_uri)
-
-        max_mb = 25
-        size_mb = os.path.getsize(file_path) / (1024 * 1024)
-        if size_mb > max_mb:
-            return JSONResponse(status_code=400, content={"error": f"File too large. Max {max_mb}MB"})
-
-
-        # 5) Transcribe (or fallback)
-        transcript = None
-
-        if USE_MOCK_TRANSCRIPT:
-            with open(MOCK_TRANSCRIPT_PATH, "r", encoding="utf-8") as f:
-                transcript = f.read()
-            print("Using MOCK transcript (USE_MOCK_TRANSCRIPT=true)")
-
-        else:
-            job_name = f"sales-call-{uuid.uuid4().hex}"
-            print("Starting Transcribe job:", job_name)
-
-            try:
-                start_transcription_job(
-                    job_name=job_name,
-                    media_s3_uri=media_s3_uri,
-                    media_format=ext,
-                    language_code="en-US",
-                )
-
-                job_resp = wait_for_job(job_name, timeout_seconds=300)
-                status = job_resp["TranscriptionJob"]["TranscriptionJobStatus"]
-                print("Transcribe status:", status)
-
-                if status == "FAILED":
-                    reason = job_resp["TranscriptionJob"].get("FailureReason", "Unknown")
-                    return JSONResponse(
-                        status_code=500,
-                        content={"error": "Transcription failed", "reason": reason},
-                    )
-
-                transcript_uri = job_resp["TranscriptionJob"]["Transcript"]["TranscriptFileUri"]
-                print("Transcript URI:", transcript_uri)
-
-                transcript = fetch_transcript_text(transcript_uri)
-                print("Transcript length:", len(transcript))
-
-            except ClientError as ce:
-                # If Transcribe isn't activated yet, fallback automatically
-                code = ce.response.get("Error", {}).get("Code", "")
-                msg = ce.response.get("Error", {}).get("Message", str(ce))
-                print("Transcribe ClientError:", code, msg)
-
-                if code in ("SubscriptionRequiredException", "OptInRequiredException"):
-                    with open(MOCK_TRANSCRIPT_PATH, "r", encoding="utf-8") as f:
-                        transcript = f.read()
-                    print("Transcribe not enabled yet — using MOCK transcript fallback")
-                else:
-                    raise
-
-        # transcript must exist now
-        if not transcript or not transcript.strip():
-            return JSONResponse(
-                status_code=500,
-                content={"error": "Transcript is empty", "where": "transcription"},
+        # 4) Mono 16 kHz, silence trimmed, compact encoding (original if ffmpeg is unavailable)
+        upload_path, media_format, s3_name = file_path, ext, file.filename
+        normalized = await normalize_audio_async(file_path)
+        if normalized:
+            upload_path, media_format = normalized["path"], normalized["format"]
+            s3_name = f"{os.path.splitext(file.filename)[0]}.{media_format}"
+            print(
+                f"✅ Normalized audio: {normalized['bytes_in']} -> {normalized['bytes_out']} bytes "
+                f"in {normalized['seconds']}s"
             )
 
-        # 4) Agents
-        transcript_analysis = transcript_analyzer_agent(transcript)
-        sentiment = transcript_analysis.get("sentiment")
-        sales_feedback = sales_coach_agent(transcript, sentiment)
-        objection_feedback = objection_expert_agent(transcript, sentiment)
-
+        token.raise_if_cancelled()
 
-        dashboard = generate_final_report(transcript_analysis, sales_feedback, objection_feedback)
-
-        return {
-            "filename": file.filename,
-            "transcript": transcript,
-            "dashboard": dashboard,
-        }
+        # 5) Upload to S3
+        s3_key = f"{UPLOAD_PREFIX}{uuid.uuid4()}-{s3_name}"
+        media_s3_uri = await run_in_threadpool(upload_file_to_s3, upload_path, s3_key)
+        print("✅ Uploaded to S3:", media_s3_uri)
+        token.raise_if_cancelled()
+
+        # 6) Transcribe -> agents -> report -> store (blocking, off the event loop);
+        #    the local copy lets long calls be split and transcribed in parallel
+        result = await run_in_threadpool(
+            analyze_call,
+            media_s3_uri,
+            media_format,
+            file.filename,
+            rep=rep,
+            company=company,
+            team=team,
+            ticket=ticket,
+            cancel=token,
+            local_path=upload_path,
+            prepared=prepared,
+        )
+        return _call_response(request, result, fields, include)
+
+    except Cancelled as e:
+        return _cancelled_response(e)
+
+    except PipelineError as e:
+        return _pipeline_error(e)
 
     except Exception as e:
         # Always return JSON so frontend doesn't crash on .json()
@@ -167,4 +606,14 @@ async def upload_audio(file: UploadFile = File(...)):
                 "message": str(e),
                 "where": "upload_audio",
             },
-        )
\ No newline at end of file
+        )
+
+    finally:
+        watcher.cancel()
+        unregister(token)
+        if ticket is not None:
+            ticket.release()
+        if prepared is not None:
+            prepared.cancel()
+        if normalized and os.path.exists(normalized["path"]):
+            os.remove(normalized["path"])
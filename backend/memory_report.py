@@ -0,0 +1,47 @@
+# backend/memory_report.py
+
+from __future__ import annotations
+
+import os
+
+
+def memory_breakdown(pid: int | str = "self") -> dict:
+    """
+    Unique vs shared resident memory for a process, in MB (Linux only).
+
+    - unique_mb: pages only this process maps (Private_Clean + Private_Dirty)
+    - shared_mb: pages also mapped by other processes, e.g. the preloaded
+      model/index inherited copy-on-write from the gunicorn master
+    - pss_mb:    proportional share; summing PSS across workers gives the
+      real total footprint
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])  # kB
+    except OSError:
+        return {"available": False}
+
+    def mb(*keys):
+        return round(sum(fields.get(k, 0) for k in keys) / 1024, 1)
+
+    return {
+        "available": True,
+        "pid": os.getpid() if pid == "self" else int(pid),
+        "rss_mb": mb("Rss"),
+        "pss_mb": mb("Pss"),
+        "unique_mb": mb("Private_Clean", "Private_Dirty"),
+        "shared_mb": mb("Shared_Clean", "Shared_Dirty"),
+    }
+
+
+def format_breakdown(label: str, m: dict) -> str:
+    if not m.get("available"):
+        return f"{label}: memory breakdown unavailable (no /proc/<pid>/smaps_rollup)"
+    return (
+        f"{label} pid={m['pid']}: rss={m['rss_mb']}MB unique={m['unique_mb']}MB "
+        f"shared={m['shared_mb']}MB pss={m['pss_mb']}MB"
+    )
@@ -0,0 +1,547 @@
+# backend/pipeline.py
+"""
+Call analysis once the audio is in S3 - shared by POST /upload-audio/ (API
+uploads the file) and POST /uploads/complete (browser uploaded it directly):
+Transcribe (or mock) -> agents -> report -> call store.
+
+Work that doesn't need the transcript (RAG warm-up, the company's index,
+the agents' fixed RAG queries) runs as a stage graph (stage_graph.py)
+started by prepare_call() - at admission in /upload-audio/, so it overlaps
+the upload too - and is normally finished by the time Transcribe is, leaving
+only the transcript-dependent analysis on the critical path.
+"""
+from __future__ import annotations
+
+import contextvars
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import List, Optional
+
+from botocore.exceptions import ClientError
+
+from backend.agents import objection_expert, sales_coach, transcript_analyzer
+from backend.agents.transcript_analyzer import transcript_analyzer_agent
+from backend.agents.sales_coach import sales_coach_agent
+from backend.agents.objection_expert import objection_expert_agent
+from backend.agents.final_report import generate_final_report
+from backend.audio.normalize import run_bounded
+from backend.audio.split import Segment, extract_segment, plan_split
+from backend.aws.s3_utils import delete_from_s3, s3_key, upload_file_to_s3
+from backend.aws.transcribe_utils import delete_job, start_transcription_job, wait_for_job, fetch_transcript
+from backend.aws.transcribe_scheduler import (
+    PRIORITIES,
+    TRANSCRIBE_QUEUE_WAIT_SECONDS,
+    QueueFull,
+    Ticket,
+    get_transcribe_scheduler,
+)
+from backend.cancellation import CancelToken, Cancelled, record_saved
+from backend.profiling import stage
+from backend.stage_graph import StageGraph
+from backend.transcript.stitch import stitch_timelines
+from backend.transcript.talk_metrics import conversation_metrics
+from backend.store.agent_memo import get_agent_memo
+from backend.store.call_store import get_call_store
+from backend.rules.ruleset import Ruleset, get_ruleset
+from backend.rag.query_rag import USE_FAKE_RAG, prefetch, rag_version
+from backend.rag.query_rag import preload as preload_rag
+from backend.rag.service_client import get_retrieval_client
+from backend.rag.tenant_indexes import get_tenant_cache, normalize_company
+
+USE_MOCK_TRANSCRIPT = os.getenv("USE_MOCK_TRANSCRIPT", "false").lower() == "true"
+MOCK_TRANSCRIPT_PATH = os.path.join("backend", "sample_transcripts", "sample_call.txt")
+
+# The account-wide limit can still be hit (other workers/apps share it): back off and retry
+TRANSCRIBE_START_RETRIES = int(os.getenv("TRANSCRIBE_START_RETRIES", "4"))
+_LIMIT_ERRORS = ("LimitExceededException", "ThrottlingException", "TooManyRequestsException")
+
+# Transcript-independent stages run alongside upload + Transcribe (prepare_call)
+PIPELINE_PREFETCH = os.getenv("PIPELINE_PREFETCH", "true").lower() == "true"
+PIPELINE_PREFETCH_WORKERS = int(os.getenv("PIPELINE_PREFETCH_WORKERS", "4"))
+# How long the agents wait for an unfinished prefetch before querying themselves
+PIPELINE_PREFETCH_WAIT_SECONDS = float(os.getenv("PIPELINE_PREFETCH_WAIT_SECONDS", "30"))
+
+# The agents' RAG queries that don't depend on the transcript (both objection
+# paths: which one runs depends on the sentiment)
+AGENT_RAG_QUERIES = (
+    transcript_analyzer.RAG_QUERY,
+    sales_coach.RAG_QUERY,
+    objection_expert.RAG_QUERY,
+    objection_expert.NEGATIVE_RAG_QUERY,
+)
+
+# Segment jobs of one long call in flight at once (each still needs a scheduler slot)
+TRANSCRIBE_SPLIT_MAX_PARALLEL = int(os.getenv("TRANSCRIBE_SPLIT_MAX_PARALLEL", "6"))
+
+
+class PipelineError(Exception):
+    """
+    A failure the endpoint should return as-is (status code + JSON body).
+    """
+
+    def __init__(self, status_code: int, content: dict, headers: Optional[dict] = None):
+        super().__init__(content.get("error", "Pipeline error"))
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+
+def _busy(retry_after: int) -> PipelineError:
+    return PipelineError(
+        429,
+        {"error": "Transcription capacity exhausted, retry later", "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def admit(priority: str = "interactive") -> Optional[Ticket]:
+    """
+    Reserves a place in the Transcribe queue before any work is done for a
+    call; PipelineError(429) with Retry-After when the queue is full. None in
+    mock mode (no jobs). Release the ticket when the call is finished.
+    """
+    if USE_MOCK_TRANSCRIPT:
+        return None
+    try:
+        return get_transcribe_scheduler().submit(priority)
+    except QueueFull as e:
+        raise _busy(e.retry_after)
+
+
+def ensure_capacity(priority: str = "interactive") -> None:
+    """
+    PipelineError(429) if admit(priority) would be rejected right now.
+    """
+    if USE_MOCK_TRANSCRIPT:
+        return
+    scheduler = get_transcribe_scheduler()
+    if priority not in PRIORITIES:
+        raise ValueError(f"Invalid priority. Allowed: {', '.join(PRIORITIES)}")
+    if not scheduler.has_capacity(priority):
+        raise _busy(scheduler.retry_after())
+
+
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+_prefetch_lock = threading.Lock()
+
+
+def _prefetch_pool() -> ThreadPoolExecutor:
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        with _prefetch_lock:
+            if _prefetch_executor is None:
+                _prefetch_executor = ThreadPoolExecutor(
+                    max_workers=PIPELINE_PREFETCH_WORKERS, thread_name_prefix="call-prefetch"
+                )
+    return _prefetch_executor
+
+
+def prepare_call(company: Optional[str] = None) -> Optional[StageGraph]:
+    """
+    Starts the call's transcript-independent stages in the background:
+    - warm:   embedding model / shared index (or BM25 postings) loaded
+    - tenant: the company's own index in the tenant cache (in-process
+              retrieval only; the retrieval service loads its own)
+    - rag:    the agents' fixed queries answered into the RAG result cache
+    None when there's nothing to prefetch (PIPELINE_PREFETCH off, fake RAG).
+    """
+    if not PIPELINE_PREFETCH or USE_FAKE_RAG:
+        return None
+    graph = StageGraph(_prefetch_pool())
+
+    def timed(name, fn):
+        def run():
+            with stage(f"prefetch.{name}"):
+                return fn()
+        return run
+
+    graph.add("warm", timed("warm", preload_rag))
+    after = ("warm",)
+    company = normalize_company(company)
+    if company and get_retrieval_client() is None:
+        graph.add("tenant", timed("tenant", lambda: get_tenant_cache().get(company) is not None))
+        after = ("warm", "tenant")
+    graph.add("rag", timed("rag", lambda: prefetch(AGENT_RAG_QUERIES, company=company)), after=after)
+    return graph
+
+
+def _start_job(job_name: str, media_s3_uri: str, media_format: str, cancel: Optional[CancelToken] = None) -> None:
+    for attempt in range(TRANSCRIBE_START_RETRIES + 1):
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        try:
+            start_transcription_job(
+                job_name=job_name,
+                media_s3_uri=media_s3_uri,
+                media_format=media_format,
+                language_code="en-US",
+            )
+            return
+        except ClientError as ce:
+            code = ce.response.get("Error", {}).get("Code", "")
+            if code not in _LIMIT_ERRORS:
+                raise
+            if attempt == TRANSCRIBE_START_RETRIES:
+                print("⚠️ Transcribe limit still exceeded after retries:", code)
+                raise _busy(get_transcribe_scheduler().retry_after())
+            delay = min(30.0, 2.0 ** attempt)
+            print(f"⚠️ Transcribe {code}, retrying in {delay:.0f}s")
+            if cancel is not None:
+                cancel.wait(delay)
+            else:
+                time.sleep(delay)
+
+
+def _mock_transcript() -> str:
+    with open(MOCK_TRANSCRIPT_PATH, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def transcribe(
+    media_s3_uri: str,
+    media_format: str,
+    ticket: Optional[Ticket] = None,
+    cancel: Optional[CancelToken] = None,
+    local_path: Optional[str] = None,
+):
+    """
+    Returns (transcript, timeline); timeline is None for mock transcripts.
+    With a ticket from admit(), waits for a job slot first and frees it as
+    soon as the job has finished. If `cancel` fires, stops waiting/polling,
+    deletes the job and raises Cancelled.
+
+    With `local_path` (the audio that was uploaded to media_s3_uri), long
+    recordings are split and the segments transcribed in parallel
+    (backend/audio/split.py).
+    """
+    if USE_MOCK_TRANSCRIPT:
+        print("Using MOCK transcript (USE_MOCK_TRANSCRIPT=true)")
+        return _mock_transcript(), None
+
+    try:
+        segments = run_bounded(plan_split, local_path) if local_path else None
+        if segments:
+            return _transcribe_split(local_path, media_s3_uri, segments, ticket=ticket, cancel=cancel)
+        return _transcribe_job(media_s3_uri, media_format, ticket=ticket, cancel=cancel)
+
+    except ClientError as ce:
+        # If Transcribe isn't activated yet, fallback automatically
+        code = ce.response.get("Error", {}).get("Code", "")
+        msg = ce.response.get("Error", {}).get("Message", str(ce))
+        print("Transcribe ClientError:", code, msg)
+
+        if code in ("SubscriptionRequiredException", "OptInRequiredException"):
+            print("Transcribe not enabled yet — using MOCK transcript fallback")
+            return _mock_transcript(), None
+        raise
+
+
+def _transcribe_job(
+    media_s3_uri: str,
+    media_format: str,
+    ticket: Optional[Ticket] = None,
+    cancel: Optional[CancelToken] = None,
+):
+    """
+    One Transcribe job: queue wait, start, poll, fetch. Always releases the ticket.
+    """
+    if ticket is not None:
+        with stage("transcribe.queue_wait"):
+            granted = ticket.wait(TRANSCRIBE_QUEUE_WAIT_SECONDS, cancel=cancel)
+        if not granted:
+            if cancel is not None and cancel.cancelled:
+                record_saved("queue_places_released")
+                raise Cancelled(cancel.reason)
+            raise _busy(get_transcribe_scheduler().retry_after())
+
+    job_name = f"sales-call-{uuid.uuid4().hex}"
+    print("Starting Transcribe job:", job_name)
+    started = False
+
+    try:
+        _start_job(job_name, media_s3_uri, media_format, cancel=cancel)
+        started = True
+
+        job_resp = wait_for_job(job_name, timeout_seconds=300, cancel=cancel)
+        # The job is done: free its slot before downloading the transcript
+        if ticket is not None:
+            ticket.release()
+        status = job_resp["TranscriptionJob"]["TranscriptionJobStatus"]
+        print("Transcribe status:", status)
+
+        if status == "FAILED":
+            reason = job_resp["TranscriptionJob"].get("FailureReason", "Unknown")
+            raise PipelineError(500, {"error": "Transcription failed", "reason": reason})
+
+        transcript_uri = job_resp["TranscriptionJob"]["Transcript"]["TranscriptFileUri"]
+        print("Transcript URI:", transcript_uri)
+
+        transcript, timeline = fetch_transcript(transcript_uri)
+        print("Transcript length:", len(transcript), "| words:", len(timeline))
+        return transcript, timeline
+
+    except Cancelled:
+        print(f"⚠️ Call cancelled ({cancel.reason}), dropping Transcribe job {job_name}")
+        if started:
+            record_saved("transcribe_polling_stopped")
+            # AWS counts the job until it's deleted, so its slot stays taken until then
+            delete_job(job_name, on_done=ticket.hold() if ticket is not None else None)
+            record_saved("transcribe_jobs_deleted")
+        raise
+
+    finally:
+        if ticket is not None:
+            ticket.release()
+
+
+def _segment_ticket(priority: str, cancel: CancelToken) -> Ticket:
+    """
+    A queue place for one more segment job. A full queue is waited out
+    (the call is already admitted) up to TRANSCRIBE_QUEUE_WAIT_SECONDS.
+    """
+    scheduler = get_transcribe_scheduler()
+    deadline = time.monotonic() + TRANSCRIBE_QUEUE_WAIT_SECONDS
+    while True:
+        cancel.raise_if_cancelled()
+        try:
+            return scheduler.submit(priority)
+        except QueueFull as e:
+            if time.monotonic() + min(e.retry_after, 5) > deadline:
+                raise _busy(e.retry_after)
+            cancel.wait(min(e.retry_after, 5))
+
+
+def _transcribe_split(
+    local_path: str,
+    media_s3_uri: str,
+    segments: List[Segment],
+    ticket: Optional[Ticket] = None,
+    cancel: Optional[CancelToken] = None,
+):
+    """
+    Extracts, uploads and transcribes every segment concurrently, then
+    stitches the timelines. Segment 0 runs on the call's ticket, the others
+    on tickets of their own, so the scheduler's job limit still holds.
+    The first failure (or `cancel`) stops the remaining segments.
+    """
+    # Cancels the segments when the call is cancelled or a sibling fails
+    inner = CancelToken(cancel.request_id if cancel is not None else "split")
+    base_key = s3_key(media_s3_uri)
+    tmp_dir = tempfile.mkdtemp(prefix="split-")
+    uploaded: List[str] = []
+
+    def run_segment(segment: Segment):
+        seg_ticket = ticket
+        if segment.index and ticket is not None:
+            seg_ticket = _segment_ticket(ticket.priority, inner)
+        try:
+            # Extract + upload while the ticket waits in the queue
+            path = run_bounded(extract_segment, local_path, segment, tmp_dir)
+            key = f"{base_key}.part{segment.index:02d}.flac"
+            uri = upload_file_to_s3(path, key)
+            uploaded.append(key)
+            os.remove(path)
+            _, timeline = _transcribe_job(uri, "flac", ticket=seg_ticket, cancel=inner)
+            return timeline
+        finally:
+            if seg_ticket is not None:
+                seg_ticket.release()
+
+    workers = max(1, min(len(segments), TRANSCRIBE_SPLIT_MAX_PARALLEL))
+    with stage("transcribe.split"), ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcribe-split") as pool:
+        futures = [pool.submit(contextvars.copy_context().run, run_segment, s) for s in segments]
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_EXCEPTION)
+            if cancel is not None and cancel.cancelled:
+                inner.cancel(cancel.reason)
+            for f in done:
+                if f.exception() is not None and error is None and not isinstance(f.exception(), Cancelled):
+                    error = f.exception()
+                    inner.cancel("segment_failed")
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    for key in uploaded:
+        delete_from_s3(key)
+
+    if cancel is not None and cancel.cancelled:
+        raise Cancelled(cancel.reason)
+    if error is not None:
+        raise error
+
+    with stage("transcribe.stitch"):
+        timeline = stitch_timelines([(s, f.result()) for s, f in zip(segments, futures)])
+    print(f"✅ Stitched {len(segments)} segments | words: {len(timeline)}")
+    return timeline.text, timeline
+
+
+def _memoizable(output) -> bool:
+    guidance = output.get("segment_guidance") if isinstance(output, dict) else None
+    return not (guidance or {}).get("stats", {}).get("degraded", False)
+
+
+def run_agents(
+    transcript: str,
+    ruleset: Ruleset,
+    company: Optional[str] = None,
+    conversation_dynamics: Optional[dict] = None,
+):
+    """
+    Runs the three agents and assembles the report. Agent outputs are
+    memoized (store/agent_memo.py), so only agents whose code, ruleset, RAG
+    index or inputs changed are recomputed; outputs whose segment retrieval
+    degraded (budget, loading, failure) are not memoized. Returns
+    (dashboard, {agent: "cached" | "computed"}).
+    """
+    memo = get_agent_memo()
+    rag = rag_version(company)
+    sources = {}
+
+    def run(name, fn, *args):
+        with stage(f"agent.{name}"):
+            if memo is None:
+                out, cached = fn(transcript, *args, ruleset=ruleset, company=company), False
+            else:
+                out, cached = memo.call(
+                    name, fn, transcript, *args,
+                    cacheable=_memoizable, ruleset=ruleset, company=company, rag_version=rag,
+                )
+        sources[name] = "cached" if cached else "computed"
+        return out
+
+    transcript_analysis = run("transcript_analyzer", transcript_analyzer_agent)
+    sentiment = transcript_analysis.get("sentiment")
+    sales_feedback = run("sales_coach", sales_coach_agent, sentiment)
+    objection_feedback = run("objection_expert", objection_expert_agent, sentiment)
+
+    with stage("report"):
+        dashboard = generate_final_report(
+            transcript_analysis,
+            sales_feedback,
+            objection_feedback,
+            conversation_dynamics=conversation_dynamics,
+            ruleset_version=ruleset.version,
+        )
+    return dashboard, sources
+
+
+def analyze_call(
+    media_s3_uri: str,
+    media_format: str,
+    filename: str,
+    rep: Optional[str] = None,
+    company: Optional[str] = None,
+    team: Optional[str] = None,
+    ticket: Optional[Ticket] = None,
+    cancel: Optional[CancelToken] = None,
+    local_path: Optional[str] = None,
+    prepared: Optional[StageGraph] = None,
+    call_id: Optional[str] = None,
+) -> dict:
+    """
+    Transcribes, runs the agents, stores the call and returns the
+    /upload-audio/ response body. Blocking; run it off the event loop.
+    Raises Cancelled (nothing stored) if `cancel` fires before the agents.
+    `local_path` (a local copy of the uploaded audio) enables splitting
+    long calls for parallel transcription. `prepared` is the call's
+    prepare_call() graph if the caller started it earlier; otherwise it is
+    started here, alongside Transcribe. `call_id` is generated unless the
+    caller reserved one (see CallStore.claim_upload).
+    """
+    if prepared is None:
+        prepared = prepare_call(company)
+    try:
+        transcript, timeline = transcribe(
+            media_s3_uri, media_format, ticket=ticket, cancel=cancel, local_path=local_path
+        )
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+    except Exception as e:
+        if prepared is not None:
+            prepared.cancel()
+        if isinstance(e, Cancelled):
+            record_saved("agent_runs_skipped")
+        raise
+
+    # Normally done by now; if not, the agents would need the same queries anyway
+    if prepared is not None:
+        with stage("prefetch.wait"):
+            prepared.get("rag", timeout=PIPELINE_PREFETCH_WAIT_SECONDS)
+        print("Prefetch stages:", prepared.timings())
+
+    # transcript must exist now
+    if not transcript or not transcript.strip():
+        raise PipelineError(500, {"error": "Transcript is empty", "where": "transcription"})
+
+    # Agents (one ruleset snapshot for the whole call, even across a hot reload)
+    dashboard, _ = run_agents(
+        transcript,
+        get_ruleset(company),
+        company=company,
+        conversation_dynamics=conversation_metrics(timeline) if timeline is not None else None,
+    )
+
+    # Persist so the dashboard can be reopened later (GET /calls/{call_id})
+    call_id = call_id or uuid.uuid4().hex
+    try:
+        with stage("store.save_call"):
+            get_call_store().save_call(
+                call_id,
+                dashboard,
+                transcript,
+                rep=rep,
+                company=company,
+                team=team,
+                filename=filename,
+                media_uri=media_s3_uri,
+            )
+    except Exception:
+        print("⚠️ Failed to persist call:", traceback.format_exc())
+        call_id = None
+
+    return {
+        "call_id": call_id,
+        "filename": filename,
+        "transcript": transcript,
+        "dashboard": dashboard,
+    }
+
+
+def reanalyze_call(call_id: str) -> dict:
+    """
+    Re-scores a stored call with the current agents, ruleset and RAG
+    indexes, reusing memoized agent outputs that are still valid, and
+    stores the new report. Conversation dynamics come from the previous
+    report (word timings aren't stored).
+    """
+    store = get_call_store()
+    call = store.get_call(call_id)
+    if call is None:
+        raise PipelineError(404, {"error": "Call not found"})
+    if not (call.get("transcript") or "").strip():
+        raise PipelineError(409, {"error": "Call has no stored transcript"})
+
+    company = call.get("company")
+    previous = call.get("report") or {}
+    dashboard, sources = run_agents(
+        call["transcript"],
+        get_ruleset(company),
+        company=company,
+        conversation_dynamics=previous.get("conversation_dynamics"),
+    )
+    with stage("store.save_call"):
+        store.save_call(call_id, dashboard, call["transcript"])
+
+    return {
+        "call_id": call_id,
+        "filename": call.get("filename"),
+        "dashboard": dashboard,
+        "agents": sources,
+    }
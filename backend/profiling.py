@@ -0,0 +1,263 @@
+# backend/profiling.py
+"""
+On-demand per-request profiling.
+
+A profiled request gets:
+- a wall-clock stage trace: every `with stage("name")` / `@traced("name")`
+  block it passes through (upload, normalize, Transcribe wait/poll/fetch,
+  each agent, RAG, store), with start offset, duration and thread
+- a CPU profile: a sampler thread reads sys._current_frames() every
+  PROFILE_INTERVAL_MS, but only for threads currently inside one of the
+  request's stages, so concurrent requests don't leak into it. Stacks are
+  stored in folded format ("stage;module:function;... count"), which
+  flamegraph.pl, inferno and speedscope read directly.
+
+Which requests:
+- PROFILING_ENABLED=true is the master switch (off by default)
+- a request with `X-Profile: 1` (or ?profile=1) and `X-Admin-Token: $ADMIN_TOKEN`
+- plus a random PROFILE_SAMPLE_RATE fraction of all requests
+
+Profiles are written to PROFILE_DIR as <id>.json (trace + metadata) and
+<id>.folded, the newest PROFILE_KEEP are kept, and the id is returned in the
+X-Profile-Id response header. Read them from /admin/profiles (admin token).
+
+The active profile travels in a contextvar, so it follows run_in_threadpool;
+plain executors need contextvars.copy_context().run (see normalize.py).
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("data", "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+_ID_RE = re.compile(r"^[0-9a-f]{16}$")
+# Deepest stack kept per sample
+_MAX_DEPTH = 128
+
+
+class Profile:
+    def __init__(self, name: str, reason: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.reason = reason
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.stages: List[dict] = []
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+
+        self._lock = threading.Lock()
+        # thread id -> stack of stage names the thread is currently in
+        self._threads: Dict[int, List[str]] = {}
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name=f"profiler-{self.id}", daemon=True)
+
+    # ---- stages ----
+
+    def enter(self, name: str) -> dict:
+        tid = threading.get_ident()
+        record = {
+            "stage": name,
+            "thread": threading.current_thread().name,
+            "start_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+        }
+        with self._lock:
+            self._threads.setdefault(tid, []).append(name)
+            self.stages.append(record)
+        return record
+
+    def exit(self, record: dict, error: Optional[BaseException]) -> None:
+        tid = threading.get_ident()
+        record["duration_ms"] = round((time.perf_counter() - self._t0) * 1000 - record["start_ms"], 3)
+        if error is not None:
+            record["error"] = type(error).__name__
+        with self._lock:
+            names = self._threads.get(tid)
+            if names:
+                names.pop()
+                if not names:
+                    del self._threads[tid]
+
+    # ---- CPU sampling ----
+
+    def _sample_loop(self) -> None:
+        interval = PROFILE_INTERVAL_MS / 1000
+        while not self._stop.wait(interval):
+            with self._lock:
+                threads = {tid: ";".join(names) for tid, names in self._threads.items()}
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            for tid, stages in threads.items():
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < _MAX_DEPTH:
+                    code = frame.f_code
+                    module = frame.f_globals.get("__name__", "?")
+                    if module != __name__:  # the @traced wrappers
+                        stack.append(f"{module}:{getattr(code, 'co_qualname', code.co_name)}")
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[stages + ";" + ";".join(stack)] += 1
+                self.sample_count += 1
+
+    def start(self) -> "Profile":
+        self._sampler.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join(timeout=1)
+        self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+
+    # ---- output ----
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def summary(self) -> dict:
+        return {
+            "profile_id": self.id,
+            "request": self.name,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_ms": getattr(self, "duration_ms", None),
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "cpu_samples": self.sample_count,
+            "stages": sorted(self.stages, key=lambda s: s["start_ms"]),
+        }
+
+
+_current: contextvars.ContextVar[Optional[Profile]] = contextvars.ContextVar("profile", default=None)
+
+
+def current_profile() -> Optional[Profile]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Marks a pipeline stage for the request's profile; a no-op otherwise.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    record = profile.enter(name)
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        profile.exit(record, error)
+
+
+def traced(name: str):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and hmac.compare_digest((token or "").encode(), ADMIN_TOKEN.encode())
+
+
+def should_profile(flag: Optional[str], admin_token: Optional[str]) -> Optional[str]:
+    """
+    Why this request should be profiled ("requested" / "sampled"), or None.
+    """
+    if not PROFILING_ENABLED:
+        return None
+    if flag in ("1", "true", "yes") and is_admin(admin_token):
+        return "requested"
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+def start_profile(name: str, reason: str):
+    """
+    Starts a profile and makes it current; returns (profile, token) for
+    finish_profile().
+    """
+    profile = Profile(name, reason).start()
+    return profile, _current.set(profile)
+
+
+def finish_profile(profile: Profile, token) -> None:
+    _current.reset(token)
+    profile.stop()
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(os.path.join(PROFILE_DIR, f"{profile.id}.folded"), "w", encoding="utf-8") as f:
+            f.write(profile.folded())
+        with open(os.path.join(PROFILE_DIR, f"{profile.id}.json"), "w", encoding="utf-8") as f:
+            json.dump(profile.summary(), f)
+        _prune()
+    except OSError as e:
+        print("⚠️ Failed to write profile", profile.id, "-", e)
+
+
+def _prune() -> None:
+    files = [f for f in os.listdir(PROFILE_DIR) if f.endswith(".json")]
+    if len(files) <= PROFILE_KEEP:
+        return
+    files.sort(key=lambda f: os.path.getmtime(os.path.join(PROFILE_DIR, f)))
+    for f in files[: len(files) - PROFILE_KEEP]:
+        for ext in (".json", ".folded"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, f[: -len(".json")] + ext))
+            except OSError:
+                pass
+
+
+def list_profiles(limit: int = 50) -> List[dict]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    files = sorted(
+        (f for f in os.listdir(PROFILE_DIR) if f.endswith(".json")),
+        key=lambda f: os.path.getmtime(os.path.join(PROFILE_DIR, f)),
+        reverse=True,
+    )[:limit]
+    out = []
+    for f in files:
+        with open(os.path.join(PROFILE_DIR, f), "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        out.append({k: data.get(k) for k in ("profile_id", "request", "reason", "started_at", "duration_ms", "cpu_samples")})
+    return out
+
+
+def profile_path(profile_id: str, ext: str) -> Optional[str]:
+    if not _ID_RE.match(profile_id or ""):
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.{ext}")
+    return path if os.path.exists(path) else None
@@ -1,9 +1,13 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
+# Run from the repo root: python -m backend.rag.build_index [--company NAME ...] [--shared-only]
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
+import argparse
 import os
 
+from backend.rag.chunking import CHUNK_DEDUP, CHUNK_OVERLAP_TOKENS, CHUNK_TOKENS, dedup_chunks, split_documents
+from backend.rag.embedders import EMBEDDING_BACKEND, get_embedder, write_manifest
+from backend.rag.lexical import build_bm25_index
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Your existing paths
@@ -12,9 +16,11 @@ COMPANY_KB_ROOT = os.path.normpath(os.path.join(BASE_DIR, "../../company_kb"))
 
 DB_PATH = os.path.join(BASE_DIR, "faiss_index")
 
-# Set to a company folder name (e.g., "signiance") to only index that company.
-# Set to None to index ALL companies inside company_kb/
-COMPANY_FILTER = "signiance"  # or None
+# Each company_kb/<company>/ gets its own index under faiss_index/companies/<company>/
+# (loaded on demand, see tenant_indexes.py); the shared index holds rag_data/ only.
+# Setting RAG_COMPANY_FILTER also folds that company's files into the shared index
+# (the old single-tenant layout).
+COMPANY_FILTER = os.getenv("RAG_COMPANY_FILTER") or None
 
 
 def iter_text_files(root_dir: str, extensions=(".txt", ".md")):
@@ -39,77 +45,179 @@ def relpath(path: str, start: str) -> str:
         return path
 
 
-documents = []
-
-# 1) Load generic rag_data/
-rag_files = list(iter_text_files(RAG_DATA_PATH, extensions=(".txt",)))
-for fp in rag_files:
-    text = read_file(fp).strip()
-    if not text:
-        continue
-    documents.append(
-        Document(
-            page_content=text,
-            metadata={
-                "source": f"rag_data/{relpath(fp, RAG_DATA_PATH)}",
-                "kb_type": "generic",
-            },
+def list_companies():
+    """
+    Company folder names under company_kb/.
+    """
+    if not os.path.isdir(COMPANY_KB_ROOT):
+        return []
+    return sorted(d for d in os.listdir(COMPANY_KB_ROOT) if os.path.isdir(os.path.join(COMPANY_KB_ROOT, d)))
+
+
+def load_documents(company_filter=COMPANY_FILTER, include_generic=True):
+    """
+    Loads generic rag_data/ files plus company_kb/<company>/ files as Documents.
+    company_filter=None loads every company, "" none.
+    Returns (documents, rag_files, company_files).
+    """
+    documents = []
+
+    # 1) Load generic rag_data/
+    rag_files = list(iter_text_files(RAG_DATA_PATH, extensions=(".txt",))) if include_generic else []
+    for fp in rag_files:
+        text = read_file(fp).strip()
+        if not text:
+            continue
+        documents.append(
+            Document(
+                page_content=text,
+                metadata={
+                    "source": f"rag_data/{relpath(fp, RAG_DATA_PATH)}",
+                    "kb_type": "generic",
+                },
+            )
         )
-    )
 
-# 2) Load company_kb/<company>/
-company_files = []
-if os.path.isdir(COMPANY_KB_ROOT):
-    if COMPANY_FILTER:
-        company_dirs = [os.path.join(COMPANY_KB_ROOT, COMPANY_FILTER)]
-    else:
-        company_dirs = [
-            os.path.join(COMPANY_KB_ROOT, d)
-            for d in os.listdir(COMPANY_KB_ROOT)
-            if os.path.isdir(os.path.join(COMPANY_KB_ROOT, d))
-        ]
-
-    for company_dir in company_dirs:
-        company_name = os.path.basename(company_dir)
-        for fp in iter_text_files(company_dir, extensions=(".txt", ".md")):
-            company_files.append(fp)
-            text = read_file(fp).strip()
-            if not text:
-                continue
-            documents.append(
-                Document(
-                    page_content=text,
-                    metadata={
-                        "source": f"company_kb/{company_name}/{relpath(fp, company_dir)}",
-                        "kb_type": "company",
-                        "company": company_name,
-                    },
+    # 2) Load company_kb/<company>/
+    company_files = []
+    if os.path.isdir(COMPANY_KB_ROOT) and company_filter != "":
+        if company_filter:
+            company_dirs = [os.path.join(COMPANY_KB_ROOT, company_filter)]
+        else:
+            company_dirs = [
+                os.path.join(COMPANY_KB_ROOT, d)
+                for d in os.listdir(COMPANY_KB_ROOT)
+                if os.path.isdir(os.path.join(COMPANY_KB_ROOT, d))
+            ]
+
+        for company_dir in company_dirs:
+            company_name = os.path.basename(company_dir)
+            for fp in iter_text_files(company_dir, extensions=(".txt", ".md")):
+                company_files.append(fp)
+                text = read_file(fp).strip()
+                if not text:
+                    continue
+                documents.append(
+                    Document(
+                        page_content=text,
+                        metadata={
+                            "source": f"company_kb/{company_name}/{relpath(fp, company_dir)}",
+                            "kb_type": "company",
+                            "company": company_name,
+                        },
+                    )
                 )
-            )
 
-print("==== Ingestion Summary ====")
-print("RAG_DATA_PATH:", RAG_DATA_PATH)
-print("company_kb root:", COMPANY_KB_ROOT)
-print("COMPANY_FILTER:", COMPANY_FILTER)
-print("Generic files found:", len(rag_files))
-print("Company files found:", len(company_files))
-print("Raw documents loaded:", len(documents))
-
-# Chunking
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,
-    chunk_overlap=50
-)
-texts = text_splitter.split_documents(documents)
-print("Number of text chunks:", len(texts))
-
-# Embeddings + FAISS
-embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
-
-db = FAISS.from_documents(texts, embeddings)
-db.save_local(DB_PATH)
-
-print("RAG index created successfully")
-print("DB_PATH:", DB_PATH)
\ No newline at end of file
+    return documents, rag_files, company_files
+
+
+def _write_index(documents, db_path, backend):
+    """
+    Chunks, embeds and saves `documents` as FAISS + BM25 under db_path.
+    """
+    # Chunking (in embedder tokens, so nothing is truncated at embed time)
+    texts, token_source = split_documents(documents)
+    print(f"Chunk size: {CHUNK_TOKENS} tokens, overlap {CHUNK_OVERLAP_TOKENS} ({token_source})")
+    print("Number of text chunks:", len(texts))
+
+    # Near-duplicate chunks (pasted boilerplate) only crowd out k=5 results
+    dedup_stats = {}
+    if CHUNK_DEDUP:
+        texts, dedup_stats = dedup_chunks(texts)
+        print(
+            "Near-duplicate chunks removed:", dedup_stats["near_duplicates_removed"],
+            f"({dedup_stats['chars_before']} -> {dedup_stats['chars_after']} chars)",
+        )
+
+    # Embeddings + FAISS
+    embeddings = get_embedder(backend)
+
+    db = FAISS.from_documents(texts, embeddings)
+    db.save_local(db_path)
+
+    # Records which vector space the index lives in (see embedders.check_index_compatible)
+    write_manifest(
+        db_path,
+        backend,
+        chunks=len(texts),
+        chunk_tokens=CHUNK_TOKENS,
+        chunk_overlap_tokens=CHUNK_OVERLAP_TOKENS,
+        token_counter=token_source,
+        near_duplicates_removed=dedup_stats.get("near_duplicates_removed", 0),
+    )
+
+    # BM25 postings over the same chunks, in FAISS insertion order (RAG_MODE=lexical/hybrid)
+    bm25_stats = build_bm25_index([(t.page_content, t.metadata) for t in texts], db_path)
+    print("BM25 terms / postings / bytes:", bm25_stats["terms"], bm25_stats["postings"], bm25_stats["bytes"])
+    return db
+
+
+def build_index(db_path=DB_PATH, company_filter=COMPANY_FILTER, backend=None):
+    """
+    Shared index: generic rag_data/ (plus company_filter's files, if set).
+    """
+    backend = backend or EMBEDDING_BACKEND
+    documents, rag_files, company_files = load_documents(company_filter or "")
+
+    print("==== Ingestion Summary ====")
+    print("RAG_DATA_PATH:", RAG_DATA_PATH)
+    print("company_kb root:", COMPANY_KB_ROOT)
+    print("COMPANY_FILTER:", company_filter)
+    print("Generic files found:", len(rag_files))
+    print("Company files found:", len(company_files))
+    print("Raw documents loaded:", len(documents))
+
+    db = _write_index(documents, db_path, backend)
+
+    print("RAG index created successfully")
+    print("EMBEDDING_BACKEND:", backend)
+    print("DB_PATH:", db_path)
+    return db
+
+
+def build_company_index(company, backend=None, db_path=None):
+    """
+    Per-company index: company_kb/<company>/ only, written where
+    tenant_indexes.py looks for it (or to db_path). None if the company has
+    no files.
+    """
+    from backend.rag.tenant_indexes import normalize_company, tenant_index_path
+
+    name = normalize_company(company)
+    if name is None:
+        raise ValueError(f"Invalid company name: {company!r}")
+
+    backend = backend or EMBEDDING_BACKEND
+    documents, _, company_files = load_documents(name, include_generic=False)
+    if not documents:
+        print(f"⚠️ No files under company_kb/{name}/ - skipping")
+        return None
+
+    db_path = db_path or tenant_index_path(name)
+    os.makedirs(db_path, exist_ok=True)
+    print(f"==== Company index: {name} ({len(company_files)} files) ====")
+    db = _write_index(documents, db_path, backend)
+    print("DB_PATH:", db_path)
+    return db
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the shared RAG index and per-company indexes.")
+    parser.add_argument("--company", action="append", default=[], help="Only build this company's index (repeatable)")
+    parser.add_argument("--shared-only", action="store_true", help="Only build the shared rag_data/ index")
+    args = parser.parse_args(argv)
+
+    if args.company:
+        for company in args.company:
+            build_company_index(company)
+        return
+
+    build_index()
+    if not args.shared_only:
+        for company in list_companies():
+            if company != COMPANY_FILTER:
+                build_company_index(company)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# backend/rag/chunking.py
+"""
+Chunking for build_index.py:
+- token-aware splitting, so no chunk is longer than the embedder's
+  max sequence length (longer chunks are silently truncated when embedded)
+- SimHash near-duplicate elimination, so boilerplate pasted across KB files
+  doesn't fill the index and crowd out k=5 results
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import re
+from collections import defaultdict
+from typing import Callable, List, Tuple
+
+from backend.rag.embedders import EMBEDDING_MODEL, MAX_SEQ_LENGTH, ONNX_MODEL_DIR
+
+# Budget per chunk in embedder tokens; [CLS]/[SEP] take two of MAX_SEQ_LENGTH
+CHUNK_TOKENS = min(int(os.getenv("CHUNK_TOKENS", "128")), MAX_SEQ_LENGTH - 2)
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "16"))
+
+CHUNK_DEDUP = os.getenv("CHUNK_DEDUP", "true").lower() == "true"
+# 64-bit SimHash; <= 3 differing bits is the usual near-duplicate threshold
+NEAR_DUP_MAX_HAMMING = int(os.getenv("NEAR_DUP_MAX_HAMMING", "3"))
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+# Without the tokenizer: WordPiece averages ~4 characters per token on English
+# prose (more pieces on names, numbers, jargon), so len/3 over-counts, which
+# keeps chunks under the model's max sequence length
+_CHARS_PER_TOKEN = 3
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Conservative (over-)estimate of the WordPiece token count.
+    """
+    return max(len(_WORD_RE.findall(text)), math.ceil(len(text) / _CHARS_PER_TOKEN))
+
+
+def token_counter() -> Tuple[Callable[[str], int], str]:
+    """
+    (count_tokens, source). Prefers the embedder's own WordPiece tokenizer
+    (exported tokenizer.json, then the HF cache); falls back to
+    approximate_tokens, which over-counts so chunks are smaller rather
+    than truncated at embed time.
+    """
+    tokenizer_path = os.path.join(ONNX_MODEL_DIR, "tokenizer.json")
+    if os.path.exists(tokenizer_path):
+        from tokenizers import Tokenizer
+
+        tok = Tokenizer.from_file(tokenizer_path)
+        tok.no_truncation()
+        tok.no_padding()
+        return (lambda text: len(tok.encode(text, add_special_tokens=False).ids)), tokenizer_path
+
+    try:
+        from transformers import AutoTokenizer
+
+        hf_tok = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+        return (lambda text: len(hf_tok.encode(text, add_special_tokens=False))), EMBEDDING_MODEL
+    except Exception as e:
+        print("⚠️ Embedder tokenizer unavailable, approximating token counts:", e)
+
+    return approximate_tokens, "approximate"
+
+
+def split_documents(documents: list, chunk_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+    """
+    Same recursive splitter as before, measured in embedder tokens instead of characters.
+    Returns (chunks, token_source).
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    count_tokens, source = token_counter()
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens,
+        chunk_overlap=overlap_tokens,
+        length_function=count_tokens,
+    )
+    return splitter.split_documents(documents), source
+
+
+def simhash(text: str) -> int:
+    """
+    64-bit SimHash over word 3-shingles.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+    weights = [0] * 64
+    for sh in shingles:
+        h = int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "little")
+        for bit in range(64):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    value = 0
+    for bit, w in enumerate(weights):
+        if w > 0:
+            value |= 1 << bit
+    return value
+
+
+def _scope(metadata: dict) -> tuple:
+    # Only dedup within what a query filter can see together
+    return metadata.get("kb_type"), metadata.get("company")
+
+
+def find_near_duplicates(texts: List[str], scopes: List[tuple], max_hamming: int = NEAR_DUP_MAX_HAMMING) -> List[int]:
+    """
+    For each text, the index of the earlier text it near-duplicates, or -1.
+
+    Hashes are split into max_hamming + 1 bands; two hashes within
+    max_hamming bits must agree on at least one band (pigeonhole), so only
+    texts sharing a band bucket are compared.
+    """
+    bands = max_hamming + 1
+    band_bits = 64 // bands
+    mask = (1 << band_bits) - 1
+
+    hashes = [simhash(t) for t in texts]
+    buckets = defaultdict(list)
+    duplicate_of = [-1] * len(texts)
+
+    for i, h in enumerate(hashes):
+        keys = [(scopes[i], b, (h >> (b * band_bits)) & mask) for b in range(bands)]
+        for key in keys:
+            for j in buckets[key]:
+                if (h ^ hashes[j]).bit_count() <= max_hamming:
+                    duplicate_of[i] = j
+                    break
+            if duplicate_of[i] != -1:
+                break
+
+        # Only originals are kept as comparison targets
+        if duplicate_of[i] == -1:
+            for key in keys:
+                buckets[key].append(i)
+
+    return duplicate_of
+
+
+def dedup_chunks(chunks: list, max_hamming: int = NEAR_DUP_MAX_HAMMING):
+    """
+    Drops exact and near-duplicate chunks, keeping the first occurrence.
+    Returns (kept_chunks, stats).
+    """
+    texts = [c.page_content for c in chunks]
+    duplicate_of = find_near_duplicates(texts, [_scope(c.metadata) for c in chunks], max_hamming)
+
+    kept = [c for c, d in zip(chunks, duplicate_of) if d == -1]
+    removed = len(chunks) - len(kept)
+    return kept, {
+        "chunks_before": len(chunks),
+        "chunks_after": len(kept),
+        "near_duplicates_removed": removed,
+        "chars_before": sum(len(t) for t in texts),
+        "chars_after": sum(len(c.page_content) for c in kept),
+    }
@@ -0,0 +1,230 @@
+# backend/rag/embed_batcher.py
+"""
+Micro-batching of concurrent embedding requests.
+
+Each RAG query embeds one short string; under concurrent calls that's many
+single-row forward passes, each paying the full per-call overhead and
+leaving the vectorized kernels mostly idle. BatchingEmbeddings sits in front
+of the process-wide embedder (retriever.get_embeddings): callers enqueue
+their texts and block, and one dispatcher thread takes whatever is queued -
+up to RAG_EMBED_BATCH_MAX texts, waiting at most RAG_EMBED_BATCH_WAIT_MS
+after the first one for more to arrive - runs ONE embed_documents() call
+and hands each caller its rows. While a batch runs, the next one fills up
+without any extra wait.
+
+The wait is the trade-off: a lone query pays up to RAG_EMBED_BATCH_WAIT_MS
+more latency; under load batches grow and throughput rises. metrics()
+reports the batch size distribution, queue wait and forward pass times
+(GET /health/rag, and the retrieval service's /health).
+
+The dispatcher thread starts on the first request, not when the embedder
+is created: with PRELOAD_RAG the model is loaded in the gunicorn master,
+and threads don't survive fork(). A forked child drops the parent's queue
+and starts its own dispatcher.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Deque, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+RAG_EMBED_BATCHING = os.getenv("RAG_EMBED_BATCHING", "true").lower() == "true"
+RAG_EMBED_BATCH_MAX = int(os.getenv("RAG_EMBED_BATCH_MAX", "32"))
+RAG_EMBED_BATCH_WAIT_MS = float(os.getenv("RAG_EMBED_BATCH_WAIT_MS", "3"))
+# Longest a caller waits for its vectors (queue + forward pass)
+RAG_EMBED_TIMEOUT_SECONDS = float(os.getenv("RAG_EMBED_TIMEOUT_SECONDS", "30"))
+
+# Batch size histogram buckets (upper bounds)
+_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))], 3)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces embed requests into batches on a single dispatcher thread.
+    """
+
+    def __init__(
+        self,
+        embed_batch,
+        max_batch: int = RAG_EMBED_BATCH_MAX,
+        max_wait_ms: float = RAG_EMBED_BATCH_WAIT_MS,
+        timeout: float = RAG_EMBED_TIMEOUT_SECONDS,
+    ):
+        self._embed_batch = embed_batch  # List[str] -> List[List[float]]
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.timeout = timeout
+        self._closed = False
+
+        self._sizes: Deque[int] = deque(maxlen=10000)
+        self._waits_ms: Deque[float] = deque(maxlen=10000)
+        self._forward_ms: Deque[float] = deque(maxlen=10000)
+        self._counters = {"requests": 0, "texts": 0, "batches": 0, "errors": 0, "timeouts": 0}
+        self._reset()
+        _batchers.add(self)
+
+    def _reset(self) -> None:
+        """
+        Fresh queue and locks, no dispatcher yet. Also run in a forked child:
+        the parent's dispatcher thread doesn't exist there, its queued
+        callers aren't ours, and its locks may have been held mid-fork.
+        """
+        self._cond = threading.Condition()
+        self._queue: Deque[Tuple[str, Future, float]] = deque()
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, texts: List[str]) -> List[Future]:
+        futures = []
+        now = time.perf_counter()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("EmbeddingBatcher is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._thread.start()
+            for text in texts:
+                future: Future = Future()
+                self._queue.append((text, future, now))
+                futures.append(future)
+            self._cond.notify()
+        with self._stats_lock:
+            self._counters["requests"] += 1
+            self._counters["texts"] += len(texts)
+        return futures
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        futures = self.submit(texts)
+        deadline = time.monotonic() + self.timeout
+        try:
+            return [f.result(timeout=max(0.0, deadline - time.monotonic())) for f in futures]
+        except FutureTimeoutError:
+            for f in futures:
+                f.cancel()  # still queued: the dispatcher skips it
+            with self._stats_lock:
+                self._counters["timeouts"] += 1
+            raise TimeoutError(f"embedding not done after {self.timeout:g}s") from None
+
+    def _take_batch(self) -> List[Tuple[str, Future, float]]:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return []
+            # Give concurrent callers up to max_wait (from the oldest request) to join
+            deadline = self._queue[0][2] + self.max_wait
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(self.max_batch, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(n)]
+        # Drops callers that timed out and cancelled while queued
+        return [item for item in batch if item[1].set_running_or_notify_cancel()]
+
+    def _run(self) -> None:
+        while True:
+            if self._closed and not self._queue:
+                return
+            batch = self._take_batch()
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                vectors = self._embed_batch([text for text, _, _ in batch])
+            except BaseException as e:
+                with self._stats_lock:
+                    self._counters["errors"] += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            end = time.perf_counter()
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+            with self._stats_lock:
+                self._counters["batches"] += 1
+                self._sizes.append(len(batch))
+                self._forward_ms.append((end - start) * 1000)
+                self._waits_ms.extend((start - queued) * 1000 for _, _, queued in batch)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def metrics(self) -> dict:
+        with self._stats_lock:
+            sizes = list(self._sizes)
+            waits = list(self._waits_ms)
+            forward = list(self._forward_ms)
+            counters = dict(self._counters)
+        histogram = {}
+        for size in sizes:
+            bucket = next((b for b in _BUCKETS if size <= b), _BUCKETS[-1])
+            histogram[f"<={bucket}"] = histogram.get(f"<={bucket}", 0) + 1
+        return {
+            "enabled": True,
+            "max_batch": self.max_batch,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "mean_batch": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "batch_sizes": {k: histogram[k] for k in sorted(histogram, key=lambda k: int(k[2:]))},
+            "queue_wait_ms": {"p50": _percentile(waits, 0.5), "p95": _percentile(waits, 0.95)},
+            "forward_ms": {"p50": _percentile(forward, 0.5), "p95": _percentile(forward, 0.95)},
+            **counters,
+        }
+
+
+_batchers: "weakref.WeakSet[EmbeddingBatcher]" = weakref.WeakSet()
+
+
+def _reset_after_fork() -> None:
+    for batcher in list(_batchers):
+        batcher._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    LangChain Embeddings whose query / small-batch calls go through an
+    EmbeddingBatcher; large embed_documents calls (index builds) go straight
+    to the wrapped embedder.
+    """
+
+    def __init__(self, inner: Embeddings, max_batch: int = RAG_EMBED_BATCH_MAX, max_wait_ms: float = RAG_EMBED_BATCH_WAIT_MS):
+        self.inner = inner
+        self.batcher = EmbeddingBatcher(inner.embed_documents, max_batch=max_batch, max_wait_ms=max_wait_ms)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if len(texts) > self.batcher.max_batch:
+            return self.inner.embed_documents(texts)
+        return self.batcher.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.embed([text])[0]
+
+
+def batching_metrics(embeddings: Optional[Embeddings]) -> dict:
+    if isinstance(embeddings, BatchingEmbeddings):
+        return embeddings.batcher.metrics()
+    return {"enabled": False}
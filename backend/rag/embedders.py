@@ -0,0 +1,149 @@
+# backend/rag/embedders.py
+
+from __future__ import annotations
+
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2 sentence-transformers config
+
+# "hf"        = sentence-transformers on PyTorch (default)
+# "onnx"      = ONNX Runtime, fp32 (same vectors as "hf")
+# "onnx-int8" = ONNX Runtime, dynamically quantized weights (needs its own index)
+EMBEDDING_BACKENDS = ("hf", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "hf").lower()
+
+# Output of `python -m backend.rag.export_onnx`
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/all-MiniLM-L6-v2-onnx")
+
+MANIFEST_NAME = "embedder.json"
+
+
+class IncompatibleIndexError(RuntimeError):
+    pass
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime (CPU): tokenizer.json + model.onnx
+    (or model_int8.onnx) from a local directory, mean pooling + L2 norm to
+    match the sentence-transformers pipeline. No torch import.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = False, batch_size: int = 32):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir
+        self.quantized = quantized
+        self.batch_size = batch_size
+
+        model_file = "model_int8.onnx" if quantized else "model.onnx"
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found; run `python -m backend.rag.export_onnx` first"
+            )
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, opts, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        out = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+
+        for i in range(0, len(texts), self.batch_size):
+            batch = self.tokenizer.encode_batch(texts[i:i + self.batch_size])
+            input_ids = np.array([e.ids for e in batch], dtype=np.int64)
+            attention = np.array([e.attention_mask for e in batch], dtype=np.int64)
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            hidden = self.session.run(None, feeds)[0]  # (batch, seq, dim)
+
+            mask = attention[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            out[i:i + len(batch)] = pooled
+
+        return out
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0].tolist()
+
+
+def _hf_embeddings():
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+
+def get_embedder(backend: Optional[str] = None):
+    """
+    LangChain-compatible embedder for the configured backend.
+    """
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend == "hf":
+        return _hf_embeddings()
+    if backend == "onnx":
+        return OnnxEmbeddings()
+    if backend == "onnx-int8":
+        return OnnxEmbeddings(quantized=True)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+
+def embedder_fingerprint(backend: Optional[str] = None) -> dict:
+    """
+    What an index's vectors depend on. fp32 ONNX reproduces the PyTorch
+    vectors (to ~1e-6), so both share a `vector_space`; int8 does not.
+    """
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    precision = "int8" if backend == "onnx-int8" else "fp32"
+    return {
+        "model": EMBEDDING_MODEL,
+        "dim": EMBEDDING_DIM,
+        "precision": precision,
+        "backend": backend,
+        "vector_space": f"{EMBEDDING_MODEL}:{precision}",
+    }
+
+
+def write_manifest(index_path: str, backend: Optional[str] = None, **extra) -> None:
+    manifest = {**embedder_fingerprint(backend), **extra}
+    with open(os.path.join(index_path, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def read_manifest(index_path: str) -> dict:
+    path = os.path.join(index_path, MANIFEST_NAME)
+    if not os.path.exists(path):
+        # Indexes built before the manifest existed used the PyTorch backend
+        return embedder_fingerprint("hf")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_index_compatible(index_path: str, backend: Optional[str] = None) -> None:
+    built = read_manifest(index_path).get("vector_space")
+    current = embedder_fingerprint(backend)["vector_space"]
+    if built != current:
+        raise IncompatibleIndexError(
+            f"Index at {index_path} was built in vector space {built!r}, "
+            f"but the configured embedder produces {current!r}"
+        )
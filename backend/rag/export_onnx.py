@@ -0,0 +1,84 @@
+# backend/rag/export_onnx.py
+"""
+Exports all-MiniLM-L6-v2 to ONNX (+ an int8 dynamically quantized copy) for
+EMBEDDING_BACKEND=onnx / onnx-int8.
+
+    python -m backend.rag.export_onnx [--out models/all-MiniLM-L6-v2-onnx]
+
+Needs torch + transformers (already pulled in by sentence-transformers) and
+onnxruntime. The serving side only needs onnxruntime + tokenizers.
+"""
+import argparse
+import inspect
+import os
+
+from backend.rag.embedders import EMBEDDING_MODEL, ONNX_MODEL_DIR
+
+
+def export(out_dir: str = ONNX_MODEL_DIR, quantize: bool = True) -> None:
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    class _Encoder(torch.nn.Module):
+        # Fixed positional signature + plain tensor output for the exporter
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids,
+            ).last_hidden_state
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+    model = _Encoder(AutoModel.from_pretrained(EMBEDDING_MODEL).eval())
+
+    # Writes tokenizer.json (fast tokenizer) used by OnnxEmbeddings
+    tokenizer.save_pretrained(out_dir)
+
+    sample = tokenizer(["warm up sentence"], return_tensors="pt")
+    model_path = os.path.join(out_dir, "model.onnx")
+
+    # Newer torch defaults to the dynamo exporter (needs onnxscript); the
+    # TorchScript exporter handles this model fine and has no extra deps.
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs["dynamo"] = False
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            model_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "seq"},
+                "attention_mask": {0: "batch", 1: "seq"},
+                "token_type_ids": {0: "batch", 1: "seq"},
+                "last_hidden_state": {0: "batch", 1: "seq"},
+            },
+            opset_version=17,
+            **export_kwargs,
+        )
+    print("ONNX model written:", model_path)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(out_dir, "model_int8.onnx")
+        quantize_dynamic(model_path, int8_path, weight_type=QuantType.QInt8)
+        print("int8 model written:", int8_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    export(args.out, quantize=not args.no_quantize)
@@ -0,0 +1,219 @@
+# backend/rag/lexical.py
+"""
+BM25 inverted index over the same chunks as the FAISS index.
+
+On disk (<index_path>/bm25/), everything is flat numpy arrays so the index can
+be memory-mapped and needs no neural model:
+- term_offsets.npy  int64[n_terms + 1]  postings for term t are [off[t], off[t+1])
+- postings_doc.npy  int32[n_postings]   chunk ids, ascending within a term
+- postings_tf.npy   uint16[n_postings]  term frequency in that chunk
+- doc_len.npy       int32[n_docs]       chunk length in tokens
+- idf.npy           float32[n_terms]
+- vocab.json        term -> id
+- chunks.jsonl      one {"text", "metadata"} per chunk id
+
+Rebuild from an existing FAISS docstore (same chunks, no re-embedding):
+    python -m backend.rag.lexical backend/rag/faiss_index
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+BM25_DIR = "bm25"
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be but by for from has have how i if in into is it its
+    me my of on or our so that the their them then there these they this to
+    was we were what when which who why will with you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for tok in _TOKEN_RE.findall((text or "").lower()):
+        if tok in STOPWORDS:
+            continue
+        # Cheap plural folding ("objections" -> "objection"); no full stemmer
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        tokens.append(tok)
+    return tokens
+
+
+def build_bm25_index(chunks: List[Tuple[str, dict]], index_path: str) -> dict:
+    """
+    chunks: (text, metadata) in chunk-id order. Returns size stats.
+    """
+    out_dir = os.path.join(index_path, BM25_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    vocab: Dict[str, int] = {}
+    doc_len = np.zeros(len(chunks), dtype=np.int32)
+    per_term: List[List[Tuple[int, int]]] = []
+
+    for doc_id, (text, _) in enumerate(chunks):
+        counts = Counter(tokenize(text))
+        doc_len[doc_id] = sum(counts.values())
+        for term, tf in counts.items():
+            tid = vocab.setdefault(term, len(vocab))
+            if tid == len(per_term):
+                per_term.append([])
+            per_term[tid].append((doc_id, min(tf, 65535)))
+
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in per_term])
+    postings_doc = np.fromiter((d for p in per_term for d, _ in p), dtype=np.int32, count=int(offsets[-1]))
+    postings_tf = np.fromiter((tf for p in per_term for _, tf in p), dtype=np.uint16, count=int(offsets[-1]))
+
+    n_docs = max(len(chunks), 1)
+    df = np.diff(offsets).astype(np.float64)
+    idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    np.save(os.path.join(out_dir, "term_offsets.npy"), offsets)
+    np.save(os.path.join(out_dir, "postings_doc.npy"), postings_doc)
+    np.save(os.path.join(out_dir, "postings_tf.npy"), postings_tf)
+    np.save(os.path.join(out_dir, "doc_len.npy"), doc_len)
+    np.save(os.path.join(out_dir, "idf.npy"), idf)
+    with open(os.path.join(out_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(vocab, f)
+    with open(os.path.join(out_dir, "chunks.jsonl"), "w", encoding="utf-8") as f:
+        for text, metadata in chunks:
+            f.write(json.dumps({"text": text, "metadata": metadata}) + "\n")
+
+    return {
+        "terms": len(vocab),
+        "postings": int(offsets[-1]),
+        "bytes": sum(os.path.getsize(os.path.join(out_dir, n)) for n in os.listdir(out_dir)),
+    }
+
+
+class BM25Index:
+    """
+    Read side of the BM25 index. Arrays are memory-mapped; scoring a query
+    touches only the postings of its terms.
+    """
+
+    def __init__(self, index_path: str):
+        d = os.path.join(index_path, BM25_DIR)
+
+        def load(name):
+            return np.load(os.path.join(d, name), mmap_mode="r")
+
+        self.term_offsets = load("term_offsets.npy")
+        self.postings_doc = load("postings_doc.npy")
+        self.postings_tf = load("postings_tf.npy")
+        self.idf = load("idf.npy")
+
+        doc_len = np.asarray(load("doc_len.npy"), dtype=np.float32)
+        avg = float(doc_len.mean()) if doc_len.size else 1.0
+        # Per-doc length normalisation term of BM25, precomputed once
+        self.length_norm = (K1 * (1 - B + B * doc_len / max(avg, 1e-9))).astype(np.float32)
+
+        with open(os.path.join(d, "vocab.json"), "r", encoding="utf-8") as f:
+            self.vocab: Dict[str, int] = json.load(f)
+
+        self.texts: List[str] = []
+        self.metadata: List[dict] = []
+        with open(os.path.join(d, "chunks.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                self.texts.append(row["text"])
+                self.metadata.append(row.get("metadata") or {})
+
+        self._filter_masks: Dict[Tuple, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _mask(self, filter: dict) -> np.ndarray:
+        key = tuple(sorted(filter.items()))
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (all(m.get(k) == v for k, v in filter.items()) for m in self.metadata),
+                dtype=bool,
+                count=len(self.metadata),
+            )
+            self._filter_masks[key] = mask
+        return mask
+
+    def search(self, query: str, k: int = 5, filter: Optional[dict] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k (chunk_id, bm25_score), optionally restricted by exact-match metadata.
+        """
+        term_ids = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not term_ids or not len(self):
+            return []
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        for tid in term_ids:
+            lo, hi = self.term_offsets[tid], self.term_offsets[tid + 1]
+            docs = self.postings_doc[lo:hi]
+            tf = self.postings_tf[lo:hi].astype(np.float32)
+            # Each doc appears once per term's postings, so fancy-index += is safe
+            scores[docs] += self.idf[tid] * tf * (K1 + 1) / (tf + self.length_norm[docs])
+
+        if filter:
+            scores[~self._mask(filter)] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(i), float(scores[i])) for i in ranked]
+
+
+_indexes: Dict[str, BM25Index] = {}
+_lock = threading.Lock()
+
+
+def has_bm25_index(index_path: str) -> bool:
+    return os.path.exists(os.path.join(index_path, BM25_DIR, "term_offsets.npy"))
+
+
+def get_bm25_index(index_path: str) -> BM25Index:
+    idx = _indexes.get(index_path)
+    if idx is None:
+        with _lock:
+            idx = _indexes.get(index_path)
+            if idx is None:
+                idx = BM25Index(index_path)
+                _indexes[index_path] = idx
+    return idx
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """
+    Fuses ranked lists of keys: score(d) = sum over lists of 1 / (k + rank).
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda key: -scores[key])
+
+
+if __name__ == "__main__":
+    import pickle
+
+    index_path = sys.argv[1] if len(sys.argv) > 1 else "backend/rag/faiss_index"
+    with open(os.path.join(index_path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    docs = [docstore.search(index_to_docstore_id[i]) for i in range(len(index_to_docstore_id))]
+    stats = build_bm25_index([(d.page_content, d.metadata) for d in docs], index_path)
+    print("BM25 index built:", stats)
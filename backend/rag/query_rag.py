@@ -1,21 +1,191 @@
+import hashlib
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+
+from backend.profiling import traced
+from backend.rag.lexical import get_bm25_index, has_bm25_index, reciprocal_rank_fusion
+from backend.rag.retriever import FAISS_PATH, get_vectorstore
+from backend.rag.retriever import preload as preload_vectorstore
+from backend.rag.service_client import call_service, get_retrieval_client, service_version
+from backend.rag.tenant_indexes import get_tenant_cache, normalize_company, tenant_index_path
 
 USE_FAKE_RAG = os.getenv("USE_FAKE_RAG", "false").lower() == "true"
 
-FAISS_PATH = "backend/rag/faiss_index"
+# "vector"  = FAISS similarity search (embedding model in memory)
+# "lexical" = BM25 over the precomputed postings only, no neural model
+# "hybrid"  = both, fused with reciprocal rank fusion
+RAG_MODE = os.getenv("RAG_MODE", "vector").lower()
+RAG_MODES = ("vector", "lexical", "hybrid")
+
+# Candidates taken from each retriever before fusion in hybrid mode
+HYBRID_CANDIDATES = int(os.getenv("RAG_HYBRID_CANDIDATES", "20"))
+
+# query_knowledge_base results per (query, company, rag_version): the agents'
+# queries are fixed strings, so a call's RAG context can be fetched before its
+# transcript exists (prefetch). 0 disables.
+RAG_RESULT_CACHE_SIZE = int(os.getenv("RAG_RESULT_CACHE_SIZE", "256"))
+
+_results: "OrderedDict[tuple, list]" = OrderedDict()
+_results_lock = threading.Lock()
+_result_stats = {"hits": 0, "misses": 0, "prefetched": 0}
+
+
+def _vector_search(query: str, k: int, filter: dict) -> list:
+    db = get_vectorstore(FAISS_PATH)
+    return [doc.page_content for doc in db.similarity_search(query, k=k, filter=filter)]
+
+
+def _lexical_search(query: str, k: int, filter: dict) -> list:
+    if not has_bm25_index(FAISS_PATH):
+        raise FileNotFoundError(
+            f"No BM25 index under {FAISS_PATH}; run `python -m backend.rag.build_index` "
+            f"(or `python -m backend.rag.lexical {FAISS_PATH}` to reuse the FAISS chunks)"
+        )
+    index = get_bm25_index(FAISS_PATH)
+    return [index.texts[i] for i, _ in index.search(query, k=k, filter=filter)]
+
+
+def _search(query: str, k: int, filter: dict, mode: str = None) -> list:
+    """
+    Top-k chunk texts for `query` under the configured retrieval mode.
+    """
+    mode = mode or RAG_MODE
+    if mode == "lexical":
+        return _lexical_search(query, k, filter)
+    if mode == "hybrid" and has_bm25_index(FAISS_PATH):
+        fused = reciprocal_rank_fusion([
+            _vector_search(query, HYBRID_CANDIDATES, filter),
+            _lexical_search(query, HYBRID_CANDIDATES, filter),
+        ])
+        return fused[:k]
+    return _vector_search(query, k, filter)
+
+
+def preload() -> None:
+    """
+    Loads whatever the configured RAG_MODE queries (see retriever.preload).
+    With a retrieval service configured nothing is loaded here; its
+    connection is checked instead (service_client.py).
+    """
+    if get_retrieval_client() is not None:
+        call_service("GET", "/health")
+        return
+    if RAG_MODE in ("lexical", "hybrid") and has_bm25_index(FAISS_PATH):
+        get_bm25_index(FAISS_PATH)
+    if RAG_MODE in ("vector", "hybrid"):
+        preload_vectorstore(FAISS_PATH)
+
+
+# Files whose (size, mtime) change whenever an index is rebuilt
+_VERSION_FILES = ("index.faiss", "index.pkl", "embedder.json", os.path.join("bm25", "chunks.jsonl"))
+
+
+def _index_fingerprint(index_path: str) -> list:
+    stats = []
+    for name in _VERSION_FILES:
+        try:
+            st = os.stat(os.path.join(index_path, name))
+        except OSError:
+            continue
+        stats.append([name, st.st_size, st.st_mtime_ns])
+    return stats
+
+
+def rag_version(company: str = None) -> str:
+    """
+    Identifies what query_knowledge_base(..., company) searches: the mode and
+    the shared + company index files. Changes when either index is rebuilt.
+    With a retrieval service up, that's the service's indexes, not ours.
+    """
+    if USE_FAKE_RAG:
+        return "fake"
+    remote = service_version(company)
+    if remote is not None:
+        return remote
+    parts = {"mode": RAG_MODE, "shared": _index_fingerprint(FAISS_PATH)}
+    company = normalize_company(company)
+    if company:
+        parts["company"] = _index_fingerprint(tenant_index_path(company))
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:16]
 
 
 def query_knowledge_base(query: str, company: str = None):
+    """
+    Returns relevant sales coaching context (see _query_knowledge_base),
+    served from the result cache when this query was already answered for
+    the company against the current indexes.
+    """
+    if USE_FAKE_RAG:
+        return _query_knowledge_base(query, company)
+    if RAG_RESULT_CACHE_SIZE <= 0:
+        return _answer(query, company)
+
+    key = (query, normalize_company(company), rag_version(company))
+    with _results_lock:
+        docs = _results.get(key)
+        if docs is not None:
+            _results.move_to_end(key)
+            _result_stats["hits"] += 1
+            return list(docs)
+        _result_stats["misses"] += 1
+
+    docs = _answer(query, company)
+    with _results_lock:
+        _results[key] = list(docs)
+        _results.move_to_end(key)
+        while len(_results) > RAG_RESULT_CACHE_SIZE:
+            _results.popitem(last=False)
+    return docs
+
+
+def _answer(query: str, company: str = None) -> list:
+    # The retrieval service when one is configured and up, else this process
+    remote = call_service("POST", "/query", {"query": query, "company": company})
+    if remote is not None:
+        return remote["docs"]
+    return _query_knowledge_base(query, company)
+
+
+def prefetch(queries, company: str = None) -> dict:
+    """
+    Answers `queries` ahead of time so the agents' query_knowledge_base calls
+    hit the result cache. Returns {"queries", "ms"}.
+    """
+    start = time.perf_counter()
+    for query in queries:
+        query_knowledge_base(query, company=company)
+    with _results_lock:
+        _result_stats["prefetched"] += len(queries)
+    return {"queries": len(queries), "ms": round((time.perf_counter() - start) * 1000, 1)}
+
+
+def result_cache_metrics() -> dict:
+    with _results_lock:
+        lookups = _result_stats["hits"] + _result_stats["misses"]
+        return {
+            "entries": len(_results),
+            "max_entries": RAG_RESULT_CACHE_SIZE,
+            "hit_rate": round(_result_stats["hits"] / lookups, 3) if lookups else None,
+            **_result_stats,
+        }
+
+
+@traced("rag.query")
+def _query_knowledge_base(query: str, company: str = None):
     """
     Returns relevant sales coaching context.
 
     Args:
         query (str): user query
-        company (str | None): optional company filter (e.g. "signiance")
+        company (str | None): the call's company (e.g. "signiance"); its own
+            index is searched first (tenant_indexes.py)
 
     Behavior:
     - fake lightweight RAG in deployment environments
-    - real FAISS retrieval locally
+    - real retrieval otherwise: FAISS, BM25 or both (RAG_MODE)
     - prioritizes company-specific KB if company is provided
     """
 
@@ -28,50 +198,32 @@ def query_knowledge_base(query: str, company: str = None):
             "Clarify decision timelines and buying authority."
         ]
 
-    # FULL RAG (LOCAL)
-    from langchain_huggingface import HuggingFaceEmbeddings
-    from langchain_community.vectorstores import FAISS
-
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
-    )
-
-    db = FAISS.load_local(
-        FAISS_PATH,
-        embeddings,
-        allow_dangerous_deserialization=True
-    )
-
+    # FULL RAG: model / postings are loaded once per process (see retriever.py, lexical.py)
     results = []
 
-    # 1Try company-specific retrieval first
+    # 1Try company-specific retrieval first: the company's own index when it has one,
+    # else its files folded into the shared index (RAG_COMPANY_FILTER builds)
+    company = normalize_company(company)
     if company:
-        company_docs = db.similarity_search(
-            query,
-            k=5,
-            filter={"company": company}
-        )
-        results.extend(company_docs)
+        tenant = get_tenant_cache().get(company)
+        if tenant is not None:
+            results.extend(tenant.search(query, 5, HYBRID_CANDIDATES))
+        else:
+            results.extend(_search(query, 5, {"company": company}))
 
     # 2Fallback / supplement with generic knowledge
-    generic_docs = db.similarity_search(
-        query,
-        k=5,
-        filter={"kb_type": "generic"}
-    )
-
-    results.extend(generic_docs)
+    results.extend(_search(query, 5, {"kb_type": "generic"}))
 
     # 3Deduplicate + keep top context
     seen = set()
     final_docs = []
 
-    for doc in results:
-        if doc.page_content not in seen:
-            seen.add(doc.page_content)
-            final_docs.append(doc)
+    for text in results:
+        if text not in seen:
+            seen.add(text)
+            final_docs.append(text)
 
         if len(final_docs) >= 5:
             break
 
-    return [doc.page_content for doc in final_docs]
\ No newline at end of file
+    return final_docs
@@ -0,0 +1,194 @@
+# backend/rag/retriever.py
+
+from __future__ import annotations
+
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: rebuilds aren't coordinated across processes
+    fcntl = None
+
+FAISS_PATH = "backend/rag/faiss_index"
+
+# Memory-map the FAISS index instead of reading it onto the heap: the pages are
+# backed by the file in the OS page cache and shared by every worker process.
+RAG_MMAP_INDEX = os.getenv("RAG_MMAP_INDEX", "true").lower() == "true"
+
+# Rebuild the index when it was embedded in a different vector space than the
+# configured EMBEDDING_BACKEND produces (e.g. switching to onnx-int8). Off by
+# default: a rebuild re-embeds the whole KB, which belongs in
+# `python -m backend.rag.build_index`, not in the first request.
+RAG_AUTO_REBUILD = os.getenv("RAG_AUTO_REBUILD", "false").lower() == "true"
+
+# Re-entrant: a load under the lock may need the model, which is created under it too
+_lock = threading.RLock()
+_embeddings = None
+_vectorstores: dict = {}
+
+
+def get_embeddings():
+    """
+    Process-wide embedding model (loaded once, reused by every query).
+    Concurrent queries are coalesced into micro-batches (embed_batcher.py)
+    unless RAG_EMBED_BATCHING=false.
+    """
+    global _embeddings
+    if _embeddings is None:
+        with _lock:
+            if _embeddings is None:
+                from backend.rag.embed_batcher import RAG_EMBED_BATCHING, BatchingEmbeddings
+                from backend.rag.embedders import get_embedder
+
+                embedder = get_embedder()
+                _embeddings = BatchingEmbeddings(embedder) if RAG_EMBED_BATCHING else embedder
+    return _embeddings
+
+
+def embedding_batch_metrics() -> dict:
+    """
+    Micro-batching metrics; doesn't load the model if nothing has yet.
+    """
+    from backend.rag.embed_batcher import batching_metrics
+
+    return batching_metrics(_embeddings)
+
+
+def _read_faiss_index(path: str):
+    import faiss
+
+    if RAG_MMAP_INDEX:
+        # IO_FLAG_MMAP covers IVF inverted lists; IO_FLAG_MMAP_IFC (faiss >= 1.8)
+        # extends it to flat code arrays, which is what our IndexFlatL2 holds.
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        try:
+            return faiss.read_index(path, flags)
+        except RuntimeError as e:
+            print("⚠️ mmap FAISS load failed, reading into memory:", e)
+    return faiss.read_index(path)
+
+
+def _install_index(built_dir: str, index_path: str) -> None:
+    """
+    Moves a freshly built index over `index_path` entry by entry (each an
+    atomic rename; the manifest last), leaving anything else there - e.g. the
+    companies/ indexes under the shared one - alone.
+    """
+    from backend.rag.embedders import MANIFEST_NAME
+
+    names = sorted(os.listdir(built_dir), key=lambda n: n == MANIFEST_NAME)
+    for name in names:
+        src, dst = os.path.join(built_dir, name), os.path.join(index_path, name)
+        if os.path.isdir(src):
+            old = f"{dst}.old-{os.getpid()}"
+            if os.path.exists(dst):
+                os.rename(dst, old)
+            os.rename(src, dst)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(src, dst)
+
+
+def _rebuild(index_path: str, rebuild) -> None:
+    """
+    Rebuilds an incompatible index once across processes: under an exclusive
+    lock file next to it, re-checked after the lock is taken (another worker
+    may have just done it), built into a temporary directory and then moved
+    into place, so no reader sees half-written files.
+    """
+    from backend.rag.embedders import IncompatibleIndexError, check_index_compatible
+
+    parent = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(parent, exist_ok=True)
+    with open(os.path.abspath(index_path) + ".lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            check_index_compatible(index_path)
+            return  # rebuilt by someone else while we waited
+        except IncompatibleIndexError:
+            pass
+
+        built_dir = tempfile.mkdtemp(prefix=".rebuild-", dir=parent)
+        try:
+            if rebuild is None:
+                from backend.rag.build_index import build_index
+
+                build_index(db_path=built_dir)
+            else:
+                rebuild(built_dir)
+            _install_index(built_dir, index_path)
+        finally:
+            shutil.rmtree(built_dir, ignore_errors=True)
+
+
+def load_vectorstore(index_path: str, rebuild=None):
+    """
+    Loads the FAISS vector store at `index_path` (not cached; see
+    get_vectorstore). An index embedded with a different backend raises
+    IncompatibleIndexError, or with RAG_AUTO_REBUILD is recreated by
+    `rebuild(target_dir)` (default build_index(db_path=target_dir)) - see
+    _rebuild.
+    """
+    from langchain_community.vectorstores import FAISS
+    from backend.rag.embedders import IncompatibleIndexError, check_index_compatible
+
+    try:
+        check_index_compatible(index_path)
+    except IncompatibleIndexError as e:
+        if not RAG_AUTO_REBUILD:
+            raise IncompatibleIndexError(
+                f"{e}; rebuild it with `python -m backend.rag.build_index` "
+                f"(or set RAG_AUTO_REBUILD=true)"
+            ) from None
+        print("⚠️", e, "- rebuilding index")
+        _rebuild(index_path, rebuild)
+
+    embeddings = get_embeddings()
+    index = _read_faiss_index(os.path.join(index_path, "index.faiss"))
+
+    # Our own index file, written by build_index.py
+    with open(os.path.join(index_path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def get_vectorstore(index_path: str = FAISS_PATH):
+    """
+    Process-wide FAISS vector store for `index_path`, loaded on first use.
+    Same on-disk layout as FAISS.save_local (index.faiss + index.pkl).
+    """
+    db = _vectorstores.get(index_path)
+    if db is not None:
+        return db
+
+    get_embeddings()  # model first, so the index load below never nests the lock
+    with _lock:
+        db = _vectorstores.get(index_path)
+        if db is None:
+            db = load_vectorstore(index_path)
+            _vectorstores[index_path] = db
+    return db
+
+
+def is_loaded(index_path: str = FAISS_PATH) -> bool:
+    """
+    True once the model and the index at `index_path` are in memory, i.e. a
+    query won't pay for loading them.
+    """
+    return _embeddings is not None and index_path in _vectorstores
+
+
+def preload(index_path: str = FAISS_PATH) -> None:
+    """
+    Loads the model and index and runs one query so lazily-initialised
+    weights/buffers are materialised. Call this in the parent process before
+    forking workers so they share the pages copy-on-write.
+    """
+    db = get_vectorstore(index_path)
+    db.similarity_search("warm up", k=1)
@@ -0,0 +1,290 @@
+# backend/rag/segment_retrieval.py
+"""
+Retrieval keyed on what was actually said in the call.
+
+1) Split the transcript into sentences and tag the ones carrying an objection,
+   pricing or negative cue (merging adjacent sentences of the same kind). The
+   cues are the ruleset's "segment.*" phrase sets (the company's, hot-reloaded).
+2) Keep at most RAG_SEGMENT_MAX segments (negative > objection > pricing).
+3) Embed every segment in ONE batch and run ONE FAISS search over the batch
+   (or BM25 per segment in RAG_MODE=lexical; RRF-fused in hybrid).
+4) Keep the vector pass inside the RAG_SEGMENT_BUDGET_MS deadline: it is
+   skipped while the model / index is still loading (a background load is
+   started) and when less time is left than recent vector passes took.
+   Segments it didn't cover fall back to BM25, which runs even past the
+   deadline (milliseconds per segment); without a BM25 index they are
+   returned without playbook snippets. stats.degraded is set when the
+   configured mode couldn't be served in full (budget, loading, failure),
+   so callers don't keep that result (agent_memo).
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from backend.profiling import traced
+from backend.rag.lexical import get_bm25_index, has_bm25_index, reciprocal_rank_fusion
+from backend.rag.query_rag import HYBRID_CANDIDATES, RAG_MODE, USE_FAKE_RAG
+from backend.rag.retriever import FAISS_PATH, get_embeddings, get_vectorstore, is_loaded
+from backend.rag.service_client import call_service, get_retrieval_client
+from backend.rag.tenant_indexes import TenantIndex, get_tenant_cache, normalize_company
+from backend.rules.ruleset import Ruleset, get_ruleset
+
+RAG_SEGMENT_MAX = int(os.getenv("RAG_SEGMENT_MAX", "6"))
+RAG_SEGMENT_BUDGET_MS = float(os.getenv("RAG_SEGMENT_BUDGET_MS", "250"))
+SNIPPETS_PER_SEGMENT = int(os.getenv("RAG_SEGMENT_SNIPPETS", "2"))
+
+# Searched per segment before metadata filtering (FAISS has no pre-filter)
+FETCH_K = 20
+
+# Checked in priority order; a sentence gets the first kind whose
+# "segment.<kind>" phrase set matches
+SEGMENT_KINDS = ("negative", "objection", "pricing")
+
+_SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]?")
+
+# EWMA of the vector pass (embed + search) in ms, to tell whether it fits the time left
+_vector_ms = 0.0
+_warm_lock = threading.Lock()
+_warming = False
+
+
+def detect_segments(transcript: str, ruleset: Optional[Ruleset] = None) -> List[dict]:
+    """
+    Objection / pricing / negative segments in transcript order, cued by
+    `ruleset` (default: the default ruleset).
+    """
+    ruleset = ruleset or get_ruleset()
+    # One (cached) scan of the whole transcript, shared with the agents; only
+    # the cues it found are looked for sentence by sentence
+    hits = ruleset.scan(transcript)
+    cues = {kind: hits.hits(f"segment.{kind}") for kind in SEGMENT_KINDS}
+    if not any(cues.values()):
+        return []
+
+    segments: List[dict] = []
+    for sentence_idx, m in enumerate(_SENTENCE_RE.finditer(transcript or "")):
+        sentence = m.group(0).strip()
+        if not sentence:
+            continue
+        lower = sentence.lower()
+        for kind in SEGMENT_KINDS:
+            cue = next((p for p in cues[kind] if p in lower), None)
+            if cue is None:
+                continue
+            prev = segments[-1] if segments else None
+            if prev and prev["kind"] == kind and prev["last_sentence"] == sentence_idx - 1:
+                prev["text"] += " " + sentence
+                prev["last_sentence"] = sentence_idx
+                if cue not in prev["cues"]:
+                    prev["cues"].append(cue)
+            else:
+                segments.append({
+                    "kind": kind,
+                    "text": sentence,
+                    "cues": [cue],
+                    "first_sentence": sentence_idx,
+                    "last_sentence": sentence_idx,
+                })
+            break
+    return segments
+
+
+def cap_segments(segments: List[dict], max_segments: int = RAG_SEGMENT_MAX) -> List[dict]:
+    """
+    At most `max_segments`, chosen by kind priority then position, kept in
+    transcript order.
+    """
+    if len(segments) <= max_segments:
+        return segments
+    rank = {kind: i for i, kind in enumerate(SEGMENT_KINDS)}
+    keep = sorted(segments, key=lambda s: (rank[s["kind"]], s["first_sentence"]))[:max_segments]
+    return sorted(keep, key=lambda s: s["first_sentence"])
+
+
+def _segment_query(segment: dict) -> str:
+    # Anchor the raw utterance with the kind so short lines ("too expensive.")
+    # still land on the playbook section for it
+    return f"{segment['kind']} handling: {segment['text']}"
+
+
+def _allowed(metadata: dict, company: Optional[str]) -> bool:
+    if company and metadata.get("company") == company:
+        return True
+    return metadata.get("kb_type") == "generic"
+
+
+def _tenant_vector_hits(tenant: Optional[TenantIndex], vectors: np.ndarray, k: int) -> List[List[str]]:
+    if tenant is None or tenant.vectorstore is None:
+        return [[] for _ in range(len(vectors))]
+    db = tenant.vectorstore
+    _, ids = db.index.search(vectors, k)
+    return [[db.docstore.search(db.index_to_docstore_id[i]).page_content for i in row if i != -1] for row in ids]
+
+
+def _vector_batch(queries: List[str], company: Optional[str], k: int, tenant: Optional[TenantIndex] = None) -> List[List[str]]:
+    db = get_vectorstore(FAISS_PATH)
+    vectors = np.asarray(get_embeddings().embed_documents(queries), dtype=np.float32)
+    _, ids = db.index.search(vectors, FETCH_K)
+    # The company's own index (when loaded) ranks ahead of the shared one
+    tenant_hits = _tenant_vector_hits(tenant, vectors, k)
+
+    results = []
+    for row, own_hits in zip(ids, tenant_hits):
+        company_hits, generic_hits = list(own_hits), []
+        for i in row:
+            if i == -1:
+                continue
+            doc = db.docstore.search(db.index_to_docstore_id[i])
+            if not _allowed(doc.metadata, company):
+                continue
+            bucket = company_hits if doc.metadata.get("kb_type") != "generic" else generic_hits
+            bucket.append(doc.page_content)
+        results.append((company_hits + generic_hits)[:k])
+    return results
+
+
+def _warm_in_background() -> None:
+    """
+    Loads the model and shared index off the request path (once).
+    """
+    global _warming
+    with _warm_lock:
+        if _warming:
+            return
+        _warming = True
+
+    def load() -> None:
+        global _warming
+        try:
+            get_vectorstore(FAISS_PATH)
+        except Exception as e:
+            print("⚠️ Background vector store load failed:", e)
+        finally:
+            _warming = False
+
+    threading.Thread(target=load, name="rag-warm", daemon=True).start()
+
+
+def _vector_fits(deadline: float) -> bool:
+    if not is_loaded(FAISS_PATH):
+        _warm_in_background()
+        return False
+    return (deadline - time.perf_counter()) * 1000 > _vector_ms
+
+
+def _record_vector_ms(ms: float) -> None:
+    global _vector_ms
+    _vector_ms = ms if _vector_ms == 0.0 else 0.8 * _vector_ms + 0.2 * ms
+
+
+def _lexical(query: str, company: Optional[str], k: int, tenant: Optional[TenantIndex] = None) -> List[str]:
+    texts = []
+    if tenant is not None and tenant.bm25 is not None:
+        texts = [tenant.bm25.texts[i] for i, _ in tenant.bm25.search(query, k=k)]
+    index = get_bm25_index(FAISS_PATH)
+    hits = index.search(query, k=FETCH_K)
+    texts += [index.texts[i] for i, _ in hits if _allowed(index.metadata[i], company)]
+    return texts[:k]
+
+
+@traced("rag.segments")
+def retrieve_for_segments(
+    transcript: str,
+    company: Optional[str] = None,
+    max_segments: int = RAG_SEGMENT_MAX,
+    budget_ms: float = RAG_SEGMENT_BUDGET_MS,
+    k: int = SNIPPETS_PER_SEGMENT,
+    ruleset: Optional[Ruleset] = None,
+) -> dict:
+    """
+    Returns {"segments": [{kind, excerpt, cues, playbook, source}], "stats": {...}}.
+    Segments are cued by `ruleset` (default: the company's current one).
+    Answered by the retrieval service when one is configured and up; it
+    uses its own get_ruleset(company).
+    """
+    start = time.perf_counter()
+    deadline = start + budget_ms / 1000.0
+
+    if not USE_FAKE_RAG:
+        # Bounded by the same budget; out of it, the BM25 fallback below still answers
+        remote = call_service("POST", "/segments", {
+            "transcript": transcript,
+            "company": company,
+            "max_segments": max_segments,
+            "budget_ms": budget_ms,
+            "k": k,
+        }, timeout=budget_ms / 1000.0)
+        if remote is not None:
+            return remote
+    # The service is up but ran out of budget: answer with BM25 here rather
+    # than loading the model into this worker
+    service_up = get_retrieval_client() is not None and get_retrieval_client().available()
+
+    detected = detect_segments(transcript, ruleset or get_ruleset(company))
+    segments = cap_segments(detected, max_segments)
+    queries = [_segment_query(s) for s in segments]
+    playbooks: List[Optional[List[str]]] = [None] * len(segments)
+    sources = ["none"] * len(segments)
+    lexical_ok = has_bm25_index(FAISS_PATH)
+    degraded = False
+
+    if segments and not USE_FAKE_RAG:
+        company = normalize_company(company)
+        tenant = get_tenant_cache().get(company) if company else None
+        vector_fits = RAG_MODE in ("vector", "hybrid") and not service_up and _vector_fits(deadline)
+        degraded = RAG_MODE in ("vector", "hybrid") and not vector_fits
+        if vector_fits:
+            vector_start = time.perf_counter()
+            try:
+                vector_hits = _vector_batch(queries, company, HYBRID_CANDIDATES if RAG_MODE == "hybrid" else k, tenant)
+            except Exception as e:
+                print("⚠️ Segment vector retrieval failed:", e)
+                vector_hits = None
+                degraded = True
+            _record_vector_ms((time.perf_counter() - vector_start) * 1000)
+
+            if vector_hits is not None:
+                for i, hits in enumerate(vector_hits):
+                    if RAG_MODE == "hybrid" and lexical_ok and time.perf_counter() < deadline:
+                        hits = reciprocal_rank_fusion([hits, _lexical(queries[i], company, HYBRID_CANDIDATES, tenant)])
+                        sources[i] = "hybrid"
+                    else:
+                        degraded = degraded or (RAG_MODE == "hybrid" and lexical_ok)
+                        sources[i] = "vector"
+                    playbooks[i] = hits[:k]
+
+        # Lexical mode, or whatever the vector pass could not cover in budget.
+        # Not cut at the deadline: BM25 is the cheap fallback the budget falls back to.
+        for i, query in enumerate(queries):
+            if playbooks[i] is not None or not lexical_ok:
+                continue
+            playbooks[i] = _lexical(query, company, k, tenant)
+            sources[i] = "lexical"
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return {
+        "segments": [
+            {
+                "kind": s["kind"],
+                "excerpt": s["text"],
+                "cues": s["cues"],
+                "playbook": playbooks[i] or [],
+                "source": sources[i],
+            }
+            for i, s in enumerate(segments)
+        ],
+        "stats": {
+            "segments_detected": len(detected),
+            "segments_used": len(segments),
+            "segments_without_playbook": sum(1 for p in playbooks if not p),
+            "latency_ms": round(elapsed_ms, 2),
+            "over_budget": elapsed_ms > budget_ms,
+            "degraded": degraded,
+        },
+    }
@@ -0,0 +1,202 @@
+# backend/rag/service.py
+"""
+Standalone retrieval service: one process owns the embedding model and the
+indexes (shared + per-company) and answers the API workers' RAG queries
+over localhost HTTP or a Unix socket, so workers stay small and either side
+can be restarted or scaled on its own. Workers use it when RAG_SERVICE_URL
+points at it (service_client.py) and fall back to in-process retrieval when
+it's down.
+
+    python -m backend.rag.service --port 8700
+    python -m backend.rag.service --socket /run/rag.sock
+
+Endpoints (JSON):
+    POST /query     {"query", "company"}                   -> {"docs": [...]}
+    POST /segments  {"transcript", "company", "max_segments",
+                     "budget_ms", "k"}                      -> retrieve_for_segments()
+    POST /version   {"company"}                            -> {"rag_version"}
+    GET  /health                                            -> mode, uptime, counters
+
+Requests are served by a thread per connection (ThreadingHTTPServer);
+the model and indexes are loaded once at startup.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.rag import service_client
+
+# This process *is* the service: its own queries must never go back to it
+service_client.disable()
+
+from backend.rag.query_rag import RAG_MODE, USE_FAKE_RAG, query_knowledge_base, rag_version, result_cache_metrics  # noqa: E402
+from backend.rag.query_rag import preload as preload_rag  # noqa: E402
+from backend.rag.retriever import embedding_batch_metrics  # noqa: E402
+from backend.rag.segment_retrieval import retrieve_for_segments  # noqa: E402
+from backend.rag.tenant_indexes import get_tenant_cache  # noqa: E402
+from backend.rag.tenant_indexes import prewarm as prewarm_tenant_indexes  # noqa: E402
+
+RAG_SERVICE_HOST = os.getenv("RAG_SERVICE_HOST", "127.0.0.1")
+RAG_SERVICE_PORT = int(os.getenv("RAG_SERVICE_PORT", "8700"))
+RAG_SERVICE_SOCKET = os.getenv("RAG_SERVICE_SOCKET") or None
+# Bodies above this are refused (a transcript is well under 1 MB)
+MAX_BODY_BYTES = int(os.getenv("RAG_SERVICE_MAX_BODY_MB", "4")) * 1024 * 1024
+
+_started = time.time()
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "errors": 0}
+
+
+def _query(body: dict) -> dict:
+    return {"docs": query_knowledge_base(body["query"], company=body.get("company"))}
+
+
+def _segments(body: dict) -> dict:
+    kwargs = {k: body[k] for k in ("max_segments", "budget_ms", "k") if body.get(k) is not None}
+    return retrieve_for_segments(body.get("transcript") or "", company=body.get("company"), **kwargs)
+
+
+def _version(body: dict) -> dict:
+    # What the workers key their result cache / agent memo on
+    return {"rag_version": rag_version(body.get("company"))}
+
+
+_ROUTES = {"/query": _query, "/segments": _segments, "/version": _version}
+
+
+def health() -> dict:
+    with _stats_lock:
+        counters = dict(_stats)
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "rag_mode": "fake" if USE_FAKE_RAG else RAG_MODE,
+        "uptime_seconds": round(time.time() - _started, 1),
+        "tenants": get_tenant_cache().metrics(),
+        "result_cache": result_cache_metrics(),
+        "embed_batching": embedding_batch_metrics(),
+        **counters,
+    }
+
+
+class RetrievalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for the clients' connection pools
+
+    def setup(self) -> None:
+        super().setup()
+        if self.connection.family != socket.AF_UNIX:
+            # Headers and body are separate writes: don't let Nagle hold the body back
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _send(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] == "/health":
+            self._send(200, health())
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self) -> None:
+        route = _ROUTES.get(self.path.split("?", 1)[0])
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._send(413, {"error": "Body too large"})
+            self.close_connection = True
+            return
+        raw = self.rfile.read(length) if length else b""
+        if route is None:
+            self._send(404, {"error": "Not found"})
+            return
+
+        with _stats_lock:
+            _stats["requests"] += 1
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            self._send(400, {"error": "Invalid JSON"})
+            return
+        try:
+            self._send(200, route(body))
+        except KeyError as e:
+            self._send(400, {"error": f"Missing field: {e}"})
+        except Exception as e:
+            with _stats_lock:
+                _stats["errors"] += 1
+            print(f"❌ Retrieval service {self.path} failed:", e)
+            self._send(500, {"error": "Retrieval failed", "message": str(e)})
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args) -> None:
+        pass  # one line per query is too much; /health has the counters
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def make_server(host: str = RAG_SERVICE_HOST, port: int = RAG_SERVICE_PORT, socket_path: str = None):
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # stale socket from a previous run
+        return ThreadingUnixHTTPServer(socket_path, RetrievalHandler)
+    server = ThreadingHTTPServer((host, port), RetrievalHandler)
+    server.daemon_threads = True
+    return server
+
+
+def warm_up() -> None:
+    """
+    Model + shared index, then the busiest tenants, before accepting queries.
+    """
+    if USE_FAKE_RAG:
+        return
+    preload_rag()
+    warmed = prewarm_tenant_indexes()
+    print(f"✅ Retrieval service warm (RAG_MODE={RAG_MODE}, tenants: {', '.join(warmed) or '-'})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Standalone retrieval service")
+    parser.add_argument("--host", default=RAG_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=RAG_SERVICE_PORT)
+    parser.add_argument("--socket", default=RAG_SERVICE_SOCKET, help="serve on a Unix socket instead of TCP")
+    parser.add_argument("--no-warm-up", action="store_true")
+    args = parser.parse_args()
+
+    if not args.no_warm_up:
+        warm_up()
+    server = make_server(args.host, args.port, args.socket)
+    where = f"unix://{args.socket}" if args.socket else f"http://{args.host}:{args.port}"
+    print(f"✅ Retrieval service listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
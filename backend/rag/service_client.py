@@ -0,0 +1,250 @@
+# backend/rag/service_client.py
+"""
+Client for the standalone retrieval service (backend/rag/service.py).
+
+With RAG_SERVICE_URL set (http://127.0.0.1:8700 or unix:///run/rag.sock),
+query_knowledge_base and retrieve_for_segments ask the service instead of
+loading the embedding model and indexes into this process. Requests go over
+a keep-alive urllib3 pool with connect/read timeouts. If the service can't
+be reached, times out or answers with an error, the call returns None and
+the caller falls back to in-process retrieval (RAG_SERVICE_FALLBACK); the
+service is then skipped for RAG_SERVICE_RETRY_SECONDS instead of every
+request paying the timeout again. Calls with a time budget of their own
+(segment retrieval) pass it as the read timeout; running out of it falls
+back for that call only.
+
+service_version() is the service's rag_version, so the worker's result
+cache and agent memo are keyed on the indexes that actually answered
+(cached for RAG_SERVICE_VERSION_TTL_SECONDS).
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Optional
+from urllib.parse import unquote, urlparse
+
+import urllib3
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+
+RAG_SERVICE_URL = os.getenv("RAG_SERVICE_URL", "").strip()
+RAG_SERVICE_CONNECT_TIMEOUT = float(os.getenv("RAG_SERVICE_CONNECT_TIMEOUT", "0.5"))
+RAG_SERVICE_TIMEOUT = float(os.getenv("RAG_SERVICE_TIMEOUT_SECONDS", "5"))
+RAG_SERVICE_POOL_SIZE = int(os.getenv("RAG_SERVICE_POOL_SIZE", "8"))
+RAG_SERVICE_FALLBACK = os.getenv("RAG_SERVICE_FALLBACK", "true").lower() == "true"
+RAG_SERVICE_RETRY_SECONDS = float(os.getenv("RAG_SERVICE_RETRY_SECONDS", "30"))
+RAG_SERVICE_VERSION_TTL = float(os.getenv("RAG_SERVICE_VERSION_TTL_SECONDS", "5"))
+
+
+class RetrievalServiceError(Exception):
+    pass
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, *args, socket_path: str = "", **kwargs):
+        super().__init__(*args, **kwargs)
+        self._socket_path = socket_path
+
+    def _new_conn(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout if isinstance(self.timeout, (int, float)) else None)
+        sock.connect(self._socket_path)
+        return sock
+
+
+class _UnixHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _UnixHTTPConnection
+
+    def __init__(self, socket_path: str, **kwargs):
+        super().__init__("localhost", **kwargs)
+        self.conn_kw["socket_path"] = socket_path
+
+
+class RetrievalClient:
+    def __init__(
+        self,
+        url: str,
+        connect_timeout: float = RAG_SERVICE_CONNECT_TIMEOUT,
+        read_timeout: float = RAG_SERVICE_TIMEOUT,
+        pool_size: int = RAG_SERVICE_POOL_SIZE,
+        retry_seconds: float = RAG_SERVICE_RETRY_SECONDS,
+    ):
+        self.url = url
+        self.retry_seconds = retry_seconds
+        self.connect_timeout = connect_timeout
+        timeout = urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+        # One retry on a dropped keep-alive connection; a slow service is not retried
+        retries = urllib3.Retry(total=1, connect=1, read=0, status=0, allowed_methods=None)
+        parsed = urlparse(url)
+        if parsed.scheme == "unix":
+            path = unquote(parsed.netloc + parsed.path)
+            self._pool = _UnixHTTPConnectionPool(path, maxsize=pool_size, block=False, timeout=timeout, retries=retries)
+            self._base = ""
+        elif parsed.scheme in ("http", ""):
+            self._pool = urllib3.PoolManager(num_pools=1, maxsize=pool_size, timeout=timeout, retries=retries)
+            self._base = url.rstrip("/")
+        else:
+            raise ValueError(f"Unsupported RAG_SERVICE_URL scheme: {parsed.scheme}")
+
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self._latencies_ms: Deque[float] = deque(maxlen=1000)
+        self._counters = {"requests": 0, "failures": 0, "skipped": 0, "budget_timeouts": 0}
+        self._last_error: Optional[str] = None
+
+    def available(self) -> bool:
+        """
+        False while backing off after a failure.
+        """
+        return time.monotonic() >= self._down_until
+
+    def request(self, method: str, path: str, body: Optional[dict] = None, timeout: Optional[float] = None) -> Any:
+        """
+        Decoded JSON response; RetrievalServiceError on connection errors,
+        timeouts or non-2xx answers (and while backing off). `timeout`
+        overrides the read timeout; running out of it doesn't start a
+        back-off, since it is the caller's budget, not a sign the service is down.
+        """
+        if not self.available():
+            with self._lock:
+                self._counters["skipped"] += 1
+            raise RetrievalServiceError(f"retrieval service unavailable ({self._last_error})")
+
+        start = time.perf_counter()
+        kwargs = {}
+        if timeout is not None:
+            kwargs["timeout"] = urllib3.Timeout(connect=self.connect_timeout, read=max(0.001, timeout))
+        try:
+            resp = self._pool.request(
+                method,
+                self._base + path,
+                body=json.dumps(body).encode("utf-8") if body is not None else None,
+                headers={"Content-Type": "application/json"},
+                **kwargs,
+            )
+            if resp.status >= 300:
+                raise RetrievalServiceError(f"HTTP {resp.status}: {resp.data[:200]!r}")
+            data = json.loads(resp.data)
+        except Exception as e:
+            error = e if isinstance(e, RetrievalServiceError) else RetrievalServiceError(f"{e.__class__.__name__}: {e}")
+            reason = e.reason if isinstance(e, MaxRetryError) else e
+            if timeout is not None and isinstance(reason, ReadTimeoutError):
+                with self._lock:
+                    self._counters["requests"] += 1
+                    self._counters["budget_timeouts"] += 1
+                raise error
+            with self._lock:
+                self._counters["requests"] += 1
+                self._counters["failures"] += 1
+                self._last_error = str(error)
+                self._down_until = time.monotonic() + self.retry_seconds
+            raise error
+
+        with self._lock:
+            self._counters["requests"] += 1
+            self._latencies_ms.append((time.perf_counter() - start) * 1000)
+        return data
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lat = sorted(self._latencies_ms)
+            return {
+                "url": self.url,
+                "available": self.available(),
+                "last_error": self._last_error,
+                "latency_ms": {
+                    "p50": round(lat[len(lat) // 2], 2) if lat else 0.0,
+                    "p95": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))], 2) if lat else 0.0,
+                    "samples": len(lat),
+                },
+                **self._counters,
+            }
+
+
+_client: Optional[RetrievalClient] = None
+_client_lock = threading.Lock()
+_disabled = False
+
+
+def disable() -> None:
+    """
+    Called by the service itself so its own queries never loop back to it.
+    """
+    global _disabled
+    _disabled = True
+
+
+def get_retrieval_client() -> Optional[RetrievalClient]:
+    """
+    The process-wide client, or None when retrieval runs in-process.
+    """
+    global _client
+    if _disabled or not RAG_SERVICE_URL:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RetrievalClient(RAG_SERVICE_URL)
+    return _client
+
+
+def call_service(method: str, path: str, body: Optional[dict] = None, timeout: Optional[float] = None) -> Any:
+    """
+    The service's answer, or None if retrieval should run in-process
+    (no service configured, or it failed and RAG_SERVICE_FALLBACK is on).
+    `timeout` is the caller's remaining budget (see RetrievalClient.request).
+    """
+    client = get_retrieval_client()
+    if client is None:
+        return None
+    was_available = client.available()
+    try:
+        return client.request(method, path, body, timeout=timeout)
+    except RetrievalServiceError as e:
+        if not RAG_SERVICE_FALLBACK:
+            raise
+        if was_available and client.available():
+            return None  # out of the caller's budget; no back-off, nothing to announce
+        if was_available:
+            print(
+                f"⚠️ Retrieval service {path} failed, retrieving in-process for "
+                f"{client.retry_seconds:.0f}s:", e
+            )
+        return None
+
+
+_versions: dict = {}
+_versions_lock = threading.Lock()
+
+
+def service_version(company: Optional[str] = None) -> Optional[str]:
+    """
+    The service's rag_version(company) (cached for RAG_SERVICE_VERSION_TTL),
+    or None when retrieval runs in-process - no service, or it is down and
+    this worker falls back to its own indexes.
+    """
+    client = get_retrieval_client()
+    if client is None or not client.available():
+        return None
+    now = time.monotonic()
+    with _versions_lock:
+        cached = _versions.get(company)
+    if cached is not None and now - cached[1] < RAG_SERVICE_VERSION_TTL:
+        return cached[0]
+    remote = call_service("POST", "/version", {"company": company})
+    if remote is None:
+        return None
+    with _versions_lock:
+        _versions[company] = (remote["rag_version"], now)
+    return remote["rag_version"]
+
+
+def metrics() -> dict:
+    client = get_retrieval_client()
+    return client.metrics() if client is not None else {"enabled": False}
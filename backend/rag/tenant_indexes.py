@@ -0,0 +1,301 @@
+# backend/rag/tenant_indexes.py
+"""
+Per-company (tenant) RAG indexes, loaded on demand.
+
+Each company's playbooks live in their own index under
+RAG_TENANT_INDEX_ROOT/<company>/ (FAISS + BM25, written by
+`python -m backend.rag.build_index --company <company>`), next to the shared
+generic index. A process only keeps the tenants it is actually serving:
+loaded indexes sit in an LRU cache bounded by RAG_TENANT_CACHE_MB of index
+data (not a count - one large customer can outweigh dozens of small ones),
+and the least recently used tenants are dropped to make room.
+
+Sizes are the bytes of the index files a tenant loads (FAISS vectors +
+docstore for vector/hybrid, BM25 arrays + chunk texts for lexical/hybrid),
+which tracks what the loaded index keeps in memory or page cache.
+
+The busiest tenants (RAG_PREWARM_COMPANIES, plus the RAG_PREWARM_TOP
+companies with the most calls in the last RAG_PREWARM_DAYS days) are loaded
+at startup so their first calls don't pay the load. Hit/miss/eviction
+counters are served from /health/rag.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+from backend.rag.lexical import BM25_DIR, BM25Index, has_bm25_index, reciprocal_rank_fusion
+from backend.rag.retriever import FAISS_PATH, load_vectorstore
+
+RAG_TENANT_INDEX_ROOT = os.getenv("RAG_TENANT_INDEX_ROOT", os.path.join(FAISS_PATH, "companies"))
+RAG_TENANT_CACHE_MB = float(os.getenv("RAG_TENANT_CACHE_MB", "512"))
+RAG_PREWARM_COMPANIES = [c for c in os.getenv("RAG_PREWARM_COMPANIES", "").split(",") if c.strip()]
+RAG_PREWARM_TOP = int(os.getenv("RAG_PREWARM_TOP", "5"))
+RAG_PREWARM_DAYS = float(os.getenv("RAG_PREWARM_DAYS", "7"))
+
+# Same rule as rules/ruleset.py company overrides; also keeps names path-safe
+_COMPANY_RE = re.compile(r"^[a-z0-9_-]+$")
+
+
+def normalize_company(company: Optional[str]) -> Optional[str]:
+    """
+    Canonical tenant key ("Signiance " -> "signiance"); None if unusable.
+    """
+    if not company:
+        return None
+    name = company.strip().lower()
+    return name if _COMPANY_RE.match(name) else None
+
+
+def tenant_index_path(company: str) -> str:
+    return os.path.join(RAG_TENANT_INDEX_ROOT, company)
+
+
+def has_tenant_index(company: str) -> bool:
+    path = tenant_index_path(company)
+    return os.path.exists(os.path.join(path, "index.faiss")) or has_bm25_index(path)
+
+
+def _parts(path: str, mode: str):
+    """
+    (load vectors?, load BM25?) for an index directory under `mode`.
+    """
+    lexical_ok = has_bm25_index(path)
+    vector = mode in ("vector", "hybrid") or not lexical_ok
+    return vector, mode in ("lexical", "hybrid") and lexical_ok
+
+
+def index_bytes(path: str, mode: str) -> int:
+    """
+    Bytes of the index files a load of `path` under `mode` reads.
+    """
+    vector, lexical = _parts(path, mode)
+    total = 0
+    if vector:
+        for name in ("index.faiss", "index.pkl"):
+            if os.path.exists(os.path.join(path, name)):
+                total += os.path.getsize(os.path.join(path, name))
+    if lexical:
+        bm25_dir = os.path.join(path, BM25_DIR)
+        total += sum(os.path.getsize(os.path.join(bm25_dir, fn)) for fn in os.listdir(bm25_dir))
+    return total
+
+
+class TenantIndex:
+    """
+    One company's loaded index, searched with the configured RAG_MODE.
+    """
+
+    def __init__(self, company: str, mode: str):
+        self.company = company
+        self.path = tenant_index_path(company)
+        self.vectorstore = None
+        self.bm25: Optional[BM25Index] = None
+
+        vector, lexical = _parts(self.path, mode)
+        if vector:
+            from backend.rag.build_index import build_company_index
+
+            self.vectorstore = load_vectorstore(self.path, rebuild=lambda target: build_company_index(company, db_path=target))
+        if lexical:
+            self.bm25 = BM25Index(self.path)
+        self.bytes = index_bytes(self.path, mode)
+
+    def _vector(self, query: str, k: int) -> List[str]:
+        return [doc.page_content for doc in self.vectorstore.similarity_search(query, k=k)]
+
+    def _lexical(self, query: str, k: int) -> List[str]:
+        return [self.bm25.texts[i] for i, _ in self.bm25.search(query, k=k)]
+
+    def search(self, query: str, k: int, candidates: int = 20) -> List[str]:
+        """
+        Top-k chunk texts; RRF-fused over `candidates` each when both parts are loaded.
+        """
+        if self.vectorstore is not None and self.bm25 is not None:
+            return reciprocal_rank_fusion([
+                self._vector(query, candidates),
+                self._lexical(query, candidates),
+            ])[:k]
+        if self.bm25 is not None:
+            return self._lexical(query, k)
+        return self._vector(query, k)
+
+
+class TenantIndexCache:
+    """
+    LRU of loaded TenantIndex objects, bounded by total index bytes.
+    """
+
+    def __init__(self, budget_bytes: int, mode: str):
+        self.budget_bytes = budget_bytes
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, TenantIndex]" = OrderedDict()
+        self._used = 0
+        # One loader per tenant at a time; other requests for it wait and hit
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._load_ms: deque = deque(maxlen=500)
+        self._counters = {"hits": 0, "misses": 0, "loads": 0, "load_failures": 0, "evictions": 0, "oversize": 0}
+
+    def _lookup(self, company: str) -> Optional[TenantIndex]:
+        with self._lock:
+            entry = self._entries.get(company)
+            if entry is not None:
+                self._entries.move_to_end(company)
+                self._counters["hits"] += 1
+            return entry
+
+    def get(self, company: Optional[str]) -> Optional[TenantIndex]:
+        """
+        The company's index, loading it on a miss; None if it has no index
+        (callers fall back to the shared index).
+        """
+        company = normalize_company(company)
+        if company is None:
+            return None
+        entry = self._lookup(company)
+        if entry is not None:
+            return entry
+        if not has_tenant_index(company):
+            return None
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(company, threading.Lock())
+        with load_lock:
+            # Loaded by a concurrent request while we waited
+            entry = self._lookup(company)
+            if entry is not None:
+                return entry
+
+            with self._lock:
+                self._counters["misses"] += 1
+            start = time.perf_counter()
+            try:
+                entry = TenantIndex(company, self.mode)
+            except Exception as e:
+                with self._lock:
+                    self._counters["load_failures"] += 1
+                print(f"⚠️ Failed to load RAG index for {company}:", e)
+                return None
+            load_ms = (time.perf_counter() - start) * 1000
+            self._insert(entry)
+            with self._lock:
+                self._counters["loads"] += 1
+                self._load_ms.append(load_ms)
+            print(f"✅ RAG index for {company} loaded ({entry.bytes / 1e6:.1f} MB, {load_ms:.0f} ms)")
+            return entry
+
+    def _insert(self, entry: TenantIndex) -> None:
+        with self._lock:
+            if entry.bytes > self.budget_bytes:
+                # Served for this request but never kept: it would evict everyone else
+                self._counters["oversize"] += 1
+                print(
+                    f"⚠️ RAG index for {entry.company} ({entry.bytes / 1e6:.1f} MB) exceeds "
+                    f"RAG_TENANT_CACHE_MB={self.budget_bytes / 1e6:.0f}, not cached"
+                )
+                return
+            while self._entries and self._used + entry.bytes > self.budget_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._used -= evicted.bytes
+                self._counters["evictions"] += 1
+            self._entries[entry.company] = entry
+            self._used += entry.bytes
+
+    def evict(self, company: str) -> bool:
+        """
+        Drops a tenant (e.g. after its index was rebuilt); True if it was loaded.
+        """
+        with self._lock:
+            entry = self._entries.pop(normalize_company(company) or "", None)
+            if entry is None:
+                return False
+            self._used -= entry.bytes
+            return True
+
+    def prewarm(self, companies: List[str]) -> List[str]:
+        """
+        Loads the given companies (busiest first) as long as each fits in
+        the remaining budget, so pre-warming never evicts a busier tenant;
+        returns the ones loaded.
+        """
+        loaded = []
+        for company in companies:
+            company = normalize_company(company)
+            if company is None or not has_tenant_index(company):
+                continue
+            with self._lock:
+                resident = company in self._entries
+                room = self.budget_bytes - self._used
+            if not resident and index_bytes(tenant_index_path(company), self.mode) > room:
+                continue
+            if self.get(company) is not None:
+                loaded.append(company)
+        return loaded
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            load_ms = sorted(self._load_ms)
+            return {
+                "mode": self.mode,
+                "budget_mb": round(self.budget_bytes / 1e6, 1),
+                "resident_mb": round(self._used / 1e6, 1),
+                "tenants": [
+                    {"company": c, "mb": round(e.bytes / 1e6, 2)}
+                    for c, e in reversed(self._entries.items())  # most recently used first
+                ],
+                "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else None,
+                "load_ms": {
+                    "p50": round(load_ms[len(load_ms) // 2], 1) if load_ms else 0.0,
+                    "max": round(load_ms[-1], 1) if load_ms else 0.0,
+                },
+                **self._counters,
+            }
+
+
+_cache: Optional[TenantIndexCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tenant_cache() -> TenantIndexCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from backend.rag.query_rag import RAG_MODE
+
+                _cache = TenantIndexCache(int(RAG_TENANT_CACHE_MB * 1e6), RAG_MODE)
+    return _cache
+
+
+def busiest_companies(limit: int = RAG_PREWARM_TOP, days: float = RAG_PREWARM_DAYS) -> List[str]:
+    """
+    Companies with the most stored calls over the last `days`.
+    """
+    if limit <= 0:
+        return []
+    from backend.store.call_store import get_call_store
+
+    try:
+        rows = get_call_store().busiest_companies(limit, since=time.time() - days * 86400)
+    except Exception as e:
+        print("⚠️ Could not read call volumes for RAG prewarm:", e)
+        return []
+    return [company for company, _ in rows]
+
+
+def prewarm() -> List[str]:
+    """
+    Loads RAG_PREWARM_COMPANIES, then the busiest companies, within the budget.
+    """
+    companies = []
+    for company in RAG_PREWARM_COMPANIES + busiest_companies():
+        name = normalize_company(company)
+        if name and name not in companies:
+            companies.append(name)
+    return get_tenant_cache().prewarm(companies)
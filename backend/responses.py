@@ -0,0 +1,202 @@
+# backend/responses.py
+"""
+Response shaping for the call endpoints (/upload-audio/, /uploads/complete,
+/calls/{call_id}).
+
+Without query parameters the body is unchanged. With ?include= (even empty)
+the lean view is returned:
+- no transcript and no debug fields (signals_detected, segment stats, rag query)
+- RAG snippets are returned once, in a top-level "snippets" table; every
+  place that used a snippet holds its index into that table instead
+?include=transcript,debug,snippets adds those parts back ("snippets" keeps
+the text inline); ?include=all is the full body.
+
+?fields=call_id,dashboard.sentiment,dashboard.rep_performance.score keeps only
+the listed dotted paths (applied after include). Snippets are deduped after
+the selection, so the table holds only the snippets the selected fields
+reference, and is left out when they reference none.
+
+Bodies are serialized with orjson when installed and compressed with brotli
+or gzip per Accept-Encoding.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from typing import Iterable, List, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is ~5x slower on big reports
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").lower() == "true"
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+
+INCLUDE_PARTS = ("transcript", "debug", "snippets")
+
+# Relative to the report ("dashboard" in upload responses, "report" in GET /calls/{id})
+_DEBUG_PATHS = (
+    ("rep_performance", "signals_detected"),
+    ("objection_analysis", "segment_guidance", "stats"),
+    ("rag", "query"),
+)
+_SNIPPET_LISTS = (
+    ("objection_analysis", "rag_context_used"),
+    ("rag", "top_snippets"),
+)
+
+
+def _parse_list(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def _copy_path(body: dict, path: Iterable[str]) -> Optional[dict]:
+    """
+    Shallow-copies the dicts along path (all but the last key) so the leaf can
+    be changed without touching the caller's object; returns the leaf's parent.
+    """
+    node = body
+    for key in path:
+        child = node.get(key)
+        if not isinstance(child, dict):
+            return None
+        node[key] = child = dict(child)
+        node = child
+    return node
+
+
+def _drop(body: dict, path: tuple) -> None:
+    parent = _copy_path(body, path[:-1])
+    if parent is not None:
+        parent.pop(path[-1], None)
+
+
+def dedupe_snippets(body: dict, report_key: str) -> dict:
+    """
+    Moves every RAG snippet string into body["snippets"] and replaces it with
+    its index there.
+    """
+    table: List[str] = []
+    ids = {}
+
+    def ref(snippet):
+        if not isinstance(snippet, str):
+            return snippet
+        if snippet not in ids:
+            ids[snippet] = len(table)
+            table.append(snippet)
+        return ids[snippet]
+
+    for path in _SNIPPET_LISTS:
+        parent = _copy_path(body, (report_key, *path[:-1]))
+        if parent is not None and isinstance(parent.get(path[-1]), list):
+            parent[path[-1]] = [ref(s) for s in parent[path[-1]]]
+
+    parent = _copy_path(body, (report_key, "objection_analysis", "segment_guidance"))
+    if parent is not None and isinstance(parent.get("segments"), list):
+        parent["segments"] = [
+            {**seg, "playbook": [ref(s) for s in seg.get("playbook") or []]}
+            if isinstance(seg, dict) else seg
+            for seg in parent["segments"]
+        ]
+
+    body["snippets"] = table
+    return body
+
+
+def select_fields(body: dict, fields: List[str]) -> dict:
+    out: dict = {}
+    for field in fields:
+        keys = field.split(".")
+        src, dst = body, out
+        for i, key in enumerate(keys):
+            if not isinstance(src, dict) or key not in src:
+                break
+            if i == len(keys) - 1:
+                dst[key] = src[key]
+            else:
+                src = src[key]
+                dst = dst.setdefault(key, {})
+    return out
+
+
+def shape_call_body(
+    body: dict,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    report_key: str = "dashboard",
+) -> dict:
+    """
+    Applies ?include= / ?fields= to a call response body. Never mutates `body`
+    (it may be the stored report).
+    """
+    if include is None and fields is None:
+        return body
+
+    parts = set(_parse_list(include)) if include is not None else {"all"}
+    if "all" in parts:
+        parts = set(INCLUDE_PARTS)
+    unknown = parts - set(INCLUDE_PARTS)
+    if unknown:
+        raise ValueError(f"Unknown include: {', '.join(sorted(unknown))}. Allowed: {', '.join(INCLUDE_PARTS)}, all")
+
+    shaped = dict(body)
+    if "transcript" not in parts:
+        shaped.pop("transcript", None)
+    if "debug" not in parts:
+        for path in _DEBUG_PATHS:
+            _drop(shaped, (report_key, *path))
+
+    field_list = _parse_list(fields)
+    if field_list:
+        shaped = select_fields(shaped, field_list)
+    if "snippets" not in parts:
+        shaped = dedupe_snippets(shaped, report_key)
+        if field_list and not shaped["snippets"]:
+            shaped.pop("snippets")
+    return shaped
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _accepts(request: Optional[Request], encoding: str) -> bool:
+    if request is None:
+        return False
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() == encoding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def json_response(content, request: Optional[Request] = None, status_code: int = 200) -> Response:
+    """
+    JSON response serialized with dumps() and compressed when the client
+    accepts it (brotli preferred, then gzip) and the body is large enough.
+    """
+    body = dumps(content)
+    headers = {"Vary": "Accept-Encoding"}
+    if RESPONSE_COMPRESSION and len(body) >= COMPRESS_MIN_BYTES:
+        if brotli is not None and _accepts(request, "br"):
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+            headers["Content-Encoding"] = "br"
+        elif _accepts(request, "gzip"):
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            headers["Content-Encoding"] = "gzip"
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
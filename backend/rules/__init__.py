@@ -0,0 +1 @@
+# backend/rules/__init__.py
@@ -0,0 +1,280 @@
+# backend/rules/ruleset.py
+"""
+Coaching ruleset: phrase lists and scoring weights used by the agents.
+
+- default_ruleset.json holds every phrase set and weight table
+- companies/<company>.json may override it:
+    {"version": "3",
+     "phrases":     {"coach.value": [...]},      # replaces a set
+     "phrases_add": {"objection.competitor": [...]},  # appends to a set
+     "weights":     {"coach": {"base": 6.5}}}    # merged per table
+- files are compiled once into a Ruleset (deduplicated phrase table + index
+  arrays per set) and re-read when their mtime changes, at most every
+  RULESET_RELOAD_SECONDS; a reload swaps the whole object, so a caller that
+  holds a Ruleset sees one consistent version
+- Ruleset.version ("<declared>[+<company>-<override>]#<content hash>") is
+  stamped into reports so caches can key on it
+- a (merged) ruleset must define every phrase set and weight the agents read
+  (REQUIRED_PHRASE_SETS / REQUIRED_WEIGHTS); one that doesn't is rejected
+  with RulesetError and, on a reload, the previous version stays active
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RULESET_PATH = os.getenv("RULESET_PATH", os.path.join(BASE_DIR, "default_ruleset.json"))
+RULESET_COMPANY_DIR = os.getenv("RULESET_COMPANY_DIR", os.path.join(BASE_DIR, "companies"))
+RULESET_RELOAD_SECONDS = float(os.getenv("RULESET_RELOAD_SECONDS", "2"))
+
+# Scans kept per ruleset, so the agents analysing one call share a single scan
+SCAN_CACHE_SIZE = 8
+
+_COMPANY_RE = re.compile(r"^[a-z0-9_-]+$")
+
+# What the agents, rag/segment_retrieval.py and scoring/batch.py look up; a ruleset missing any of it is invalid
+REQUIRED_PHRASE_SETS = (
+    "sentiment.negative", "sentiment.positive", "sentiment.neutral",
+    "analyzer.negative", "analyzer.positive", "analyzer.budget", "analyzer.timeline",
+    "analyzer.follow_up", "analyzer.empathy",
+    "coach.next_step", "coach.value", "coach.pricing", "coach.timeline", "coach.empathy",
+    "objection.hard_rejection", "objection.anger", "objection.budget", "objection.timeline",
+    "objection.current_solution", "objection.competitor", "objection.positive",
+    "segment.negative", "segment.objection", "segment.pricing",
+)
+_THRESHOLDS = ("negative_phrase", "positive_phrase", "negative_threshold", "positive_threshold")
+REQUIRED_WEIGHTS = {
+    "sentiment": _THRESHOLDS,
+    "analyzer": _THRESHOLDS,
+    "coach": (
+        "base", "missing_value_prop", "missing_next_steps", "few_questions", "min_questions",
+        "empathy", "negative_cap", "min_score", "max_score",
+    ),
+}
+
+
+class RulesetError(ValueError):
+    pass
+
+
+def validate_ruleset(data: dict) -> None:
+    """
+    RulesetError naming every missing or malformed phrase set / weight.
+    """
+    problems = []
+    phrases = data.get("phrases")
+    weights = data.get("weights")
+    if not isinstance(phrases, dict):
+        problems.append("phrases must be an object")
+        phrases = {}
+    if not isinstance(weights, dict):
+        problems.append("weights must be an object")
+        weights = {}
+
+    for name in REQUIRED_PHRASE_SETS:
+        values = phrases.get(name)
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            problems.append(f"phrases.{name} must be a list of strings")
+    for table, keys in REQUIRED_WEIGHTS.items():
+        values = weights.get(table)
+        if not isinstance(values, dict):
+            problems.append(f"weights.{table} is missing")
+            continue
+        for key in keys:
+            value = values.get(key)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                problems.append(f"weights.{table}.{key} must be a number")
+    if problems:
+        raise RulesetError("; ".join(problems))
+
+
+class PhraseHits:
+    """
+    Which phrases of the ruleset occur in one transcript (substring semantics,
+    same as `phrase in transcript.lower()`).
+    """
+
+    __slots__ = ("_ruleset", "present")
+
+    def __init__(self, ruleset: "Ruleset", present: np.ndarray):
+        self._ruleset = ruleset
+        self.present = present
+
+    def any(self, set_name: str) -> bool:
+        return bool(self.present[self._ruleset.sets[set_name]].any())
+
+    def count(self, set_name: str) -> int:
+        return int(self.present[self._ruleset.sets[set_name]].sum())
+
+    def hits(self, set_name: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Matching phrases of a set, in the set's declared order.
+        """
+        ids = self._ruleset.sets[set_name]
+        matched = ids[self.present[ids]]
+        if limit is not None:
+            matched = matched[:limit]
+        return [self._ruleset.phrases[i] for i in matched]
+
+
+class Ruleset:
+    """
+    Compiled ruleset. Every distinct phrase is checked once per transcript no
+    matter how many sets (or agents) use it.
+    """
+
+    def __init__(self, data: dict, version: str):
+        self.version = version
+        self.weights: Dict[str, dict] = data.get("weights") or {}
+
+        phrase_ids: Dict[str, int] = {}
+        self.sets: Dict[str, np.ndarray] = {}
+        for name, phrases in (data.get("phrases") or {}).items():
+            ids = [phrase_ids.setdefault(p.lower(), len(phrase_ids)) for p in phrases]
+            self.sets[name] = np.asarray(ids, dtype=np.int32)
+        self.phrases: Tuple[str, ...] = tuple(phrase_ids)
+
+        self._scans: "OrderedDict[str, PhraseHits]" = OrderedDict()
+        self._scan_lock = threading.Lock()
+
+    def scan(self, transcript: str) -> PhraseHits:
+        text = (transcript or "").lower()
+        with self._scan_lock:
+            cached = self._scans.get(text)
+            if cached is not None:
+                self._scans.move_to_end(text)
+                return cached
+
+        present = np.fromiter((p in text for p in self.phrases), dtype=bool, count=len(self.phrases))
+        result = PhraseHits(self, present)
+
+        with self._scan_lock:
+            self._scans[text] = result
+            while len(self._scans) > SCAN_CACHE_SIZE:
+                self._scans.popitem(last=False)
+        return result
+
+    def phrase_list(self, set_name: str) -> List[str]:
+        return [self.phrases[i] for i in self.sets[set_name]]
+
+
+def _read_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _company_path(company: Optional[str]) -> Optional[str]:
+    if not company:
+        return None
+    name = company.strip().lower()
+    if not _COMPANY_RE.match(name):
+        return None
+    return os.path.join(RULESET_COMPANY_DIR, f"{name}.json")
+
+
+def merge_override(base: dict, override: dict) -> dict:
+    merged = copy.deepcopy(base)
+    phrases = merged.setdefault("phrases", {})
+    for name, values in (override.get("phrases") or {}).items():
+        phrases[name] = list(values)
+    for name, values in (override.get("phrases_add") or {}).items():
+        phrases[name] = phrases.get(name, []) + [v for v in values if v not in phrases.get(name, [])]
+    weights = merged.setdefault("weights", {})
+    for table, values in (override.get("weights") or {}).items():
+        weights[table] = {**weights.get(table, {}), **values}
+    return merged
+
+
+def load_ruleset(path: str) -> Ruleset:
+    """
+    Compiles a standalone ruleset file (e.g. a candidate for an A/B rescoring
+    run); not cached or hot-reloaded.
+    """
+    data = _read_json(path)
+    validate_ruleset(data)
+    return Ruleset(data, f"{data.get('version', '0')}#{_content_hash(data)}")
+
+
+def _content_hash(data: dict) -> str:
+    return hashlib.sha256(
+        json.dumps({"phrases": data.get("phrases"), "weights": data.get("weights")}, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:8]
+
+
+def compile_ruleset(company: Optional[str] = None) -> Ruleset:
+    data = _read_json(RULESET_PATH)
+    version = str(data.get("version", "0"))
+
+    path = _company_path(company)
+    if path and os.path.exists(path):
+        override = _read_json(path)
+        try:
+            data = merge_override(data, override)
+        except (AttributeError, TypeError) as e:
+            raise RulesetError(f"{path}: malformed override ({e})") from None
+        version += f"+{company.strip().lower()}-{override.get('version', '0')}"
+
+    validate_ruleset(data)
+    return Ruleset(data, f"{version}#{_content_hash(data)}")
+
+
+def _signature(company: Optional[str]) -> tuple:
+    sig = []
+    for path in (RULESET_PATH, _company_path(company)):
+        if path and os.path.exists(path):
+            st = os.stat(path)
+            sig.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+_lock = threading.Lock()
+_rulesets: Dict[Optional[str], Tuple[Ruleset, tuple, float]] = {}
+
+
+def get_ruleset(company: Optional[str] = None) -> Ruleset:
+    """
+    Current compiled ruleset for `company` (None = default). Reloads when the
+    default or company file changed on disk; on a bad edit the previous
+    version stays active.
+    """
+    key = (company or "").strip().lower() or None
+    now = time.monotonic()
+
+    entry = _rulesets.get(key)
+    if entry is not None and now - entry[2] < RULESET_RELOAD_SECONDS:
+        return entry[0]
+
+    with _lock:
+        entry = _rulesets.get(key)
+        if entry is not None and now - entry[2] < RULESET_RELOAD_SECONDS:
+            return entry[0]
+
+        sig = _signature(key)
+        if entry is not None and entry[1] == sig:
+            _rulesets[key] = (entry[0], sig, now)
+            return entry[0]
+
+        try:
+            ruleset = compile_ruleset(key)
+        except (OSError, ValueError) as e:  # incl. JSON errors and RulesetError
+            if entry is None:
+                raise
+            print("⚠️ Ruleset reload failed, keeping", entry[0].version, "-", e)
+            _rulesets[key] = (entry[0], sig, now)
+            return entry[0]
+
+        if entry is not None:
+            print(f"✅ Ruleset reloaded: {entry[0].version} -> {ruleset.version}")
+        _rulesets[key] = (ruleset, sig, now)
+        return ruleset
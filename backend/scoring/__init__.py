@@ -0,0 +1 @@
+# backend/scoring/__init__.py
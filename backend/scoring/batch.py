@@ -0,0 +1,258 @@
+# backend/scoring/batch.py
+"""
+Batch scoring: the rule-based parts of the agents, for a whole corpus at once.
+
+The corpus is turned once into a sparse transcripts x phrases hit matrix H
+(bigram-anchored substring search over the joined, lowercased corpus as a
+numpy byte array; match offsets are mapped to transcripts with searchsorted). Every flag and
+phrase count is then a sparse matrix-vector product over H:
+
+    count(set)  = H @ multiplicity(set)      (what the agents' `for p in ...` sums)
+    any(set)    = count(set) > 0
+
+and scores are evaluated once per distinct combination of inputs.
+
+Results match sentiment_agent, transcript_analyzer_agent, sales_coach_agent
+and objection_expert_agent field for field (see benchmarks/bench_batch_scoring.py).
+
+Backfill / A/B rescoring from the command line:
+    python -m backend.scoring.batch transcripts/ [--ruleset candidate.json] [--compare baseline.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+from backend.rules.ruleset import Ruleset, get_ruleset, load_ruleset
+
+# Never part of a phrase, so no match can span two transcripts
+_SEPARATOR = b"\x00"
+
+
+def _phrase_anchors(phrases, freq: np.ndarray) -> list:
+    """
+    Per phrase: (bytes as uint8, offset of its rarest byte bigram, bigram code).
+    """
+    anchors = []
+    for phrase in phrases:
+        pb = np.frombuffer(phrase.encode("utf-8"), dtype=np.uint8)
+        if pb.size < 2:
+            anchors.append((pb, -1, -1))
+            continue
+        codes = (pb[:-1].astype(np.int64) << 8) | pb[1:]
+        offset = int(np.argmin(freq[codes]))
+        anchors.append((pb, offset, int(codes[offset])))
+    return anchors
+
+
+def hit_matrix(transcripts: List[str], ruleset: Ruleset) -> sp.csr_matrix:
+    """
+    Boolean CSR matrix: H[i, j] = ruleset.phrases[j] in transcripts[i].lower().
+
+    The lowercased corpus is joined into one UTF-8 buffer (substring matches
+    are the same on UTF-8 bytes as on characters). Every position is keyed by
+    its byte bigram; each phrase is anchored on its rarest bigram, so only
+    the positions of those anchor bigrams are sorted, and candidates are
+    verified byte by byte with array compares.
+    """
+    lowered = [(t or "").lower().encode("utf-8") for t in transcripts]
+    lengths = np.fromiter((len(t) + 1 for t in lowered), dtype=np.int64, count=len(lowered))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    corpus = np.frombuffer(_SEPARATOR.join(lowered), dtype=np.uint8)
+    n, m = len(transcripts), len(ruleset.phrases)
+
+    codes = (corpus[:-1].astype(np.uint16) << 8) | corpus[1:]
+    anchors = _phrase_anchors(ruleset.phrases, np.bincount(codes, minlength=1 << 16))
+
+    needed = np.zeros(1 << 16, dtype=bool)
+    needed[[code for _, _, code in anchors if code >= 0]] = True
+    positions = np.flatnonzero(needed[codes])
+    positions = positions[np.argsort(codes[positions], kind="stable")]
+    sorted_codes = codes[positions]
+
+    rows, cols = [], []
+    for j, (pb, offset, code) in enumerate(anchors):
+        if pb.size == 0:
+            continue
+        if offset < 0:
+            cand = np.flatnonzero(corpus == pb[0])
+        else:
+            lo = np.searchsorted(sorted_codes, code, side="left")
+            hi = np.searchsorted(sorted_codes, code, side="right")
+            cand = positions[lo:hi] - offset
+            cand = cand[(cand >= 0) & (cand + pb.size <= corpus.size)]
+            for k in range(pb.size):
+                if k == offset or k == offset + 1:
+                    continue
+                cand = cand[corpus[cand + k] == pb[k]]
+        if cand.size:
+            docs = np.unique(np.searchsorted(starts, cand, side="right") - 1)
+            rows.append(docs)
+            cols.append(np.full(docs.size, j, dtype=np.int32))
+
+    if not rows:
+        return sp.csr_matrix((n, m), dtype=bool)
+    data_rows = np.concatenate(rows)
+    data_cols = np.concatenate(cols)
+    return sp.csr_matrix(
+        (np.ones(data_rows.size, dtype=bool), (data_rows, data_cols)), shape=(n, m)
+    )
+
+
+def _multiplicity(ruleset: Ruleset, set_name: str) -> np.ndarray:
+    # A phrase listed twice in a set counts twice, as in the per-call loops
+    return np.bincount(ruleset.sets[set_name], minlength=len(ruleset.phrases)).astype(np.float64)
+
+
+class _Counter:
+    def __init__(self, H: sp.csr_matrix, ruleset: Ruleset):
+        self.H = H.astype(np.float64)
+        self.ruleset = ruleset
+
+    def count(self, set_name: str) -> np.ndarray:
+        return self.H @ _multiplicity(self.ruleset, set_name)
+
+    def any(self, set_name: str) -> np.ndarray:
+        return self.count(set_name) > 0
+
+
+def _accumulate(start: float, terms: List[tuple]) -> np.ndarray:
+    """
+    start + w added count times, for each (w, counts) in order, per transcript.
+    Done as repeated float addition like sentiment_agent's loop (w * count can
+    differ in the last bit for fractional weights), once per distinct row.
+    """
+    counts = np.stack([np.asarray(k, dtype=np.int64) for _, k in terms], axis=1)
+    uniq, inverse = np.unique(counts, axis=0, return_inverse=True)
+    values = []
+    for row in uniq:
+        score = start
+        for (w, _), k in zip(terms, row):
+            for _ in range(int(k)):
+                score += w
+        values.append(score)
+    return np.asarray(values, dtype=np.float64)[inverse.reshape(-1)]
+
+
+def _labels(score: np.ndarray, weights: dict) -> np.ndarray:
+    return np.where(
+        score <= weights["negative_threshold"], "Negative",
+        np.where(score >= weights["positive_threshold"], "Positive", "Neutral"),
+    )
+
+
+def _py_round(values: np.ndarray, ndigits: int) -> np.ndarray:
+    # np.round is not Python's correctly-rounded round(); scores take few
+    # distinct values, so round those with Python and scatter back
+    uniq, inverse = np.unique(values, return_inverse=True)
+    return np.array([round(float(v), ndigits) for v in uniq], dtype=np.float64)[inverse.reshape(-1)]
+
+
+def score_corpus(transcripts: List[str], ruleset: Optional[Ruleset] = None) -> Dict[str, np.ndarray]:
+    """
+    Column arrays (one entry per transcript) for the rule-based agent outputs:
+    sentiment_agent (sentiment_*), transcript analyzer (analyzer_*), sales
+    coach (coach_* + rep_performance_score, scored with the analyzer's
+    sentiment as upload_audio does) and objection expert (objection_*).
+    """
+    ruleset = ruleset or get_ruleset()
+    H = hit_matrix(transcripts, ruleset)
+    c = _Counter(H, ruleset)
+    n = len(transcripts)
+    questions = np.fromiter(((t or "").count("?") for t in transcripts), dtype=np.int64, count=n)
+
+    out: Dict[str, np.ndarray] = {"asked_questions_count": questions}
+
+    # sentiment_agent
+    w = ruleset.weights["sentiment"]
+    score = _accumulate(0.0, [
+        (w["negative_phrase"], c.count("sentiment.negative")),
+        (w["positive_phrase"], c.count("sentiment.positive")),
+    ])
+    out["sentiment_score"] = score
+    out["sentiment_label"] = _labels(score, w)
+
+    # transcript_analyzer_agent
+    w = ruleset.weights["analyzer"]
+    # weight * count, in the agent's order
+    score = np.zeros(n)
+    score += w["negative_phrase"] * c.count("analyzer.negative")
+    score += w["positive_phrase"] * c.count("analyzer.positive")
+    out["analyzer_score"] = score
+    out["analyzer_sentiment"] = _labels(score, w)
+    for name in ("budget", "timeline", "follow_up", "empathy"):
+        out[f"analyzer_{name}"] = c.any(f"analyzer.{name}")
+
+    # sales_coach_agent
+    w = ruleset.weights["coach"]
+    for name in ("next_step", "value", "pricing", "timeline", "empathy"):
+        out[f"coach_{name}"] = c.any(f"coach.{name}")
+    negative = out["analyzer_sentiment"] == "Negative"
+
+    score = np.full(n, float(w["base"]))
+    score += np.where(~out["coach_value"], w["missing_value_prop"], 0.0)
+    score += np.where(~out["coach_next_step"] & ~negative, w["missing_next_steps"], 0.0)
+    score += np.where(questions < w["min_questions"], w["few_questions"], 0.0)
+    score += np.where(out["coach_empathy"], w["empathy"], 0.0)
+    score = np.where(negative, np.minimum(score, w["negative_cap"]), score)
+    out["rep_performance_score"] = np.clip(_py_round(score, 1), w["min_score"], w["max_score"])
+
+    # objection_expert_agent
+    for name in ("hard_rejection", "anger", "budget", "timeline", "current_solution", "competitor", "positive"):
+        out[f"objection_{name}"] = c.any(f"objection.{name}")
+
+    return out
+
+
+def _read_corpus(path: str) -> Dict[str, str]:
+    """
+    A directory of .txt files, or a JSONL file of {"id", "transcript"}.
+    """
+    if os.path.isdir(path):
+        corpus = {}
+        for fn in sorted(os.listdir(path)):
+            if fn.endswith(".txt"):
+                with open(os.path.join(path, fn), "r", encoding="utf-8", errors="ignore") as f:
+                    corpus[fn] = f.read()
+        return corpus
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return {str(r.get("id", i)): r.get("transcript", "") for i, r in enumerate(rows)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus", help="directory of .txt transcripts or JSONL with id/transcript")
+    parser.add_argument("--ruleset", help="ruleset file to score with (default: active ruleset)")
+    parser.add_argument("--compare", help="second ruleset file; prints how scores move between the two")
+    args = parser.parse_args()
+
+    corpus = _read_corpus(args.corpus)
+    ids, texts = list(corpus), list(corpus.values())
+    ruleset = load_ruleset(args.ruleset) if args.ruleset else get_ruleset()
+    scores = score_corpus(texts, ruleset)
+
+    if not args.compare:
+        for i, call_id in enumerate(ids):
+            print(json.dumps({
+                "id": call_id,
+                "ruleset_version": ruleset.version,
+                **{k: v[i].item() for k, v in scores.items()},
+            }))
+    else:
+        other = load_ruleset(args.compare)
+        baseline = score_corpus(texts, other)
+        delta = scores["rep_performance_score"] - baseline["rep_performance_score"]
+        flipped = scores["analyzer_sentiment"] != baseline["analyzer_sentiment"]
+        print(f"{ruleset.version} vs {other.version} over {len(texts)} transcripts")
+        print(f"rep_performance_score: mean delta {delta.mean():+.3f}, changed {int((delta != 0).sum())}")
+        print(f"analyzer sentiment changed: {int(flipped.sum())}")
+        for name in sorted(k for k in scores if scores[k].dtype == bool):
+            moved = int((scores[name] != baseline[name]).sum())
+            if moved:
+                print(f"  {name}: {moved} changed")
@@ -0,0 +1,34 @@
+# backend/signing.py
+"""
+HMAC signatures for values the server hands out and later has to recognise
+as its own (cancellable request ids, presigned upload keys), so a client
+can't make them up or reuse someone else's by guessing.
+
+SIGNING_SECRET must be the same on every instance behind a load balancer.
+Unset, a random key is generated at import: fine for one instance (gunicorn
+preloads the app, so its workers share it), but signatures don't survive a
+restart.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import secrets
+
+SIGNING_SECRET = os.getenv("SIGNING_SECRET")
+
+_key = SIGNING_SECRET.encode() if SIGNING_SECRET else secrets.token_bytes(32)
+
+
+def sign(purpose: str, *values: str) -> str:
+    """
+    Signature of `values` for one `purpose` (a signature for one use isn't
+    valid for another).
+    """
+    message = "\x1f".join((purpose, *values)).encode()
+    return hmac.new(_key, message, hashlib.sha256).hexdigest()[:32]
+
+
+def verify(signature: str, purpose: str, *values: str) -> bool:
+    return bool(signature) and hmac.compare_digest(signature.encode(), sign(purpose, *values).encode())
@@ -0,0 +1,120 @@
+# backend/stage_graph.py
+"""
+A small dependency graph of pipeline stages.
+
+Each stage is a callable that is started on the executor as soon as every
+stage it comes `after` has finished, whatever their outcome, so one stage
+failing (e.g. a model that can't load) doesn't stall the ones after it;
+a stage that needs an earlier result reads it with result()/get().
+
+Used by pipeline.py to run the transcript-independent work of a call
+(RAG warm-up, tenant index load, the agents' fixed RAG queries) while the
+audio is uploaded and transcribed:
+
+    graph = StageGraph(executor)
+    graph.add("warm", preload)
+    graph.add("rag", prefetch_queries, after=("warm",))
+    ... transcribe on the calling thread ...
+    graph.get("rag", timeout=30)    # None if it failed / timed out
+"""
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from concurrent.futures import CancelledError, Executor, Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class StageGraph:
+    def __init__(self, executor: Executor):
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        self._timings: Dict[str, dict] = {}
+        self._cancelled = False
+        self._t0 = time.perf_counter()
+
+    def add(self, name: str, fn: Callable[[], Any], after: Iterable[str] = ()) -> Future:
+        """
+        Schedules fn() to start once the `after` stages (added earlier) are done.
+        """
+        deps = [self._futures[d] for d in after]
+        future: Future = Future()
+        # Stages run in the caller's context so a profiled request keeps its profile
+        ctx = contextvars.copy_context()
+        with self._lock:
+            if name in self._futures:
+                raise ValueError(f"Stage {name!r} already added")
+            self._futures[name] = future
+        remaining = [len(deps)]
+
+        def submit() -> None:
+            if self._cancelled:
+                future.cancel()
+                return
+            self._executor.submit(ctx.run, self._run, name, fn, future)
+
+        def dep_done(_: Future) -> None:
+            with self._lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                submit()
+
+        if not deps:
+            submit()
+        for d in deps:
+            d.add_done_callback(dep_done)
+        return future
+
+    def _run(self, name: str, fn: Callable[[], Any], future: Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        start = time.perf_counter()
+        try:
+            future.set_result(fn())
+            ok = True
+        except BaseException as e:
+            print(f"⚠️ Stage {name} failed: {e.__class__.__name__}: {e}")
+            future.set_exception(e)
+            ok = False
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self._timings[name] = {
+                    "start_ms": round((start - self._t0) * 1000, 1),
+                    "ms": round((end - start) * 1000, 1),
+                    "ok": ok,
+                }
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        The stage's return value; raises its exception (or TimeoutError).
+        """
+        return self._futures[name].result(timeout)
+
+    def get(self, name: str, timeout: Optional[float] = None, default: Any = None) -> Any:
+        """
+        Like result() but returns `default` if the stage failed, was
+        cancelled or didn't finish within `timeout`.
+        """
+        try:
+            return self._futures[name].result(timeout)
+        except (Exception, CancelledError, FutureTimeout):
+            return default
+
+    def cancel(self) -> None:
+        """
+        Stages that haven't started yet won't; running ones finish.
+        """
+        self._cancelled = True
+        for future in list(self._futures.values()):
+            future.cancel()
+
+    def timings(self) -> Dict[str, dict]:
+        """
+        {stage: {"start_ms" (since the graph was created), "ms", "ok"}}
+        """
+        with self._lock:
+            return {k: dict(v) for k, v in self._timings.items()}
@@ -0,0 +1 @@
+# backend/store/__init__.py
@@ -0,0 +1,250 @@
+# backend/store/agent_memo.py
+"""
+Memoized agent outputs, so re-analysing a call only re-runs the agents whose
+inputs changed.
+
+An agent's output is keyed on everything it depends on:
+- the transcript (sha256)
+- the agent's code version: a hash of its module source and of the
+  backend modules it depends on (query_rag, segment_retrieval, ruleset, ...,
+  found through its imports) plus final_report.py, which consumes the
+  outputs; editing objection_expert.py invalidates only the objection expert
+- the ruleset version (phrase lists + weights, incl. the company override)
+- the RAG version: retrieval mode + fingerprint of the shared and company
+  index files (query_rag.rag_version)
+- its other inputs (the sentiment handed over by the analyzer, the company)
+
+Entries live in a local SQLite file (AGENT_MEMO_PATH) shared by all workers,
+bounded to AGENT_MEMO_MAX_MB of stored JSON; the least recently used entries
+are evicted first. AGENT_MEMO_ENABLED=false turns it off. Outputs the
+caller marks as not cacheable (e.g. retrieval degraded by its time budget)
+are returned but not stored.
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import types
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+AGENT_MEMO_ENABLED = os.getenv("AGENT_MEMO_ENABLED", "true").lower() == "true"
+AGENT_MEMO_PATH = os.getenv("AGENT_MEMO_PATH", os.path.join("data", "agent_memo.db"))
+AGENT_MEMO_MAX_MB = float(os.getenv("AGENT_MEMO_MAX_MB", "256"))
+# Evict down to this fraction of the budget so eviction doesn't run on every write
+_EVICT_TO = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_memo (
+    key          TEXT PRIMARY KEY,
+    agent        TEXT NOT NULL,
+    version      TEXT NOT NULL,
+    value_json   TEXT NOT NULL,
+    bytes        INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_agent_memo_lru ON agent_memo(last_used_at);
+"""
+
+# Versioned with every agent: it shapes the report built from the cached outputs
+REPORT_MODULES = ("backend.agents.final_report",)
+
+_versions: Dict[str, str] = {}
+
+
+def _backend_dependencies(module: str) -> List[str]:
+    """
+    `module` and every backend.* module reachable through its globals
+    (imported modules, functions and classes), sorted.
+    """
+    seen = set()
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in sys.modules:
+            continue
+        seen.add(name)
+        for value in vars(sys.modules[name]).values():
+            dep = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, "__module__", None)
+            if isinstance(dep, str) and dep.startswith("backend.") and dep not in seen:
+                pending.append(dep)
+    return sorted(seen)
+
+
+def agent_version(fn: Callable) -> str:
+    """
+    Hash of the source of the module defining `fn`, its backend
+    dependencies and REPORT_MODULES (cached per process).
+    """
+    module = fn.__module__
+    version = _versions.get(module)
+    if version is None:
+        digest = hashlib.sha256()
+        for name in _backend_dependencies(module) + [m for m in REPORT_MODULES if m != module]:
+            try:
+                source = inspect.getsource(sys.modules[name])
+            except (OSError, TypeError, KeyError):
+                source = name
+            digest.update(name.encode("utf-8") + b"\0" + source.encode("utf-8"))
+        version = digest.hexdigest()[:16]
+        _versions[module] = version
+    return version
+
+
+def transcript_hash(transcript: str) -> str:
+    return hashlib.sha256((transcript or "").encode("utf-8")).hexdigest()
+
+
+class AgentMemo:
+    def __init__(self, path: str = AGENT_MEMO_PATH, max_bytes: int = int(AGENT_MEMO_MAX_MB * 1e6)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0, "not_cached": 0}
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[key] += n
+
+    @staticmethod
+    def key(agent: str, version: str, transcript_sha: str, **inputs) -> str:
+        payload = json.dumps([agent, version, transcript_sha, inputs], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._conn() as conn:
+            row = conn.execute("SELECT value_json FROM agent_memo WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE agent_memo SET last_used_at = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key: str, agent: str, version: str, value: Any) -> None:
+        value_json = json.dumps(value)
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO agent_memo VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, agent, version, value_json, len(value_json), now, now),
+            )
+            total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM agent_memo").fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                # Oldest entries whose removal brings the total under _EVICT_TO of the budget
+                excess = total - int(self.max_bytes * _EVICT_TO)
+                evicted = conn.execute(
+                    """
+                    DELETE FROM agent_memo WHERE key IN (
+                        SELECT key FROM (
+                            SELECT key, SUM(bytes) OVER (ORDER BY last_used_at, key) - bytes AS before
+                            FROM agent_memo
+                        ) WHERE before < ?
+                    )
+                    """,
+                    (excess,),
+                ).rowcount
+        self._count("writes")
+        if evicted:
+            self._count("evictions", evicted)
+
+    def call(
+        self,
+        agent: str,
+        fn: Callable,
+        transcript: str,
+        *args,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+        **inputs,
+    ) -> Tuple[Any, bool]:
+        """
+        fn(transcript, *args, **kwargs) memoized; returns (output, cached).
+        `inputs` are passed to fn and keyed on; a Ruleset is keyed by its
+        version and `rag_version` (keyed only) by the index fingerprint.
+        A fresh output is only stored if `cacheable(output)` is true.
+        """
+        kwargs = {k: v for k, v in inputs.items() if k != "rag_version"}
+        key_inputs = {
+            k: (v.version if hasattr(v, "version") else v) for k, v in inputs.items()
+        }
+        key_inputs["args"] = list(args)
+        version = agent_version(fn)
+        key = self.key(agent, version, transcript_hash(transcript), **key_inputs)
+
+        try:
+            cached = self.get(key)
+        except sqlite3.Error as e:
+            self._count("errors")
+            print("⚠️ Agent memo read failed:", e)
+            cached = None
+        if cached is not None:
+            self._count("hits")
+            return cached, True
+
+        self._count("misses")
+        value = fn(transcript, *args, **kwargs)
+        if cacheable is not None and not cacheable(value):
+            self._count("not_cached")
+            return value, False
+        try:
+            self.put(key, agent, version, value)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self._count("errors")
+            print("⚠️ Agent memo write failed:", e)
+        return value, False
+
+    def metrics(self) -> dict:
+        row = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM agent_memo").fetchone()
+        agents = self._conn().execute(
+            "SELECT agent, COUNT(DISTINCT version) FROM agent_memo GROUP BY agent ORDER BY agent"
+        ).fetchall()
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "enabled": AGENT_MEMO_ENABLED,
+            "entries": row[0],
+            "stored_mb": round(row[1] / 1e6, 2),
+            "max_mb": round(self.max_bytes / 1e6, 1),
+            "versions_per_agent": {a: n for a, n in agents},
+            "hit_rate": round(counters["hits"] / lookups, 3) if lookups else None,
+            **counters,
+        }
+
+
+_memo: Optional[AgentMemo] = None
+_memo_lock = threading.Lock()
+
+
+def get_agent_memo() -> Optional[AgentMemo]:
+    """
+    Process-wide memo; None when AGENT_MEMO_ENABLED=false.
+    """
+    global _memo
+    if not AGENT_MEMO_ENABLED:
+        return None
+    if _memo is None:
+        with _memo_lock:
+            if _memo is None:
+                _memo = AgentMemo()
+    return _memo
@@ -0,0 +1,145 @@
+# backend/store/call_store.py
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+# sqlite:///relative/path.db or sqlite:////absolute/path.db
+CALL_STORE_URL = os.getenv("CALL_STORE_URL", "sqlite:///data/calls.db")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class CallStore(ABC):
+    """
+    Persistence interface for analysed calls (call metadata, transcript, report).
+
+    Backends register themselves in STORE_BACKENDS under a URL scheme.
+    Listing is keyset-paginated on (created_at DESC, call_id DESC) so the cost
+    of fetching a page does not depend on how deep into the history it is.
+    """
+
+    @abstractmethod
+    def save_call(
+        self,
+        call_id: str,
+        report: dict,
+        transcript: str,
+        rep: Optional[str] = None,
+        company: Optional[str] = None,
+        team: Optional[str] = None,
+        filename: Optional[str] = None,
+        media_uri: Optional[str] = None,
+        created_at: Optional[float] = None,
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def get_call(self, call_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def list_calls(
+        self,
+        rep: Optional[str] = None,
+        company: Optional[str] = None,
+        team: Optional[str] = None,
+        sentiment: Optional[str] = None,
+        date_from: Optional[float] = None,
+        date_to: Optional[float] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def claim_upload(self, upload_key: str, call_id: str) -> Optional[str]:
+        """
+        Records that the uploaded object `upload_key` is analysed as
+        `call_id`. Returns None if this claim won, else the call_id of the
+        earlier one (finished or still running).
+        """
+
+    @abstractmethod
+    def release_upload(self, upload_key: str, call_id: str) -> None:
+        """
+        Drops a claim whose analysis failed or was cancelled, so the upload
+        can be completed again.
+        """
+
+    @abstractmethod
+    def get_rollup(self, scope: str, scope_id: str, week: str) -> dict:
+        """
+        Pre-aggregated weekly stats for one rep/team/company (see store/rollups.py).
+        """
+
+    @abstractmethod
+    def busiest_companies(self, limit: int, since: Optional[float] = None) -> List[Tuple[str, int]]:
+        """
+        (company, call count) for the companies with the most calls since
+        `since`, busiest first; used to pre-warm their RAG indexes.
+        """
+
+
+def encode_cursor(created_at: float, call_id: str) -> str:
+    raw = json.dumps([created_at, call_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, call_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return float(created_at), str(call_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def report_fields(report: dict) -> Dict[str, Any]:
+    """
+    Pulls the indexed columns out of a generate_final_report() dashboard.
+    """
+    report = report or {}
+    return {
+        "sentiment": report.get("sentiment"),
+        "score": (report.get("rep_performance") or {}).get("score"),
+        "report_version": report.get("report_version"),
+    }
+
+
+def _sqlite_store(url: str) -> CallStore:
+    from backend.store.sqlite_store import SQLiteCallStore
+
+    return SQLiteCallStore(url[len("sqlite:///"):])
+
+
+STORE_BACKENDS = {
+    "sqlite": _sqlite_store,
+}
+
+_store: Optional[CallStore] = None
+_store_lock = threading.Lock()
+
+
+def get_call_store() -> CallStore:
+    """
+    Process-wide store built from CALL_STORE_URL (lazily, on first use).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                scheme = CALL_STORE_URL.split(":", 1)[0]
+                factory = STORE_BACKENDS.get(scheme)
+                if factory is None:
+                    raise RuntimeError(f"Unsupported CALL_STORE_URL scheme: {scheme}")
+                _store = factory(CALL_STORE_URL)
+    return _store
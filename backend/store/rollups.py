@@ -0,0 +1,76 @@
+# backend/store/rollups.py
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+# Dimensions a call is rolled up under (scope name -> calls column)
+ROLLUP_SCOPES = ("rep", "team", "company")
+
+SENTIMENT_COLUMNS = {"Positive": "positive", "Neutral": "neutral", "Negative": "negative"}
+
+
+def iso_week(ts: float) -> str:
+    """
+    Bucket key for a timestamp, e.g. "2026-W42" (ISO week, UTC).
+    """
+    year, week, _ = datetime.fromtimestamp(ts, tz=timezone.utc).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def rollup_keys(call: dict) -> List[Tuple[str, str, str]]:
+    """
+    (scope, scope_id, week) buckets a stored call contributes to.
+    """
+    week = iso_week(call["created_at"])
+    return [(scope, call[scope], week) for scope in ROLLUP_SCOPES if call.get(scope)]
+
+
+def report_contribution(report: dict) -> Tuple[Dict[str, float], List[str]]:
+    """
+    Additive counters one report adds to each of its buckets, plus the
+    missed objections it should be counted under.
+    """
+    report = report or {}
+    rep_perf = report.get("rep_performance") or {}
+    score = rep_perf.get("score")
+    signals = rep_perf.get("signals_detected") or {}
+
+    counters = {
+        "calls": 1,
+        "score_sum": float(score) if score is not None else 0.0,
+        "score_count": 1 if score is not None else 0,
+        "positive": 0,
+        "neutral": 0,
+        "negative": 0,
+        "next_step_calls": 1 if signals.get("mentioned_next_steps") else 0,
+    }
+    column = SENTIMENT_COLUMNS.get(report.get("sentiment") or "")
+    if column:
+        counters[column] = 1
+
+    objections = (report.get("objection_analysis") or {}).get("missed_objections") or []
+    return counters, sorted(set(objections))
+
+
+def format_rollup(row: Optional[dict], objections: List[Tuple[str, int]]) -> dict:
+    """
+    Turns raw counters into the averages/rates shown on the manager dashboard.
+    """
+    if not row or not row.get("calls"):
+        return {"calls": 0}
+
+    calls = row["calls"]
+    return {
+        "scope": row["scope"],
+        "scope_id": row["scope_id"],
+        "week": row["week"],
+        "calls": calls,
+        "avg_score": round(row["score_sum"] / row["score_count"], 2) if row["score_count"] else None,
+        "sentiment_mix": {
+            label: round(row[column] / calls, 3) for label, column in SENTIMENT_COLUMNS.items()
+        },
+        "next_step_rate": round(row["next_step_calls"] / calls, 3),
+        "top_missed_objections": [{"objection": o, "count": c} for o, c in objections],
+    }
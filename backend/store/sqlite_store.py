@@ -0,0 +1,350 @@
+# backend/store/sqlite_store.py
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.store.call_store import (
+    CallStore,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    report_fields,
+)
+from backend.store.rollups import format_rollup, report_contribution, rollup_keys
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    call_id        TEXT PRIMARY KEY,
+    created_at     REAL NOT NULL,
+    rep            TEXT,
+    company        TEXT,
+    team           TEXT,
+    filename       TEXT,
+    media_uri      TEXT,
+    sentiment      TEXT,
+    score          REAL,
+    report_version TEXT
+);
+
+CREATE TABLE IF NOT EXISTS transcripts (
+    call_id TEXT PRIMARY KEY REFERENCES calls(call_id) ON DELETE CASCADE,
+    text    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS reports (
+    call_id     TEXT PRIMARY KEY REFERENCES calls(call_id) ON DELETE CASCADE,
+    report_json TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+);
+
+-- Every secondary index ends in (created_at, call_id) so an equality filter
+-- plus the keyset ORDER BY is served straight from the index.
+CREATE INDEX IF NOT EXISTS idx_calls_rep       ON calls(rep, created_at, call_id);
+CREATE INDEX IF NOT EXISTS idx_calls_company   ON calls(company, created_at, call_id);
+CREATE INDEX IF NOT EXISTS idx_calls_team      ON calls(team, created_at, call_id);
+CREATE INDEX IF NOT EXISTS idx_calls_sentiment ON calls(sentiment, created_at, call_id);
+-- A score range can't lead an index and still give created_at order (that
+-- needs a sort of every match), so score rides along in the created_at
+-- index instead: a min/max_score page walks it newest first, checks score
+-- in the index entry and stops at `limit` matches. Cost grows with how
+-- selective the range is, not with page depth.
+CREATE INDEX IF NOT EXISTS idx_calls_created_score ON calls(created_at, call_id, score);
+DROP INDEX IF EXISTS idx_calls_created;
+DROP INDEX IF EXISTS idx_calls_score;
+
+-- Materialized weekly rollups per rep/team/company, maintained on every save
+CREATE TABLE IF NOT EXISTS rollups (
+    scope           TEXT NOT NULL,
+    scope_id        TEXT NOT NULL,
+    week            TEXT NOT NULL,
+    calls           INTEGER NOT NULL DEFAULT 0,
+    score_sum       REAL NOT NULL DEFAULT 0,
+    score_count     INTEGER NOT NULL DEFAULT 0,
+    positive        INTEGER NOT NULL DEFAULT 0,
+    neutral         INTEGER NOT NULL DEFAULT 0,
+    negative        INTEGER NOT NULL DEFAULT 0,
+    next_step_calls INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, scope_id, week)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_objections (
+    scope     TEXT NOT NULL,
+    scope_id  TEXT NOT NULL,
+    week      TEXT NOT NULL,
+    objection TEXT NOT NULL,
+    count     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, scope_id, week, objection)
+) WITHOUT ROWID;
+
+-- Direct uploads being / already analysed, so a repeated /uploads/complete
+-- doesn't start a second analysis of the same object
+CREATE TABLE IF NOT EXISTS upload_claims (
+    upload_key TEXT PRIMARY KEY,
+    call_id    TEXT NOT NULL,
+    claimed_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+_ROLLUP_COUNTERS = (
+    "calls", "score_sum", "score_count", "positive", "neutral", "negative", "next_step_calls",
+)
+
+# Missed objections are drawn from a small fixed set of agent messages,
+# so the per-bucket objection table stays tiny; cap the response anyway.
+TOP_OBJECTIONS = 5
+
+_SUMMARY_COLUMNS = "call_id, created_at, rep, company, team, filename, sentiment, score, report_version"
+
+
+class SQLiteCallStore(CallStore):
+    """
+    Local SQLite backend. One connection per thread (FastAPI runs sync
+    endpoints in a threadpool), WAL so readers never block the writer.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def save_call(
+        self,
+        call_id: str,
+        report: dict,
+        transcript: str,
+        rep: Optional[str] = None,
+        company: Optional[str] = None,
+        team: Optional[str] = None,
+        filename: Optional[str] = None,
+        media_uri: Optional[str] = None,
+        created_at: Optional[float] = None,
+    ) -> None:
+        now = time.time()
+        fields = report_fields(report)
+
+        with self._conn() as conn:
+            # Take the write lock up front so the read-modify-write of rollups is atomic
+            conn.execute("BEGIN IMMEDIATE")
+            previous = conn.execute(
+                """
+                SELECT c.created_at, c.rep, c.team, c.company, r.report_json
+                FROM calls c LEFT JOIN reports r USING (call_id)
+                WHERE c.call_id = ?
+                """,
+                (call_id,),
+            ).fetchone()
+
+            # Re-analysis keeps the original created_at (and so its position in listings)
+            conn.execute(
+                """
+                INSERT INTO calls (call_id, created_at, rep, company, team, filename, media_uri,
+                                   sentiment, score, report_version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(call_id) DO UPDATE SET
+                    rep = COALESCE(excluded.rep, calls.rep),
+                    company = COALESCE(excluded.company, calls.company),
+                    team = COALESCE(excluded.team, calls.team),
+                    filename = COALESCE(excluded.filename, calls.filename),
+                    media_uri = COALESCE(excluded.media_uri, calls.media_uri),
+                    sentiment = excluded.sentiment,
+                    score = excluded.score,
+                    report_version = excluded.report_version
+                """,
+                (
+                    call_id, created_at or now, rep, company, team, filename, media_uri,
+                    fields["sentiment"], fields["score"], fields["report_version"],
+                ),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts (call_id, text) VALUES (?, ?)",
+                (call_id, transcript or ""),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO reports (call_id, report_json, updated_at) VALUES (?, ?, ?)",
+                (call_id, json.dumps(report), now),
+            )
+
+            # Rollups: back out the old report (re-analysis), then add the new one
+            if previous is not None and previous["report_json"]:
+                self._apply_rollup(conn, dict(previous), json.loads(previous["report_json"]), sign=-1)
+
+            current = conn.execute(
+                "SELECT created_at, rep, team, company FROM calls WHERE call_id = ?", (call_id,)
+            ).fetchone()
+            self._apply_rollup(conn, dict(current), report, sign=1)
+
+    def _apply_rollup(self, conn: sqlite3.Connection, call: dict, report: dict, sign: int) -> None:
+        counters, objections = report_contribution(report)
+        deltas = [sign * counters[c] for c in _ROLLUP_COUNTERS]
+
+        for scope, scope_id, week in rollup_keys(call):
+            conn.execute(
+                f"""
+                INSERT INTO rollups (scope, scope_id, week, {", ".join(_ROLLUP_COUNTERS)})
+                VALUES (?, ?, ?, {", ".join("?" * len(_ROLLUP_COUNTERS))})
+                ON CONFLICT(scope, scope_id, week) DO UPDATE SET
+                    {", ".join(f"{c} = {c} + excluded.{c}" for c in _ROLLUP_COUNTERS)}
+                """,
+                (scope, scope_id, week, *deltas),
+            )
+            for objection in objections:
+                conn.execute(
+                    """
+                    INSERT INTO rollup_objections (scope, scope_id, week, objection, count)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(scope, scope_id, week, objection) DO UPDATE SET
+                        count = count + excluded.count
+                    """,
+                    (scope, scope_id, week, objection, sign),
+                )
+
+            if sign < 0:
+                conn.execute(
+                    "DELETE FROM rollups WHERE scope = ? AND scope_id = ? AND week = ? AND calls <= 0",
+                    (scope, scope_id, week),
+                )
+                conn.execute(
+                    "DELETE FROM rollup_objections WHERE scope = ? AND scope_id = ? AND week = ? AND count <= 0",
+                    (scope, scope_id, week),
+                )
+
+    def get_rollup(self, scope: str, scope_id: str, week: str) -> dict:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT * FROM rollups WHERE scope = ? AND scope_id = ? AND week = ?",
+            (scope, scope_id, week),
+        ).fetchone()
+        objections = conn.execute(
+            """
+            SELECT objection, count FROM rollup_objections
+            WHERE scope = ? AND scope_id = ? AND week = ?
+            ORDER BY count DESC, objection LIMIT ?
+            """,
+            (scope, scope_id, week, TOP_OBJECTIONS),
+        ).fetchall()
+        return format_rollup(dict(row) if row else None, [(o["objection"], o["count"]) for o in objections])
+
+    def busiest_companies(self, limit: int, since: Optional[float] = None) -> List[Tuple[str, int]]:
+        rows = self._conn().execute(
+            """
+            SELECT company, COUNT(*) AS n FROM calls
+            WHERE company IS NOT NULL AND created_at >= ?
+            GROUP BY company ORDER BY n DESC, company LIMIT ?
+            """,
+            (since or 0.0, limit),
+        ).fetchall()
+        return [(r["company"], r["n"]) for r in rows]
+
+    def claim_upload(self, upload_key: str, call_id: str) -> Optional[str]:
+        with self._conn() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO upload_claims (upload_key, call_id, claimed_at) VALUES (?, ?, ?)",
+                (upload_key, call_id, time.time()),
+            )
+            if cur.rowcount:
+                return None
+            row = conn.execute("SELECT call_id FROM upload_claims WHERE upload_key = ?", (upload_key,)).fetchone()
+        return row["call_id"] if row else None
+
+    def release_upload(self, upload_key: str, call_id: str) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM upload_claims WHERE upload_key = ? AND call_id = ?", (upload_key, call_id))
+
+    def get_call(self, call_id: str) -> Optional[dict]:
+        row = self._conn().execute(
+            f"""
+            SELECT {_SUMMARY_COLUMNS}, media_uri, t.text AS transcript, r.report_json
+            FROM calls
+            LEFT JOIN transcripts t USING (call_id)
+            LEFT JOIN reports r USING (call_id)
+            WHERE call_id = ?
+            """,
+            (call_id,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        call = dict(row)
+        call["report"] = json.loads(call.pop("report_json")) if call.get("report_json") else None
+        return call
+
+    def list_calls(
+        self,
+        rep: Optional[str] = None,
+        company: Optional[str] = None,
+        team: Optional[str] = None,
+        sentiment: Optional[str] = None,
+        date_from: Optional[float] = None,
+        date_to: Optional[float] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+        where = []
+        params: list = []
+
+        for column, value in (("rep", rep), ("company", company), ("team", team), ("sentiment", sentiment)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+
+        if date_from is not None:
+            where.append("created_at >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            where.append("created_at < ?")
+            params.append(date_to)
+        if min_score is not None:
+            where.append("score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            where.append("score <= ?")
+            params.append(max_score)
+
+        if cursor:
+            after_created, after_id = decode_cursor(cursor)
+            where.append("(created_at, call_id) < (?, ?)")
+            params.extend([after_created, after_id])
+
+        sql = f"SELECT {_SUMMARY_COLUMNS} FROM calls"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, call_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = [dict(r) for r in self._conn().execute(sql, params).fetchall()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last["created_at"], last["call_id"])
+
+        return {"calls": rows, "next_cursor": next_cursor}
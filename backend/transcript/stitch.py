@@ -0,0 +1,140 @@
+# backend/transcript/stitch.py
+"""
+Stitches per-segment transcripts (backend/audio/split.py) back into one
+timeline, as if the call had been transcribed by a single job.
+
+- Word times are shifted by the segment's audio offset; each segment keeps
+  only the words that start in the range it owns, so the overlap isn't
+  transcribed twice.
+- Speaker labels are per job (spk_0 is whoever spoke first in that
+  segment). A segment's labels are mapped onto the global ones by voting
+  over the overlap: each word it heard there is matched, by start time, to
+  the previous segment's word, and each (local, global) pair counts one
+  vote. Pairs are assigned greedily by votes; a speaker with no votes
+  takes a global speaker not claimed in this segment (a two-person call
+  stays two people), or a new one.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from backend.transcript.timeline import UNKNOWN_SPEAKER, TimelineBuilder, TranscriptTimeline
+
+# Two transcriptions of the same word rarely start more than this apart
+MATCH_TOLERANCE_SECONDS = 0.5
+
+
+def _speaker_votes(
+    prev_start: np.ndarray,
+    prev_speaker: np.ndarray,
+    start: np.ndarray,
+    speaker: np.ndarray,
+) -> Dict[Tuple[int, int], int]:
+    votes: Dict[Tuple[int, int], int] = {}
+    if not len(prev_start) or not len(start):
+        return votes
+    # Nearest previous word by start time (prev_start is sorted)
+    if len(prev_start) == 1:
+        idx = np.zeros(len(start), dtype=np.int64)
+    else:
+        idx = np.clip(np.searchsorted(prev_start, start), 1, len(prev_start) - 1)
+        left_closer = np.abs(start - prev_start[idx - 1]) <= np.abs(prev_start[idx] - start)
+        idx = np.where(left_closer, idx - 1, idx)
+    close = np.abs(prev_start[idx] - start) <= MATCH_TOLERANCE_SECONDS
+    for local, glob in zip(speaker[close].tolist(), prev_speaker[idx[close]].tolist()):
+        if local == UNKNOWN_SPEAKER or glob == UNKNOWN_SPEAKER:
+            continue
+        votes[(local, glob)] = votes.get((local, glob), 0) + 1
+    return votes
+
+
+def map_speakers(
+    votes: Dict[Tuple[int, int], int],
+    local_order: Sequence[int],
+    n_global: int,
+) -> Dict[int, int]:
+    """
+    local speaker id -> global id. local_order lists the segment's speakers
+    by first appearance; ids past n_global are new speakers.
+    """
+    mapping: Dict[int, int] = {}
+    claimed = set()
+    for (local, glob), _ in sorted(votes.items(), key=lambda kv: (-kv[1], kv[0])):
+        if local in mapping or glob in claimed:
+            continue
+        mapping[local] = glob
+        claimed.add(glob)
+
+    free = [g for g in range(n_global) if g not in claimed]
+    next_id = n_global
+    for local in local_order:
+        if local in mapping:
+            continue
+        if free:
+            mapping[local] = free.pop(0)
+        else:
+            mapping[local] = next_id
+            next_id += 1
+    return mapping
+
+
+def _first_appearance(speaker: np.ndarray) -> List[int]:
+    known = speaker[speaker != UNKNOWN_SPEAKER]
+    ids, first = np.unique(known, return_index=True)
+    return ids[np.argsort(first)].tolist()
+
+
+def stitch_timelines(parts: Sequence[Tuple[object, TranscriptTimeline]]) -> TranscriptTimeline:
+    """
+    parts: (Segment, timeline of that segment's audio) in segment order.
+    Returns one timeline with times on the original recording and speaker
+    labels spk_0, spk_1, ... consistent across segments.
+    """
+    last = len(parts) - 1
+    owned = []  # (segment, timeline, word indices kept, absolute starts, global speakers)
+    n_global = 0
+
+    for k, (segment, tl) in enumerate(parts):
+        abs_start = tl.start.astype(np.float64) + segment.audio_start
+        keep = np.ones(len(tl), dtype=bool)
+        if k:
+            keep &= abs_start >= segment.start
+        if k < last:
+            keep &= abs_start < segment.end
+
+        speaker = tl.speaker.astype(np.int64)
+        if k == 0:
+            mapping = {s: i for i, s in enumerate(_first_appearance(speaker))}
+        else:
+            _, _, prev_idx, prev_abs, prev_global = owned[-1]
+            in_overlap = ~keep & (abs_start < segment.start)
+            prev_overlap = prev_abs >= segment.audio_start
+            votes = _speaker_votes(
+                prev_abs[prev_overlap], prev_global[prev_overlap], abs_start[in_overlap], speaker[in_overlap]
+            )
+            mapping = map_speakers(votes, _first_appearance(speaker[keep]), n_global)
+            if votes:
+                print(f"Segment {segment.index}: speakers {mapping} from {sum(votes.values())} overlap words")
+
+        global_speaker = np.array([mapping.get(s, UNKNOWN_SPEAKER) for s in speaker.tolist()], dtype=np.int64)
+        if mapping:
+            n_global = max(n_global, max(mapping.values()) + 1)
+        idx = np.flatnonzero(keep)
+        owned.append((segment, tl, idx, abs_start[idx], global_speaker[idx]))
+
+    builder = TimelineBuilder()
+    for g in range(n_global):
+        builder.speaker_id(f"spk_{g}")  # label i <-> speaker id i
+    for segment, tl, idx, abs_start, global_speaker in owned:
+        for i, start, g in zip(idx.tolist(), abs_start.tolist(), global_speaker.tolist()):
+            builder.add_item(
+                "pronunciation",
+                tl.word(i),
+                start_time=start,
+                end_time=float(tl.end[i]) + segment.audio_start,
+                confidence=float(tl.confidence[i]),
+                speaker_label=f"spk_{g}" if g != UNKNOWN_SPEAKER else None,
+            )
+    return builder.build()
@@ -0,0 +1,95 @@
+# backend/transcript/talk_metrics.py
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+from backend.transcript.timeline import TranscriptTimeline, UNKNOWN_SPEAKER
+
+
+# A new turn starting less than this many seconds after the other speaker's
+# last word (or before it ended) counts as an interruption. Ordinary turn
+# handoffs leave ~0.2 s of silence; 0.1 s keeps those out while catching
+# overlaps and turns latched straight onto the previous word.
+INTERRUPTION_GAP_SECONDS = float(os.getenv("INTERRUPTION_GAP_SECONDS", "0.1"))
+
+
+def _turns(tl: TranscriptTimeline):
+    """
+    Collapses consecutive words by the same speaker into turns.
+    Returns (turn_speaker, turn_start, turn_end) arrays.
+    """
+    known = tl.speaker != UNKNOWN_SPEAKER
+    speaker = tl.speaker[known]
+    start = tl.start[known]
+    end = tl.end[known]
+
+    if speaker.size == 0:
+        empty = np.empty(0, dtype=np.float32)
+        return np.empty(0, dtype=np.int8), empty, empty
+
+    boundaries = np.flatnonzero(speaker[1:] != speaker[:-1]) + 1
+    first = np.concatenate(([0], boundaries))
+    last = np.concatenate((boundaries - 1, [speaker.size - 1]))
+
+    return speaker[first], start[first], end[last]
+
+
+def conversation_metrics(
+    tl: TranscriptTimeline,
+    rep_speaker: int = 0,
+    interruption_gap: float = INTERRUPTION_GAP_SECONDS,
+) -> dict:
+    """
+    Talk-time dynamics computed from the word timeline with array ops only.
+
+    The rep is assumed to be `rep_speaker` (Transcribe's spk_0, i.e. whoever
+    opened the call); every other labeled speaker is treated as the customer.
+    A turn starting less than `interruption_gap` seconds (default
+    INTERRUPTION_GAP_SECONDS, 0.1) after the previous one ended counts as an
+    interruption and is left out of the response latencies.
+    """
+    if tl is None or not len(tl) or not np.any(tl.speaker != UNKNOWN_SPEAKER):
+        return {"speaker_labels_available": False}
+
+    known = tl.speaker != UNKNOWN_SPEAKER
+    is_rep_word = tl.speaker[known] == rep_speaker
+    word_secs = (tl.end[known] - tl.start[known]).astype(np.float64)
+
+    rep_talk = float(word_secs[is_rep_word].sum())
+    customer_talk = float(word_secs[~is_rep_word].sum())
+    total_talk = rep_talk + customer_talk
+
+    t_speaker, t_start, t_end = _turns(tl)
+    t_is_rep = t_speaker == rep_speaker
+    t_dur = (t_end - t_start).astype(np.float64)
+
+    # Gap between a turn and the one before it (negative = overlap)
+    gaps = (t_start[1:] - t_end[:-1]).astype(np.float64)
+    responder_is_rep = t_is_rep[1:]
+    interrupted = gaps < interruption_gap
+
+    rep_latency = np.clip(gaps[responder_is_rep & ~interrupted], 0, None)
+    customer_latency = np.clip(gaps[~responder_is_rep & ~interrupted], 0, None)
+
+    def _max(a):
+        return round(float(a.max()), 2) if a.size else 0.0
+
+    def _mean(a):
+        return round(float(a.mean()), 2) if a.size else None
+
+    return {
+        "speaker_labels_available": True,
+        "rep_talk_seconds": round(rep_talk, 1),
+        "customer_talk_seconds": round(customer_talk, 1),
+        "rep_talk_ratio": round(rep_talk / total_talk, 3) if total_talk else None,
+        "turn_count": int(t_speaker.size),
+        "longest_rep_monologue_seconds": _max(t_dur[t_is_rep]),
+        "longest_customer_monologue_seconds": _max(t_dur[~t_is_rep]),
+        "rep_interruptions": int(np.count_nonzero(interrupted & responder_is_rep)),
+        "customer_interruptions": int(np.count_nonzero(interrupted & ~responder_is_rep)),
+        "avg_rep_response_latency_seconds": _mean(rep_latency),
+        "avg_customer_response_latency_seconds": _mean(customer_latency),
+    }
@@ -0,0 +1,186 @@
+# backend/transcript/timeline.py
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# Speaker id used for items Transcribe did not attribute to anyone
+# (speaker labels disabled, or punctuation outside a segment).
+UNKNOWN_SPEAKER = -1
+
+
+@dataclass(frozen=True, slots=True)
+class TranscriptTimeline:
+    """
+    Word-level Transcribe output stored column-wise.
+
+    One row per pronunciation item (punctuation is folded into `text` only):
+    - start / end:    float32 seconds
+    - speaker:        int8 speaker id (index into `speaker_labels`, -1 = unknown)
+    - confidence:     float16 recognition confidence
+    - token_offsets:  int32, len = n_words + 1; word i (with any trailing
+                      punctuation) is text[token_offsets[i]:token_offsets[i+1]]
+
+    An hour-long call (~9k words) costs roughly 15 bytes/word in arrays
+    plus the text buffer itself, i.e. well under 1 MB.
+    """
+
+    text: str
+    start: np.ndarray
+    end: np.ndarray
+    speaker: np.ndarray
+    confidence: np.ndarray
+    token_offsets: np.ndarray
+    speaker_labels: tuple
+
+    def __len__(self) -> int:
+        return int(self.start.shape[0])
+
+    def word(self, i: int) -> str:
+        return self.text[self.token_offsets[i]:self.token_offsets[i + 1]].strip()
+
+    @property
+    def duration(self) -> float:
+        if not len(self):
+            return 0.0
+        return float(self.end[-1] - self.start[0])
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.start, self.end, self.speaker, self.confidence, self.token_offsets)
+        return sum(a.nbytes for a in arrays) + len(self.text.encode("utf-8"))
+
+
+class TimelineBuilder:
+    """
+    Accumulates Transcribe items one at a time into typed `array.array` buffers
+    (no per-word dicts), then freezes them into a TranscriptTimeline.
+
+    Speaker attribution comes either from a `speaker_label` on the item itself
+    (newer Transcribe output) or from `results.speaker_labels.segments`, which is
+    resolved in one vectorized pass at build() time.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._text_len = 0
+        self._start = array("f")
+        self._end = array("f")
+        self._speaker = array("b")
+        self._confidence = array("f")
+        self._offsets = array("i", [0])
+        self._labels: Dict[str, int] = {}
+
+        self._seg_start = array("f")
+        self._seg_end = array("f")
+        self._seg_speaker = array("b")
+
+    def speaker_id(self, label: Optional[str]) -> int:
+        if not label:
+            return UNKNOWN_SPEAKER
+        sid = self._labels.get(label)
+        if sid is None:
+            sid = len(self._labels)
+            self._labels[label] = sid
+        return sid
+
+    def _append_text(self, s: str) -> None:
+        self._parts.append(s)
+        self._text_len += len(s)
+
+    def add_item(
+        self,
+        item_type: str,
+        content: str,
+        start_time=None,
+        end_time=None,
+        confidence=None,
+        speaker_label: Optional[str] = None,
+    ) -> None:
+        content = content or ""
+
+        if item_type == "punctuation":
+            # Attach to the previous word so offsets keep pointing at words only
+            self._append_text(content)
+            self._offsets[-1] = self._text_len
+            return
+
+        if self._text_len:
+            self._append_text(" ")
+        word_start = self._text_len
+        self._append_text(content)
+
+        self._offsets[-1] = word_start
+        self._offsets.append(self._text_len)
+        self._start.append(float(start_time or 0.0))
+        self._end.append(float(end_time or start_time or 0.0))
+        self._confidence.append(float(confidence) if confidence not in (None, "") else 1.0)
+        self._speaker.append(self.speaker_id(speaker_label))
+
+    def add_speaker_segment(self, start_time, end_time, speaker_label: str) -> None:
+        self._seg_start.append(float(start_time))
+        self._seg_end.append(float(end_time))
+        self._seg_speaker.append(self.speaker_id(speaker_label))
+
+    def build(self) -> TranscriptTimeline:
+        start = np.frombuffer(self._start, dtype=np.float32).copy()
+        end = np.frombuffer(self._end, dtype=np.float32).copy()
+        speaker = np.frombuffer(self._speaker, dtype=np.int8).copy()
+        confidence = np.frombuffer(self._confidence, dtype=np.float32).astype(np.float16)
+        offsets = np.frombuffer(self._offsets, dtype=np.int32).copy()
+
+        if len(self._seg_start) and len(start):
+            # Compare in float32 so identical "start_time" strings map to identical values
+            seg_start = np.frombuffer(self._seg_start, dtype=np.float32)
+            seg_end = np.frombuffer(self._seg_end, dtype=np.float32)
+            seg_speaker = np.frombuffer(self._seg_speaker, dtype=np.int8)
+
+            order = np.argsort(seg_start, kind="stable")
+            seg_start, seg_end, seg_speaker = seg_start[order], seg_end[order], seg_speaker[order]
+
+            # Segment containing each word = last segment starting at or before it
+            idx = np.searchsorted(seg_start, start, side="right") - 1
+            valid = (idx >= 0) & (start <= seg_end[np.clip(idx, 0, None)])
+            unlabeled = (speaker == UNKNOWN_SPEAKER) & valid
+            speaker[unlabeled] = seg_speaker[idx[unlabeled]]
+
+        labels = tuple(sorted(self._labels, key=self._labels.get))
+
+        return TranscriptTimeline(
+            text="".join(self._parts),
+            start=start,
+            end=end,
+            speaker=speaker,
+            confidence=confidence,
+            token_offsets=offsets,
+            speaker_labels=labels,
+        )
+
+
+def timeline_from_transcribe_json(data: dict) -> TranscriptTimeline:
+    """
+    Builds a TranscriptTimeline from a parsed Transcribe output document.
+    """
+    results = (data or {}).get("results") or {}
+    builder = TimelineBuilder()
+
+    for seg in (results.get("speaker_labels") or {}).get("segments") or []:
+        builder.add_speaker_segment(seg.get("start_time", 0), seg.get("end_time", 0), seg.get("speaker_label"))
+
+    for item in results.get("items") or []:
+        alt = (item.get("alternatives") or [{}])[0]
+        builder.add_item(
+            item.get("type", "pronunciation"),
+            alt.get("content", ""),
+            start_time=item.get("start_time"),
+            end_time=item.get("end_time"),
+            confidence=alt.get("confidence"),
+            speaker_label=item.get("speaker_label"),
+        )
+
+    return builder.build()
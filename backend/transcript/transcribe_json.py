@@ -0,0 +1,97 @@
+# backend/transcript/transcribe_json.py
+
+from __future__ import annotations
+
+from typing import BinaryIO
+
+import ijson
+
+from backend.transcript.timeline import TimelineBuilder, TranscriptTimeline
+
+
+_ITEM = "results.items.item"
+_ALT = "results.items.item.alternatives.item"
+_SEGMENT = "results.speaker_labels.segments.item"
+_TRANSCRIPT = "results.transcripts.item.transcript"
+
+# Every ijson prefix we care about, resolved with a single dict lookup per event.
+# Anything else (e.g. the per-word copies nested under speaker segments) is skipped.
+_ITEM_FIELD, _ALT_FIELD, _SEGMENT_FIELD = 1, 2, 3
+
+_PREFIXES = {
+    _ITEM + ".type": (_ITEM_FIELD, "type"),
+    _ITEM + ".start_time": (_ITEM_FIELD, "start_time"),
+    _ITEM + ".end_time": (_ITEM_FIELD, "end_time"),
+    _ITEM + ".speaker_label": (_ITEM_FIELD, "speaker_label"),
+    _ALT + ".content": (_ALT_FIELD, "content"),
+    _ALT + ".confidence": (_ALT_FIELD, "confidence"),
+    _SEGMENT + ".start_time": (_SEGMENT_FIELD, "start_time"),
+    _SEGMENT + ".end_time": (_SEGMENT_FIELD, "end_time"),
+    _SEGMENT + ".speaker_label": (_SEGMENT_FIELD, "speaker_label"),
+}
+
+
+def parse_transcribe_stream(fp: BinaryIO) -> tuple[str, TranscriptTimeline]:
+    """
+    Incrementally parses a Transcribe output document from a binary stream.
+
+    Only the transcript text and one item at a time are ever held as Python
+    objects; words go straight into the columnar TimelineBuilder, so peak
+    memory does not grow with the size of the JSON document.
+    """
+    builder = TimelineBuilder()
+    text = None
+
+    item: dict = {}
+    alt_index = -1
+    segment: dict = {}
+
+    for prefix, event, value in ijson.parse(fp):
+        field = _PREFIXES.get(prefix)
+
+        if field is not None:
+            kind, key = field
+            if kind == _ITEM_FIELD:
+                item[key] = value
+            elif kind == _ALT_FIELD:
+                # Only the top alternative is kept
+                if alt_index == 0:
+                    item[key] = value
+            else:
+                segment[key] = value
+
+        elif prefix == _ITEM:
+            if event == "start_map":
+                item = {}
+                alt_index = -1
+            elif event == "end_map":
+                builder.add_item(
+                    item.get("type", "pronunciation"),
+                    item.get("content", ""),
+                    start_time=item.get("start_time"),
+                    end_time=item.get("end_time"),
+                    confidence=item.get("confidence"),
+                    speaker_label=item.get("speaker_label"),
+                )
+
+        elif prefix == _ALT:
+            if event == "start_map":
+                alt_index += 1
+
+        elif prefix == _SEGMENT:
+            if event == "start_map":
+                segment = {}
+            elif event == "end_map":
+                builder.add_speaker_segment(
+                    segment.get("start_time", 0),
+                    segment.get("end_time", 0),
+                    segment.get("speaker_label"),
+                )
+
+        elif prefix == _TRANSCRIPT and text is None:
+            text = value
+
+    if text is None:
+        raise ValueError("Transcribe output has no results.transcripts[0].transcript")
+
+    return text, builder.build()
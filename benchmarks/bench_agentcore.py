@@ -0,0 +1,95 @@
+# benchmarks/bench_agentcore.py
+"""
+AgentCore handler (backend/agentcore_app/agent.py): cold vs warm, one event
+per invocation vs batches.
+
+Each configuration runs in a fresh interpreter so the first invocation is a
+real cold start (module import + warm-up), then:
+- single: N invocations of one event each
+- batch:  N events as invocations of --batch events
+
+Reports init (import + warm-up) ms, the cold invocation, the average warm
+invocation and events/s over the warm phase.
+
+Usage:
+    python -m benchmarks.bench_agentcore [--events 64] [--batch 16] [--rag-mode lexical]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from backend.agentcore_app.agent import handler, stats
+import_ms = (time.perf_counter() - t0) * 1000
+events, batch = json.loads(sys.argv[1]), int(sys.argv[2])
+
+t = time.perf_counter()
+first = handler(events[0] if batch == 1 else {"events": events[:batch]})
+cold_ms = (time.perf_counter() - t) * 1000
+
+rest = events[1:] if batch == 1 else events[batch:]
+t = time.perf_counter()
+if batch == 1:
+    for e in rest:
+        handler(e)
+else:
+    for i in range(0, len(rest), batch):
+        handler({"events": rest[i:i + batch]})
+warm_s = time.perf_counter() - t
+print(json.dumps({"import_ms": import_ms, "cold_ms": cold_ms, "warm_s": warm_s, "warm_events": len(rest), **stats()}))
+"""
+
+
+def synthetic_events(n: int) -> list:
+    with open(os.path.join("backend", "sample_transcripts", "sample_call.txt"), "r", encoding="utf-8") as f:
+        base = f.read()
+    extras = [
+        "Honestly the price is too expensive for our budget.",
+        "We already use another vendor and I'm not sure we need this.",
+        "Sounds great, can we schedule a demo next week?",
+        "I'm not interested, please stop calling.",
+    ]
+    return [
+        {"call_id": f"bench-{i}", "transcript": {"text": base + "\n" + extras[i % len(extras)]}}
+        for i in range(n)
+    ]
+
+
+def run(events: list, batch: int, env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, json.dumps(events), str(batch)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--rag-mode", default="lexical")
+    args = parser.parse_args()
+
+    env = {**os.environ, "RAG_MODE": args.rag_mode, "USE_FAKE_RAG": os.getenv("USE_FAKE_RAG", "false")}
+    events = synthetic_events(args.events)
+
+    print(f"{args.events} events, RAG_MODE={args.rag_mode}, batch={args.batch}")
+    print(f"{'mode':<10} {'init ms':>9} {'cold ms':>9} {'warm ms/inv':>12} {'warm events/s':>14}")
+    for label, batch in (("single", 1), ("batch", args.batch)):
+        r = run(events, batch, env)
+        rate = r["warm_events"] / r["warm_s"] if r["warm_s"] else float("inf")
+        print(
+            f"{label:<10} {r['init_ms']:>9.1f} {r['cold_ms']:>9.1f} "
+            f"{(r['avg_warm_invocation_ms'] or 0):>12.1f} {rate:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/bench_audio_normalize.py
+"""
+Audio normalization (backend/audio/normalize.py) on the sample call and
+synthetic inputs shaped like real uploads:
+- stereo 44.1 kHz 16-bit WAV (1 and 10 minutes)
+- MP4 screen recording, 720p video + 128 kbit/s AAC (2 minutes)
+each with a few seconds of silence at both ends.
+
+Reports bytes in/out, audio seconds before/after trimming, normalization time
+and the upload-path latency at --mbps: before = upload(original), after =
+normalize + upload(normalized). Transcribe's own processing time scales with
+audio duration, so trimmed seconds are reported separately.
+
+Needs ffmpeg (FFMPEG_BINARY, PATH, or `pip install imageio-ffmpeg`).
+
+Usage:
+    python -m benchmarks.bench_audio_normalize [--mbps 20] [--format ogg|flac]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+SAMPLE_CALL = os.path.join("sample_data", "sample_call.mp3")
+
+# Two "speakers" with syllable-rate amplitude modulation over a noise floor
+_SPEECH = (
+    "aevalsrc=exprs='0.3*sin(2*PI*(180+40*sin(2*PI*0.3*t))*t)*(0.5+0.5*sin(2*PI*4*t))"
+    "+0.02*(random(0)-0.5)|0.3*sin(2*PI*(230+30*sin(2*PI*0.2*t))*t)*(0.5+0.5*sin(2*PI*3*t))"
+    "+0.02*(random(1)-0.5)':s=44100:d={d}"
+)
+
+
+def _run(ffmpeg: str, *args: str) -> None:
+    subprocess.run([ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y", *args], check=True)
+
+
+def _padded_speech(ffmpeg: str, seconds: int, pad: int) -> list:
+    return [
+        "-f", "lavfi", "-i", f"anullsrc=r=44100:cl=stereo:d={pad}",
+        "-f", "lavfi", "-i", _SPEECH.format(d=seconds),
+        "-filter_complex", "[1]aformat=channel_layouts=stereo[s];[0][s][0]concat=n=3:v=0:a=1[a]",
+    ]
+
+
+def synthetic_inputs(ffmpeg: str, tmp: str) -> list:
+    inputs = []
+    for minutes in (1, 10):
+        path = os.path.join(tmp, f"stereo_{minutes}min.wav")
+        _run(ffmpeg, *_padded_speech(ffmpeg, minutes * 60, 3), "-map", "[a]", "-c:a", "pcm_s16le", path)
+        inputs.append(path)
+
+    path = os.path.join(tmp, "screen_2min.mp4")
+    _run(
+        ffmpeg, *_padded_speech(ffmpeg, 120, 3),
+        "-f", "lavfi", "-i", "testsrc2=s=1280x720:r=15:d=126",
+        "-map", "2:v", "-map", "[a]",
+        "-c:v", "libx264", "-preset", "veryfast", "-b:v", "1M",
+        "-c:a", "aac", "-b:a", "128k", "-shortest", path,
+    )
+    inputs.append(path)
+    return inputs
+
+
+def duration(ffmpeg: str, path: str) -> float:
+    # ffmpeg -i prints "Duration: HH:MM:SS.ss" on stderr
+    proc = subprocess.run([ffmpeg, "-hide_banner", "-i", path], capture_output=True, text=True)
+    for line in proc.stderr.splitlines():
+        line = line.strip()
+        if line.startswith("Duration:"):
+            h, m, s = line.split(",")[0].split()[1].split(":")
+            return int(h) * 3600 + int(m) * 60 + float(s)
+    return 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mbps", type=float, default=20.0, help="uplink bandwidth to S3")
+    parser.add_argument("--format", choices=("ogg", "flac"), default=None)
+    args = parser.parse_args()
+    if args.format:
+        os.environ["AUDIO_NORMALIZE_FORMAT"] = args.format
+
+    from backend.audio.normalize import ffmpeg_path, normalize_audio
+
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        sys.exit("ffmpeg not found (set FFMPEG_BINARY or pip install imageio-ffmpeg)")
+
+    def upload_s(size: int) -> float:
+        return size * 8 / (args.mbps * 1e6)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = synthetic_inputs(ffmpeg, tmp)
+        if os.path.getsize(SAMPLE_CALL) > 0:
+            inputs.insert(0, SAMPLE_CALL)
+        else:
+            print(f"{SAMPLE_CALL} is empty, skipped")
+
+        for path in inputs:
+            result = normalize_audio(path, tmp)
+            if result is None:
+                print(f"{os.path.basename(path)}: normalization failed")
+                continue
+            before = upload_s(result["bytes_in"])
+            after = result["seconds"] + upload_s(result["bytes_out"])
+            rows.append({
+                "input": os.path.basename(path),
+                "bytes_in": result["bytes_in"],
+                "bytes_out": result["bytes_out"],
+                "saved_pct": round(100 * (1 - result["bytes_out"] / result["bytes_in"]), 1),
+                "audio_s_in": round(duration(ffmpeg, path), 2),
+                "audio_s_out": round(duration(ffmpeg, result["path"]), 2),
+                "normalize_s": result["seconds"],
+                "upload_path_s_before": round(before, 2),
+                "upload_path_s_after": round(after, 2),
+            })
+
+    print(f"{'input':<18}{'bytes in':>12}{'bytes out':>11}{'saved':>8}{'audio s':>16}"
+          f"{'norm s':>8}{'upload path s @' + str(args.mbps) + 'Mbps':>26}")
+    for r in rows:
+        print(
+            f"{r['input']:<18}{r['bytes_in']:>12}{r['bytes_out']:>11}{r['saved_pct']:>7}%"
+            f"{r['audio_s_in']:>8} -> {r['audio_s_out']:<6}{r['normalize_s']:>7}"
+            f"{r['upload_path_s_before']:>14} -> {r['upload_path_s_after']}"
+        )
+    print(json.dumps(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# benchmarks/bench_batch_scoring.py
+"""
+Batch scoring engine (backend/scoring/batch.py) vs the per-call agents.
+
+1) Parity: for every synthetic transcript, each batch column must equal what
+   the agents return (sentiment, analyzer signals, coach signals and score,
+   objection findings). Checked for the default ruleset and for a copy with
+   fractional weights. Exits non-zero on any mismatch.
+2) Throughput: transcripts/s for the agents one call at a time vs one
+   score_corpus() over the corpus. Expect roughly 13-14x, not orders of
+   magnitude: the substring search that dominates the agents still has to
+   run, only the per-call Python overhead goes away.
+
+Usage:
+    python -m benchmarks.bench_batch_scoring [--n 2000] [--batch-n 50000]
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("USE_FAKE_RAG", "true")
+
+from backend.rules.ruleset import RULESET_PATH, get_ruleset, load_ruleset  # noqa: E402
+
+
+def synthetic_corpus(n: int, seed: int = 7) -> list[str]:
+    ruleset = get_ruleset()
+    phrases = list(ruleset.phrases)
+    with open(os.path.join("backend", "sample_transcripts", "sample_call.txt"), "r", encoding="utf-8") as f:
+        lines = [l for l in f.read().splitlines() if l.strip()]
+    filler = ["hello", "we", "team", "İstanbul office", "ok", "thanks", "quarter", "?", "really?", "Great!"]
+
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        parts = rnd.sample(lines, rnd.randint(0, min(6, len(lines))))
+        parts += [rnd.choice(phrases).upper() if rnd.random() < 0.1 else rnd.choice(phrases) for _ in range(rnd.randint(0, 8))]
+        parts += [rnd.choice(filler) for _ in range(rnd.randint(0, 5))]
+        rnd.shuffle(parts)
+        corpus.append(" ".join(parts))
+    return corpus
+
+
+def _per_call(transcript: str, ruleset) -> dict:
+    from backend.agents.objection_expert import objection_expert_agent
+    from backend.agents.sales_coach import sales_coach_agent
+    from backend.agents.sentiment_agent import sentiment_agent
+    from backend.agents.transcript_analyzer import transcript_analyzer_agent
+
+    s = sentiment_agent(transcript, ruleset=ruleset)
+    a = transcript_analyzer_agent(transcript, ruleset=ruleset)
+    c = sales_coach_agent(transcript, a["sentiment"], ruleset=ruleset)
+    o = objection_expert_agent(transcript, a["sentiment"], ruleset=ruleset)
+    return {"sentiment": s, "analyzer": a, "coach": c, "objection": o}
+
+
+def _expected(r: dict) -> dict:
+    """
+    The batch columns as implied by one call's agent outputs.
+    """
+    sig = r["analyzer"]["signals_detected"]
+    coach = r["coach"]["signals_detected"]
+    o = r["objection"]
+    missed, buying, opps = " ".join(o["missed_objections"]), " ".join(o["buying_signals"]), " ".join(o["missed_opportunities"])
+    negative = r["analyzer"]["sentiment"] == "Negative"
+
+    expected = {
+        "sentiment_score": r["sentiment"]["sentiment_score"],
+        "sentiment_label": r["sentiment"]["sentiment_label"],
+        "analyzer_score": sig["sentiment_score"],
+        "analyzer_sentiment": r["analyzer"]["sentiment"],
+        "analyzer_budget": sig["mentions_budget"],
+        "analyzer_timeline": sig["mentions_timeline"],
+        "analyzer_follow_up": sig["mentions_follow_up"],
+        "analyzer_empathy": sig["shows_empathy"],
+        "asked_questions_count": sig["asked_questions_count"],
+        "coach_next_step": coach["mentioned_next_steps"],
+        "coach_value": coach["mentioned_value_prop"],
+        "coach_pricing": coach["mentioned_pricing"],
+        "coach_timeline": coach["mentioned_timeline"],
+        "coach_empathy": coach["showed_empathy"],
+        "rep_performance_score": r["coach"]["rep_performance_score"],
+    }
+    # The objection expert only surfaces the flags of the pathway it took
+    if negative:
+        expected["objection_hard_rejection"] = "clear rejection" in missed
+        expected["objection_anger"] = "frustration was present" in missed
+    else:
+        expected["objection_budget"] = "Budget/pricing topic was not discussed" not in missed
+        expected["objection_timeline"] = "Decision timeline was not clarified" not in missed
+        expected["objection_current_solution"] = "current solution/process" not in opps
+        expected["objection_competitor"] = "mentioned alternatives" in buying
+        expected["objection_positive"] = "positive language" in buying
+    return expected
+
+
+def check_parity(corpus: list[str], ruleset) -> int:
+    from backend.scoring.batch import score_corpus
+
+    batch = score_corpus(corpus, ruleset)
+    mismatches = 0
+    for i, transcript in enumerate(corpus):
+        for key, want in _expected(_per_call(transcript, ruleset)).items():
+            got = batch[key][i].item()
+            if got != want:
+                mismatches += 1
+                if mismatches <= 10:
+                    print(f"  mismatch #{i} {key}: batch={got!r} agents={want!r}")
+    return mismatches
+
+
+def _fractional_ruleset(tmp: str):
+    with open(RULESET_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data = copy.deepcopy(data)
+    data["version"] = "fractional"
+    for table in ("sentiment", "analyzer"):
+        data["weights"][table].update({"negative_phrase": -0.7, "positive_phrase": 0.3, "negative_threshold": -1.4, "positive_threshold": 0.9})
+    data["weights"]["coach"].update({"base": 6.65, "missing_value_prop": -0.35, "empathy": 0.45, "negative_cap": 5.05})
+    path = os.path.join(tmp, "fractional.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return load_ruleset(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=2000, help="transcripts for parity + per-call timing")
+    parser.add_argument("--batch-n", type=int, default=50000, help="transcripts for batch timing")
+    args = parser.parse_args()
+
+    from backend.scoring.batch import score_corpus
+
+    corpus = synthetic_corpus(args.n)
+    ruleset = get_ruleset()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for rs in (ruleset, _fractional_ruleset(tmp)):
+            bad = check_parity(corpus, rs)
+            print(f"parity [{rs.version}]: {args.n} transcripts, {bad} mismatches")
+            failed |= bad > 0
+
+    t = time.perf_counter()
+    for transcript in corpus:
+        _per_call(transcript, ruleset)
+    per_call_rate = len(corpus) / (time.perf_counter() - t)
+
+    big = synthetic_corpus(args.batch_n, seed=11)
+    t = time.perf_counter()
+    score_corpus(big, ruleset)
+    batch_rate = len(big) / (time.perf_counter() - t)
+
+    print(f"per-call agents: {per_call_rate:>10.0f} transcripts/s")
+    print(f"batch engine:    {batch_rate:>10.0f} transcripts/s  ({batch_rate / per_call_rate:.0f}x)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
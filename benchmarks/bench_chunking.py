@@ -0,0 +1,104 @@
+# benchmarks/bench_chunking.py
+"""
+Chunking strategies compared on rag_data/ + company_kb/:
+- chars:        RecursiveCharacterTextSplitter(500, 50), the previous build
+- tokens:       token-aware splitting (backend/rag/chunking.py)
+- tokens+dedup: token-aware splitting + SimHash near-duplicate removal
+
+Reports chunk count, flat FAISS size (chunks x dim x 4 bytes), BM25 size, and
+retrieval diversity of the top-5 for the benchmark queries: the share of
+results that are not near-duplicates of a higher-ranked result. Retrieval is BM25 so no embedding model is needed.
+
+--boilerplate N adds N synthetic company docs that share a pasted footer, the
+pattern that motivated the dedup step.
+
+Usage:
+    python -m benchmarks.bench_chunking [--boilerplate 20]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+
+from benchmarks.bench_embedders import QUERIES
+
+BOILERPLATE = (
+    "About us: Acme Cloud is a trusted partner for growing teams. Pricing is per seat with annual "
+    "discounts, security reviews are available on request, and every plan includes onboarding, "
+    "a named success manager, and 24/7 support. Contact sales to discuss budget, timelines and "
+    "procurement. This document is confidential and intended for internal sales enablement only."
+)
+
+
+def _documents(boilerplate: int):
+    from langchain_core.documents import Document
+    from backend.rag.build_index import load_documents
+
+    documents, _, _ = load_documents(company_filter=None)
+    tools = ["spreadsheets", "a legacy CRM", "email reminders", "a homegrown tool", "a competitor platform"]
+    for i in range(boilerplate):
+        note = " ".join(
+            f"Account {i}-{j} currently relies on {tools[(i + j) % len(tools)]} and wants a decision "
+            f"within {(i * 7 + j) % 12 + 1} weeks; champion asked about step {j} of the rollout."
+            for j in range(6)
+        )
+        documents.append(Document(
+            page_content=f"Playbook note {i}\n\n{note}\n\n{BOILERPLATE}",
+            metadata={"source": f"company_kb/acme/note_{i}.md", "kb_type": "company", "company": "acme"},
+        ))
+    return documents
+
+
+def _strategies(documents):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from backend.rag.chunking import dedup_chunks, split_documents
+
+    chars = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50).split_documents(documents)
+    tokens, source = split_documents(documents)
+    deduped, _ = dedup_chunks(tokens)
+    return {"chars": chars, "tokens": tokens, "tokens+dedup": deduped}, source
+
+
+def _diversity(index, queries, k: int = 5):
+    from backend.rag.chunking import NEAR_DUP_MAX_HAMMING, simhash
+
+    novel = []
+    for q in queries:
+        hits = [i for i, _ in index.search(q, k=k)]
+        if not hits:
+            continue
+        hashes = [simhash(index.texts[i]) for i in hits]
+        fresh = sum(
+            1 for n, h in enumerate(hashes)
+            if all((h ^ prev).bit_count() > NEAR_DUP_MAX_HAMMING for prev in hashes[:n])
+        )
+        novel.append(fresh / len(hits))
+    return statistics.mean(novel)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boilerplate", type=int, default=20)
+    args = parser.parse_args()
+
+    from backend.rag.embedders import EMBEDDING_DIM
+    from backend.rag.lexical import BM25Index, build_bm25_index
+
+    strategies, token_source = _strategies(_documents(args.boilerplate))
+    queries = QUERIES + ["pricing and discounts for annual plans", "security review and onboarding support"]
+
+    print(f"token counts: {token_source}; synthetic boilerplate docs: {args.boilerplate}")
+    print(f"{'strategy':<13} {'chunks':>7} {'FAISS KB':>9} {'BM25 KB':>8} {'novel top-5':>12}")
+    for name, chunks in strategies.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = build_bm25_index([(c.page_content, c.metadata) for c in chunks], tmp)
+            novel = _diversity(BM25Index(tmp), queries)
+        print(
+            f"{name:<13} {len(chunks):>7} {len(chunks) * EMBEDDING_DIM * 4 / 1024:>9.1f} "
+            f"{stats['bytes'] / 1024:>8.1f} {novel:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/bench_embed_batching.py
+"""
+Query embedding with and without micro-batching (backend/rag/embed_batcher.py)
+under concurrent load.
+
+--concurrency closed-loop client threads each embed distinct queries back to
+back (like that many calls retrieving at once). For every concurrency level
+the embedder runs unbatched, then batched with each --wait-ms; reported per
+run: latency p50/p95/p99, throughput, and the batcher's mean batch size and
+batch size histogram.
+
+--backend hf / onnx / onnx-int8 measures the real model (needs it on disk).
+--backend synthetic is a stand-in with the same cost shape as a CPU
+transformer forward pass - a fixed per-call overhead plus a per-row cost,
+one pass at a time since each already uses every core - for machines
+without the model.
+
+Usage:
+    python -m benchmarks.bench_embed_batching [--backend synthetic] [--concurrency 1 4 16 32]
+                                              [--wait-ms 1 3 8] [--requests 800]
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from backend.rag.embed_batcher import BatchingEmbeddings
+
+TOPICS = [
+    "customer says the price is too expensive",
+    "how do I confirm next steps before ending the call",
+    "what questions uncover the customer's pain points",
+    "customer wants to think about it and get back later",
+    "assumptive close vs trial close",
+]
+
+
+class SyntheticEmbeddings:
+    """
+    Forward pass cost = overhead_ms + per_row_ms * rows, spent in sleep (which,
+    like torch / onnxruntime kernels, releases the GIL). Passes are serialized:
+    the real model's intra-op threads already occupy all cores, so concurrent
+    passes queue for the CPU rather than running in parallel.
+    """
+
+    def __init__(self, overhead_ms: float, per_row_ms: float, dim: int = 384):
+        self.overhead = overhead_ms / 1000
+        self.per_row = per_row_ms / 1000
+        self.dim = dim
+        self._cpu = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._cpu:
+            time.sleep(self.overhead + self.per_row * len(texts))
+        out = []
+        for text in texts:
+            rng = np.random.default_rng(abs(hash(text)) % (2**32))
+            v = rng.standard_normal(self.dim).astype(np.float32)
+            out.append((v / np.linalg.norm(v)).tolist())
+        return out
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def run(embeddings, concurrency: int, requests: int) -> dict:
+    latencies = []
+    lock = threading.Lock()
+
+    def client(offset: int) -> None:
+        local = []
+        for i in range(offset, requests, concurrency):
+            t = time.perf_counter()
+            embeddings.embed_query(f"{TOPICS[i % len(TOPICS)]} #{i}")
+            local.append((time.perf_counter() - t) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(o,)) for o in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    lat = np.asarray(latencies)
+    return {
+        "p50": float(np.percentile(lat, 50)),
+        "p95": float(np.percentile(lat, 95)),
+        "p99": float(np.percentile(lat, 99)),
+        "qps": requests / wall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="synthetic", help="synthetic, hf, onnx or onnx-int8")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--wait-ms", type=float, nargs="+", default=[1, 3, 8])
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=800)
+    parser.add_argument("--overhead-ms", type=float, default=5.0, help="synthetic: fixed cost per forward pass")
+    parser.add_argument("--per-row-ms", type=float, default=0.8, help="synthetic: added cost per text")
+    args = parser.parse_args()
+
+    if args.backend == "synthetic":
+        inner = SyntheticEmbeddings(args.overhead_ms, args.per_row_ms)
+        desc = f"synthetic ({args.overhead_ms} ms/call + {args.per_row_ms} ms/row)"
+    else:
+        from backend.rag.embedders import get_embedder
+
+        inner = get_embedder(args.backend)
+        inner.embed_query("warm up")
+        desc = args.backend
+
+    print(f"backend: {desc}, {args.requests} queries per run, max batch {args.max_batch}")
+    print(f"{'clients':>7} {'mode':<11} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'qps':>8} {'mean batch':>11}  batch sizes")
+    for concurrency in args.concurrency:
+        r = run(inner, concurrency, args.requests)
+        print(f"{concurrency:>7} {'unbatched':<11} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f} {r['qps']:>8.1f} {1:>11.2f}  -")
+        for wait in args.wait_ms:
+            embeddings = BatchingEmbeddings(inner, max_batch=args.max_batch, max_wait_ms=wait)
+            try:
+                r = run(embeddings, concurrency, args.requests)
+                m = embeddings.batcher.metrics()
+            finally:
+                embeddings.batcher.close()
+            sizes = " ".join(f"{k}:{v}" for k, v in m["batch_sizes"].items())
+            print(
+                f"{concurrency:>7} {f'wait {wait:g}ms':<11} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f} "
+                f"{r['qps']:>8.1f} {m['mean_batch']:>11.2f}  {sizes}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/bench_embedders.py
+"""
+Embedding backends compared on the rag_data/ corpus:
+load time, single-query latency, batch throughput, RSS, and retrieval
+agreement (top-k overlap and vector cosine) against the PyTorch backend.
+
+Each backend is measured in its own subprocess so import cost and RSS are
+attributable to it alone.
+
+Usage:
+    python -m backend.rag.export_onnx          # once, for the onnx backends
+    python -m benchmarks.bench_embedders [--backends hf onnx onnx-int8] [--k 5]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+QUERIES = [
+    "sales discovery questions, closing techniques, tone and empathy, and follow-up strategies",
+    "common sales objections and effective objection handling techniques",
+    "handling negative or resistant sales conversations: de-escalation, empathy, and graceful exit",
+    "how to identify customer intent and sentiment in sales calls; tone and empathy best practices; follow-up strategies",
+    "customer says the price is too expensive",
+    "how do I confirm next steps before ending the call",
+    "what questions uncover the customer's pain points",
+    "customer wants to think about it and get back later",
+    "how to follow up after a demo",
+    "assumptive close vs trial close",
+]
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def load_corpus() -> list[str]:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from backend.rag.build_index import load_documents
+
+    documents, _, _ = load_documents(company_filter=None)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+    return [d.page_content for d in splitter.split_documents(documents)]
+
+
+def _worker(backend: str, out_path: str) -> None:
+    corpus = load_corpus()
+    rss_before = _rss_mb()
+
+    t0 = time.perf_counter()
+    from backend.rag.embedders import get_embedder
+
+    embedder = get_embedder(backend)
+    embedder.embed_query("warm up")
+    load_s = time.perf_counter() - t0
+
+    latencies = []
+    for _ in range(3):
+        for q in QUERIES:
+            t = time.perf_counter()
+            embedder.embed_query(q)
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    batch = (corpus * (256 // max(1, len(corpus)) + 1))[:256]
+    t = time.perf_counter()
+    embedder.embed_documents(batch)
+    throughput = len(batch) / (time.perf_counter() - t)
+
+    doc_vecs = np.asarray(embedder.embed_documents(corpus), dtype=np.float32)
+    query_vecs = np.asarray([embedder.embed_query(q) for q in QUERIES], dtype=np.float32)
+
+    np.savez(out_path, docs=doc_vecs, queries=query_vecs)
+    print(json.dumps({
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "query_p50_ms": round(statistics.median(latencies), 2),
+        "query_p95_ms": round(sorted(latencies)[int(0.95 * (len(latencies) - 1))], 2),
+        "docs_per_s": round(throughput, 1),
+        "rss_mb": round(_rss_mb(), 1),
+        "rss_model_mb": round(_rss_mb() - rss_before, 1),
+    }))
+
+
+def _topk(doc_vecs: np.ndarray, query_vecs: np.ndarray, k: int) -> np.ndarray:
+    # Vectors are L2-normalised, so inner product ranks like the L2 FAISS index
+    return np.argsort(-(query_vecs @ doc_vecs.T), axis=1)[:, :k]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["hf", "onnx", "onnx-int8"])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--worker")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.out)
+        return
+
+    results, vectors = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            out = os.path.join(tmp, f"{backend}.npz")
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_embedders", "--worker", backend, "--out", out],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"[{backend}] failed:\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+                continue
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            with np.load(out) as data:
+                vectors[backend] = (data["docs"], data["queries"])
+
+    reference = args.backends[0]
+    ref = vectors.get(reference)
+
+    print(
+        f"{'backend':<10} {'load s':>7} {'q p50 ms':>9} {'q p95 ms':>9} {'docs/s':>8} "
+        f"{'RSS MB':>7} {'model MB':>9} {'top-k agree':>12} {'cosine':>7}"
+    )
+    for r in results:
+        agree = cosine = float("nan")
+        if ref is not None and r["backend"] in vectors:
+            docs, queries = vectors[r["backend"]]
+            a, b = _topk(ref[0], ref[1], args.k), _topk(docs, queries, args.k)
+            agree = np.mean([len(set(x) & set(y)) / args.k for x, y in zip(a, b)])
+            cosine = float(np.mean(np.sum(ref[0] * docs, axis=1)))
+        print(
+            f"{r['backend']:<10} {r['load_s']:>7.2f} {r['query_p50_ms']:>9.2f} {r['query_p95_ms']:>9.2f} "
+            f"{r['docs_per_s']:>8.1f} {r['rss_mb']:>7.1f} {r['rss_model_mb']:>9.1f} {agree:>12.3f} {cosine:>7.4f}"
+        )
+    print(f"(agreement = mean overlap of top-{args.k} with `{reference}`; cosine = mean doc-vector cosine)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# benchmarks/bench_rag_eval.py
+"""
+Retrieval quality + speed of the RAG stack, per configuration.
+
+Labeled queries (benchmarks/rag_eval_queries.json: query -> the rag_data/
+files that answer it) are run against indexes built the way build_index.py
+builds them, for every combination of:
+- chunk size (embedder tokens; overlap scales with it as in chunking.py)
+- embedding backend (hf / onnx / onnx-int8, see embedders.py)
+- FAISS index type (flat = IndexFlatL2 as shipped, hnsw = IndexHNSWFlat)
+- retrieval mode (vector / lexical / hybrid, as in query_rag._search)
+
+Per configuration and k:
+- recall@k: share of a query's expected files found among the top-k chunks
+- MRR: 1 / rank of the first chunk from an expected file (0 if none in top max-k)
+- query latency p50 / p95 / p99 (ms, query embedding included)
+- build time (chunk + embed + index; model load excluded) and index size
+  (FAISS index.faiss + index.pkl, or the BM25 directory)
+
+Lexical rows depend only on the chunking, so they are built once per size.
+
+Usage:
+    python -m benchmarks.bench_rag_eval [--chunk-tokens 64 128 200] [--backends hf]
+        [--index-types flat hnsw] [--modes vector lexical hybrid] [--k 1 3 5]
+        [--rounds 3] [--out results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rag_eval_queries.json")
+
+# Same candidate depth as query_rag.HYBRID_CANDIDATES
+HYBRID_CANDIDATES = 20
+
+
+def load_queries(path: str = QUERIES_PATH) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dir_bytes(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for fn in filenames:
+            total += os.path.getsize(os.path.join(dirpath, fn))
+    return total
+
+
+def _chunks(chunk_tokens: int):
+    from backend.rag.build_index import load_documents
+    from backend.rag.chunking import CHUNK_DEDUP, dedup_chunks, split_documents, token_counter
+
+    # Generic rag_data/ only: that's what the labels cover
+    documents, _, _ = load_documents(company_filter="")
+    token_counter()  # tokenizer load isn't build time
+    t0 = time.perf_counter()
+    overlap = max(0, chunk_tokens // 8)
+    chunks, _ = split_documents(documents, chunk_tokens=chunk_tokens, overlap_tokens=overlap)
+    if CHUNK_DEDUP:
+        chunks, _ = dedup_chunks(chunks)
+    return chunks, time.perf_counter() - t0
+
+
+def _faiss_store(embedder, chunks, vectors: np.ndarray, index_type: str):
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    dim = vectors.shape[1]
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, 32)
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+    index.add(vectors)
+
+    ids = [str(i) for i in range(len(chunks))]
+    docstore = InMemoryDocstore(dict(zip(ids, chunks)))
+    return FAISS(embedder, index, docstore, dict(enumerate(ids)))
+
+
+def _rank_sources(mode: str, query: str, k: int, store, bm25) -> List[str]:
+    """
+    Sources of the top-k chunks, the way query_rag._search ranks them.
+    """
+    from backend.rag.lexical import reciprocal_rank_fusion
+
+    if mode == "lexical":
+        return [bm25.metadata[i]["source"] for i, _ in bm25.search(query, k=k)]
+    if mode == "vector":
+        return [d.metadata["source"] for d in store.similarity_search(query, k=k)]
+
+    vector_docs = store.similarity_search(query, k=HYBRID_CANDIDATES)
+    lexical_ids = [i for i, _ in bm25.search(query, k=HYBRID_CANDIDATES)]
+    # Fuse on chunk text (what query_rag fuses on), then map back to sources
+    source_of = {d.page_content: d.metadata["source"] for d in vector_docs}
+    source_of.update({bm25.texts[i]: bm25.metadata[i]["source"] for i in lexical_ids})
+    fused = reciprocal_rank_fusion([[d.page_content for d in vector_docs], [bm25.texts[i] for i in lexical_ids]])
+    return [source_of[t] for t in fused[:k]]
+
+
+def evaluate(mode: str, queries: List[dict], ks: List[int], rounds: int, store=None, bm25=None) -> dict:
+    max_k = max(ks)
+    latencies = []
+    recall = {k: [] for k in ks}
+    rr = []
+
+    for r in range(rounds):
+        for q in queries:
+            t = time.perf_counter()
+            sources = _rank_sources(mode, q["query"], max_k, store, bm25)
+            latencies.append((time.perf_counter() - t) * 1000)
+            if r:
+                continue
+            expected = set(q["expected"])
+            for k in ks:
+                recall[k].append(len(expected & set(sources[:k])) / len(expected))
+            rank = next((i + 1 for i, s in enumerate(sources) if s in expected), None)
+            rr.append(1.0 / rank if rank else 0.0)
+
+    lat = np.asarray(latencies)
+    return {
+        "recall": {k: round(float(np.mean(v)), 3) for k, v in recall.items()},
+        "mrr": round(float(np.mean(rr)), 3),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p95_ms": round(float(np.percentile(lat, 95)), 3),
+        "p99_ms": round(float(np.percentile(lat, 99)), 3),
+    }
+
+
+def run(args) -> List[dict]:
+    from backend.rag.embedders import get_embedder
+    from backend.rag.lexical import BM25Index, build_bm25_index
+
+    queries = load_queries(args.queries)
+    rows = []
+    embedders: Dict[str, object] = {}
+
+    for chunk_tokens in args.chunk_tokens:
+        chunks, chunk_s = _chunks(chunk_tokens)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            build_bm25_index([(c.page_content, c.metadata) for c in chunks], tmp)
+            bm25_s = time.perf_counter() - t0
+            bm25 = BM25Index(tmp)
+            bm25_bytes = _dir_bytes(tmp)
+
+            base = {"chunk_tokens": chunk_tokens, "chunks": len(chunks)}
+            if "lexical" in args.modes:
+                rows.append({
+                    **base, "mode": "lexical", "backend": "-", "index": "bm25",
+                    "build_s": round(chunk_s + bm25_s, 3), "index_kb": round(bm25_bytes / 1024, 1),
+                    **evaluate("lexical", queries, args.k, args.rounds, bm25=bm25),
+                })
+
+            vector_modes = [m for m in args.modes if m in ("vector", "hybrid")]
+            for backend in args.backends if vector_modes else []:
+                if backend not in embedders:
+                    t0 = time.perf_counter()
+                    try:
+                        embedders[backend] = get_embedder(backend)
+                        print(f"[{backend}] model loaded in {time.perf_counter() - t0:.1f}s")
+                    except Exception as e:
+                        print(f"[{backend}] skipped, model failed to load: {e.__class__.__name__}: {str(e).splitlines()[0]}")
+                        embedders[backend] = None
+                embedder = embedders[backend]
+                if embedder is None:
+                    continue
+
+                t0 = time.perf_counter()
+                vectors = np.asarray(embedder.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+                embed_s = time.perf_counter() - t0
+
+                for index_type in args.index_types:
+                    t0 = time.perf_counter()
+                    store = _faiss_store(embedder, chunks, vectors, index_type)
+                    index_s = time.perf_counter() - t0
+                    index_dir = os.path.join(tmp, f"{backend}-{index_type}")
+                    store.save_local(index_dir)
+                    faiss_bytes = _dir_bytes(index_dir)
+
+                    for mode in vector_modes:
+                        hybrid = mode == "hybrid"
+                        rows.append({
+                            **base, "mode": mode, "backend": backend, "index": index_type,
+                            "build_s": round(chunk_s + embed_s + index_s + (bm25_s if hybrid else 0), 3),
+                            "index_kb": round((faiss_bytes + (bm25_bytes if hybrid else 0)) / 1024, 1),
+                            **evaluate(mode, queries, args.k, args.rounds, store=store, bm25=bm25),
+                        })
+    return rows
+
+
+def print_table(rows: List[dict], ks: List[int]) -> None:
+    recall_cols = " ".join(f"{'R@' + str(k):>6}" for k in ks)
+    print(
+        f"{'chunk':>5} {'n':>4} {'mode':<8} {'backend':<9} {'index':<5} {recall_cols} {'MRR':>6} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'build s':>8} {'size KB':>8}"
+    )
+    for r in rows:
+        recalls = " ".join(f"{r['recall'][k]:>6.3f}" for k in ks)
+        print(
+            f"{r['chunk_tokens']:>5} {r['chunks']:>4} {r['mode']:<8} {r['backend']:<9} {r['index']:<5} {recalls} "
+            f"{r['mrr']:>6.3f} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} {r['p99_ms']:>8.3f} "
+            f"{r['build_s']:>8.3f} {r['index_kb']:>8.1f}"
+        )
+
+
+def main() -> None:
+    from backend.rag.chunking import CHUNK_TOKENS
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-tokens", type=int, nargs="+", default=sorted({64, CHUNK_TOKENS, 200}))
+    parser.add_argument("--backends", nargs="+", default=[os.getenv("EMBEDDING_BACKEND", "hf").lower()])
+    parser.add_argument("--index-types", nargs="+", default=["flat", "hnsw"])
+    parser.add_argument("--modes", nargs="+", default=["vector", "lexical", "hybrid"])
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--rounds", type=int, default=3, help="latency rounds over the query set")
+    parser.add_argument("--queries", default=QUERIES_PATH)
+    parser.add_argument("--out", help="also write the rows as JSON")
+    args = parser.parse_args()
+    args.k = sorted(set(args.k))
+
+    rows = run(args)
+    print(f"{len(load_queries(args.queries))} labeled queries, {args.rounds} latency rounds")
+    print_table(rows, args.k)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print("Wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
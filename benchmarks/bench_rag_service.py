@@ -0,0 +1,133 @@
+# benchmarks/bench_rag_service.py
+"""
+Retrieval in-process vs through the standalone retrieval service
+(backend/rag/service.py) over TCP and a Unix socket.
+
+Each mode runs in a fresh "API worker" interpreter that issues --queries
+RAG queries (distinct strings, so the result cache doesn't answer them)
+plus segment retrievals from --threads threads, like concurrent calls.
+Reported per mode: latency p50/p95, throughput, and the worker's own
+memory (RSS / unique MB) - the part that multiplies with the number of
+API workers. The service's memory is reported once.
+
+Usage:
+    python -m benchmarks.bench_rag_service [--rag-mode lexical] [--queries 400] [--threads 4]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+CHILD = r"""
+import json, sys, time, threading
+import numpy as np
+n, threads = int(sys.argv[1]), int(sys.argv[2])
+from backend.rag.query_rag import query_knowledge_base
+from backend.rag.segment_retrieval import retrieve_for_segments
+from backend.memory_report import memory_breakdown
+
+topics = ["pricing objection", "closing the call", "follow-up email", "discovery questions", "empathy and tone"]
+transcript = "This is too expensive for our budget. We already use another vendor. Can we talk next week?"
+query_knowledge_base("warm up")  # model / index / connection pool, not measured
+latencies = []
+lock = threading.Lock()
+
+def work(offset):
+    for i in range(offset, n, threads):
+        t = time.perf_counter()
+        if i % 5 == 4:
+            retrieve_for_segments(transcript + f" ({i})")
+        else:
+            query_knowledge_base(f"{topics[i % len(topics)]} {i}")
+        with lock:
+            latencies.append((time.perf_counter() - t) * 1000)
+
+start = time.perf_counter()
+ts = [threading.Thread(target=work, args=(o,)) for o in range(threads)]
+for t in ts: t.start()
+for t in ts: t.join()
+wall = time.perf_counter() - start
+lat = np.asarray(latencies)
+print(json.dumps({
+    "p50_ms": float(np.percentile(lat, 50)), "p95_ms": float(np.percentile(lat, 95)),
+    "qps": n / wall, "memory": memory_breakdown(),
+}))
+"""
+
+
+def _wait_healthy(url: str, timeout: float = 120.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=1) as r:
+                if r.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("retrieval service did not come up")
+
+
+def run_child(env: dict, args) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, str(args.queries), str(args.threads)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rag-mode", default="lexical")
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    base = {**os.environ, "RAG_MODE": args.rag_mode, "USE_FAKE_RAG": "false"}
+    base.pop("RAG_SERVICE_URL", None)
+    sock = os.path.join(tempfile.mkdtemp(prefix="rag-svc-"), "rag.sock")
+    tcp_url = f"http://127.0.0.1:{args.port}"
+
+    services = [
+        subprocess.Popen([sys.executable, "-m", "backend.rag.service", "--port", str(args.port)], env=base,
+                         stdout=subprocess.DEVNULL),
+        subprocess.Popen([sys.executable, "-m", "backend.rag.service", "--socket", sock], env=base,
+                         stdout=subprocess.DEVNULL),
+    ]
+    try:
+        _wait_healthy(tcp_url)
+        while not os.path.exists(sock):
+            time.sleep(0.2)
+
+        print(f"RAG_MODE={args.rag_mode}, {args.queries} retrievals from {args.threads} threads per worker")
+        print(f"{'mode':<11} {'p50 ms':>8} {'p95 ms':>8} {'qps':>8} {'worker RSS MB':>14} {'worker unique MB':>17}")
+        for label, url in (("in-process", None), ("tcp", tcp_url), ("unix", f"unix://{sock}")):
+            env = dict(base)
+            if url:
+                env["RAG_SERVICE_URL"] = url
+                env["RAG_SERVICE_FALLBACK"] = "false"  # measure the service, not the fallback
+            r = run_child(env, args)
+            m = r["memory"]
+            print(
+                f"{label:<11} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['qps']:>8.1f} "
+                f"{m.get('rss_mb', 0):>14.1f} {m.get('unique_mb', 0):>17.1f}"
+            )
+
+        from backend.memory_report import memory_breakdown
+
+        m = memory_breakdown(services[0].pid)
+        print(f"service process: RSS {m.get('rss_mb', 0)} MB, unique {m.get('unique_mb', 0)} MB (shared by all workers)")
+    finally:
+        for p in services:
+            p.terminate()
+            p.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_responses.py
+"""
+Call response payloads (backend/responses.py) for long transcripts.
+
+For transcripts of increasing length, builds the /upload-audio/ body the way
+backend/pipeline.py does (BM25 retrieval, so real playbook snippets without
+an embedding model) and reports:
+- bytes: full body vs ?include= (lean) vs ?include=&fields=<dashboard card>
+  vs ?include=transcript (what the UI asks for), raw / gzip / brotli
+- serialization time: stdlib json vs orjson, and compression time
+
+Usage:
+    python -m benchmarks.bench_responses [--words 2000,20000,100000] [--repeat 20]
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import time
+
+os.environ.setdefault("USE_FAKE_RAG", "false")
+os.environ.setdefault("RAG_MODE", "lexical")
+
+from backend.responses import brotli, orjson, shape_call_body  # noqa: E402
+
+CARD_FIELDS = "call_id,dashboard.sentiment,dashboard.rep_performance.score,dashboard.agent_consensus"
+
+VIEWS = {
+    "full": {},
+    "ui (include=transcript)": {"include": "transcript"},
+    "lean (include=)": {"include": ""},
+    "card (fields=...)": {"include": "", "fields": CARD_FIELDS},
+}
+
+
+def long_transcript(words: int) -> str:
+    with open(os.path.join("backend", "sample_transcripts", "sample_call.txt"), "r", encoding="utf-8") as f:
+        lines = [l for l in f.read().splitlines() if l.strip()]
+    extra = [
+        "Customer: Honestly the price seems high compared to what we pay now.",
+        "Customer: I'm not sure we're ready to switch this quarter.",
+        "Rep: Could you tell me more about how your team handles that today?",
+    ]
+    lines += extra
+    out, n, i = [], 0, 0
+    while n < words:
+        line = lines[i % len(lines)]
+        out.append(line)
+        n += len(line.split())
+        i += 1
+    return "\n".join(out)
+
+
+def call_body(transcript: str) -> dict:
+    from backend.agents.final_report import generate_final_report
+    from backend.agents.objection_expert import objection_expert_agent
+    from backend.agents.sales_coach import sales_coach_agent
+    from backend.agents.transcript_analyzer import transcript_analyzer_agent
+    from backend.rules.ruleset import get_ruleset
+
+    ruleset = get_ruleset()
+    analysis = transcript_analyzer_agent(transcript, ruleset=ruleset)
+    sentiment = analysis.get("sentiment")
+    coach = sales_coach_agent(transcript, sentiment, ruleset=ruleset)
+    objection = objection_expert_agent(transcript, sentiment, ruleset=ruleset)
+    return {
+        "call_id": "0" * 32,
+        "filename": "call.mp3",
+        "transcript": transcript,
+        "dashboard": generate_final_report(analysis, coach, objection, ruleset_version=ruleset.version),
+    }
+
+
+def _timed(fn, repeat: int) -> float:
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", default="2000,20000,100000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"orjson: {'yes' if orjson else 'no'}, brotli: {'yes' if brotli else 'no'}")
+    for words in (int(w) for w in args.words.split(",")):
+        body = call_body(long_transcript(words))
+        print(f"\n{words} words")
+        print(f"  {'view':<26}{'raw':>10}{'gzip':>10}{'br':>10}{'json ms':>10}{'orjson ms':>11}{'gzip ms':>9}{'br ms':>8}")
+        for name, params in VIEWS.items():
+            shaped = shape_call_body(body, params.get("fields"), params.get("include"))
+            raw = json.dumps(shaped).encode("utf-8")
+            gz = gzip.compress(raw, compresslevel=6)
+            br = brotli.compress(raw, quality=5) if brotli else b""
+            json_ms = _timed(lambda: json.dumps(shaped), args.repeat)
+            orjson_ms = _timed(lambda: orjson.dumps(shaped), args.repeat) if orjson else float("nan")
+            gz_ms = _timed(lambda: gzip.compress(raw, compresslevel=6), args.repeat)
+            br_ms = _timed(lambda: brotli.compress(raw, quality=5), args.repeat) if brotli else float("nan")
+            print(
+                f"  {name:<26}{len(raw):>10}{len(gz):>10}{len(br):>10}"
+                f"{json_ms:>10.2f}{orjson_ms:>11.2f}{gz_ms:>9.2f}{br_ms:>8.2f}"
+            )
+
+        snippets = shape_call_body(body, None, "transcript,debug")["snippets"]
+        print(f"  snippet table: {len(snippets)} distinct snippets")
+
+
+if __name__ == "__main__":
+    main()
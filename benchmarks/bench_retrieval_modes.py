@@ -0,0 +1,105 @@
+# benchmarks/bench_retrieval_modes.py
+"""
+Retrieval modes compared on the committed index (backend/rag/faiss_index):
+load time, query latency through query_knowledge_base, RSS, and how much the
+lexical / hybrid top-5 overlaps the vector top-5.
+
+Each mode runs in its own subprocess so import cost and RSS are attributable
+to it alone. vector and hybrid load the embedding model, so they need its
+weights on disk or hub access; a mode that can't load is reported as failed
+rather than skipped silently.
+
+Usage:
+    python -m benchmarks.bench_retrieval_modes [--modes lexical vector hybrid] [--rounds 5]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_embedders import QUERIES
+
+
+def _status_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _worker(mode: str, rounds: int) -> None:
+    os.environ["RAG_MODE"] = mode
+    os.environ["USE_FAKE_RAG"] = "false"
+    rss_before = _status_mb("VmRSS")
+
+    t0 = time.perf_counter()
+    from backend.rag.query_rag import preload, query_knowledge_base
+
+    preload()
+    load_s = time.perf_counter() - t0
+
+    latencies = []
+    results = {}
+    for _ in range(rounds):
+        for q in QUERIES:
+            t = time.perf_counter()
+            results[q] = query_knowledge_base(q, company="signiance")
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    latencies.sort()
+    print(json.dumps({
+        "mode": mode,
+        "load_s": round(load_s, 3),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+        "rss_mb": round(_status_mb("VmRSS"), 1),
+        "rss_retriever_mb": round(_status_mb("VmRSS") - rss_before, 1),
+        "results": results,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="+", default=["lexical", "vector", "hybrid"])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--worker")
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.rounds)
+        return
+
+    results = {}
+    for mode in args.modes:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_retrieval_modes", "--worker", mode, "--rounds", str(args.rounds)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"[{mode}] failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+            continue
+        results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    reference = results.get("vector")
+    print(f"{'mode':<8} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>7} {'retriever MB':>13} {'overlap w/ vector':>18}")
+    for mode, r in results.items():
+        overlap = float("nan")
+        if reference is not None:
+            overlap = statistics.mean(
+                len(set(r["results"][q]) & set(reference["results"][q])) / max(1, len(reference["results"][q]))
+                for q in QUERIES
+            )
+        print(
+            f"{mode:<8} {r['load_s']:>7.3f} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} "
+            f"{r['rss_mb']:>7.1f} {r['rss_retriever_mb']:>13.1f} {overlap:>18.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# benchmarks/bench_split_transcribe.py
+"""
+Long-call transcription wall clock: one Transcribe job vs the split path
+(backend/audio/split.py -> parallel segment jobs -> transcript/stitch.py).
+
+Runs against a local Transcribe stand-in, so no AWS account is needed:
+- the recording is synthetic: two speakers taking turns, every "word" a
+  0.3 s tone whose frequency encodes the word and the speaker, pauses
+  between turns
+- the stand-in "recognizes" a job's audio by decoding it with ffmpeg and
+  reading each tone's frequency, labels speakers per job in order of first
+  appearance (like Transcribe's spk_0, spk_1), and completes the job after
+  (overhead + rtf * audio seconds) * time-scale
+- it refuses jobs above --quota with LimitExceededException; the scheduler
+  gets the same limit, as in production
+- S3 uploads are copies into a temp directory
+
+Both paths go through pipeline.transcribe(); the split path also pays for
+silence detection, segment extraction and stitching for real. Reported per
+recording length: wall clock, speedup, jobs, peak concurrent jobs, and the
+word / speaker accuracy of the result against the script.
+
+Usage:
+    python -m benchmarks.bench_split_transcribe [--minutes 20 60] [--quota 4]
+        [--rtf 0.35] [--overhead 20] [--time-scale 0.05]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+RATE = 16000
+WORD_SECONDS = 0.3
+WORD_GAP = 0.12  # within a turn: shorter than the split's silence threshold
+VOCAB = [
+    "price", "demo", "budget", "team", "quarter", "contract", "pilot", "timeline",
+    "renewal", "discount", "integration", "security", "onboarding", "support", "value", "next",
+]
+# Speaker -> base frequency; word w is base + 25 * w Hz
+SPEAKER_BASE = {"rep": 300.0, "customer": 1100.0}
+FREQ_STEP = 25.0
+
+
+def synthesize(minutes: float, path: str, seed: int = 7) -> list:
+    """
+    Writes the recording (FLAC) and returns the script: [(start, word, speaker)].
+    """
+    rng = random.Random(seed)
+    total = int(minutes * 60 * RATE)
+    audio = np.zeros(total, dtype=np.float32)
+    t_word = np.arange(int(WORD_SECONDS * RATE)) / RATE
+    ramp = np.minimum(1.0, np.minimum(t_word, WORD_SECONDS - t_word) / 0.01)
+
+    script = []
+    t = 0.5
+    speaker = "rep"
+    while True:
+        for _ in range(rng.randint(3, 20)):
+            start = int(t * RATE)
+            if start + len(t_word) >= total:
+                break
+            w = rng.randrange(len(VOCAB))
+            freq = SPEAKER_BASE[speaker] + FREQ_STEP * w
+            audio[start:start + len(t_word)] = 0.3 * ramp * np.sin(2 * np.pi * freq * t_word)
+            script.append((round(t, 3), VOCAB[w], speaker))
+            t += WORD_SECONDS + WORD_GAP
+        else:
+            t += rng.uniform(0.6, 1.8)
+            speaker = "customer" if speaker == "rep" else "rep"
+            continue
+        break
+
+    wav_path = path + ".wav"
+    with wave.open(wav_path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes((audio * 32767).astype(np.int16).tobytes())
+    from backend.audio.normalize import ffmpeg_path
+
+    subprocess.run(
+        [ffmpeg_path(), "-nostdin", "-loglevel", "error", "-y", "-i", wav_path, "-c:a", "flac", path],
+        check=True,
+    )
+    os.remove(wav_path)
+    return script
+
+
+def recognize(path: str):
+    """
+    The stand-in's "speech recognition": (audio seconds, timeline).
+    """
+    from backend.audio.normalize import ffmpeg_path
+    from backend.transcript.timeline import TimelineBuilder
+
+    raw = subprocess.run(
+        [ffmpeg_path(), "-nostdin", "-loglevel", "error", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(RATE), "-"],
+        capture_output=True, check=True,
+    ).stdout
+    x = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32767
+    frame = RATE // 100
+    n = len(x) // frame
+    rms = np.sqrt((x[: n * frame].reshape(n, frame) ** 2).mean(axis=1))
+    active = np.concatenate([[False], rms > 0.05, [False]])
+    edges = np.flatnonzero(np.diff(active.astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+
+    builder = TimelineBuilder()
+    labels = {}
+    for s, e in zip(starts, ends):
+        if e - s < 10:  # cut-off word at a segment edge
+            continue
+        chunk = x[s * frame:e * frame]
+        spectrum = np.abs(np.fft.rfft(chunk * np.hanning(len(chunk)), n=RATE))
+        freq = float(np.argmax(spectrum))
+        speaker = "rep" if freq < 900 else "customer"
+        w = int(round((freq - SPEAKER_BASE[speaker]) / FREQ_STEP))
+        if not 0 <= w < len(VOCAB):
+            continue
+        label = labels.setdefault(speaker, f"spk_{len(labels)}")
+        builder.add_item("pronunciation", VOCAB[w], s / 100, e / 100, 0.99, label)
+    return len(x) / RATE, builder.build()
+
+
+class TranscribeStandIn:
+    """
+    Just enough of Transcribe + S3 for pipeline.transcribe().
+    """
+
+    def __init__(self, root: str, quota: int, rtf: float, overhead: float, time_scale: float):
+        self.root = root
+        self.quota = quota
+        self.rtf = rtf
+        self.overhead = overhead
+        self.time_scale = time_scale
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self.running = 0
+        self.peak = 0
+        self.jobs = 0
+
+    # ---- S3 ----
+
+    def upload_file_to_s3(self, local_path: str, key: str) -> str:
+        dst = os.path.join(self.root, key.replace("/", "_"))
+        shutil.copyfile(local_path, dst)
+        return f"s3://standin/{key}"
+
+    def _local(self, uri: str) -> str:
+        return os.path.join(self.root, uri.split("/", 3)[3].replace("/", "_"))
+
+    def delete_from_s3(self, key: str) -> None:
+        try:
+            os.remove(os.path.join(self.root, key.replace("/", "_")))
+        except OSError:
+            pass
+
+    # ---- Transcribe ----
+
+    def start_transcription_job(self, job_name, media_s3_uri, media_format="mp3", language_code="en-US"):
+        from botocore.exceptions import ClientError
+
+        with self._lock:
+            if self.running >= self.quota:
+                raise ClientError({"Error": {"Code": "LimitExceededException", "Message": "quota"}}, "StartTranscriptionJob")
+            self.running += 1
+            self.jobs += 1
+            self.peak = max(self.peak, self.running)
+            done = threading.Event()
+            self._jobs[job_name] = {"done": done, "result": None}
+
+        def run():
+            t0 = time.perf_counter()
+            seconds, timeline = recognize(self._local(media_s3_uri))
+            remaining = (self.overhead + self.rtf * seconds) * self.time_scale - (time.perf_counter() - t0)
+            if remaining > 0:
+                time.sleep(remaining)
+            with self._lock:
+                self.running -= 1
+                self._jobs[job_name]["result"] = (timeline.text, timeline)
+            done.set()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def wait_for_job(self, job_name, timeout_seconds=300, cancel=None):
+        job = self._jobs[job_name]
+        job["done"].wait(timeout_seconds)
+        return {
+            "TranscriptionJob": {
+                "TranscriptionJobStatus": "COMPLETED",
+                "Transcript": {"TranscriptFileUri": f"standin://{job_name}"},
+            }
+        }
+
+    def fetch_transcript(self, uri: str):
+        return self._jobs[uri.split("://", 1)[1]]["result"]
+
+    def delete_job(self, job_name: str) -> None:
+        self._jobs.pop(job_name, None)
+
+
+def accuracy(script: list, timeline) -> dict:
+    """
+    Share of script words transcribed (same word, start within 0.1 s), and
+    of those, the share whose speaker agrees with the majority mapping.
+    """
+    starts = np.asarray([s for s, _, _ in script])
+    pairs = {}
+    hits = 0
+    for i in range(len(timeline)):
+        j = int(np.argmin(np.abs(starts - float(timeline.start[i]))))
+        start, word, speaker = script[j]
+        if abs(start - float(timeline.start[i])) > 0.1 or timeline.word(i) != word:
+            continue
+        hits += 1
+        key = (int(timeline.speaker[i]), speaker)
+        pairs[key] = pairs.get(key, 0) + 1
+    # Each global speaker counts as whichever script speaker it mostly is
+    best = {}
+    for (g, speaker), c in pairs.items():
+        if c > best.get(g, (None, 0))[1]:
+            best[g] = (speaker, c)
+    agree = sum(c for _, c in best.values())
+    return {
+        "word_recall": round(hits / len(script), 4),
+        "speaker_agreement": round(agree / hits, 4) if hits else 0.0,
+        "speakers": len(timeline.speaker_labels),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, nargs="+", default=[20, 60])
+    parser.add_argument("--quota", type=int, default=4, help="concurrent Transcribe jobs")
+    parser.add_argument("--rtf", type=float, default=0.35, help="stand-in job seconds per audio second")
+    parser.add_argument("--overhead", type=float, default=20.0, help="stand-in fixed seconds per job")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="stand-in clock speed-up")
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    os.environ.setdefault("S3_BUCKET", "standin")
+    os.environ.setdefault("BEDROCK_MODEL_ID", "standin")
+    os.environ["TRANSCRIBE_MAX_CONCURRENT_JOBS"] = str(args.quota)
+    os.environ["USE_MOCK_TRANSCRIPT"] = "false"
+
+    from backend import pipeline
+    from backend.audio import split
+    from backend.aws.transcribe_scheduler import get_transcribe_scheduler
+
+    scheduler = get_transcribe_scheduler()
+    tmp = tempfile.mkdtemp(prefix="bench-split-")
+    try:
+        print(
+            f"quota={args.quota} jobs, stand-in job = ({args.overhead:.0f}s + {args.rtf} x audio) "
+            f"x {args.time_scale}, segments ~{split.TRANSCRIBE_SPLIT_SEGMENT_SECONDS:.0f}s"
+        )
+        print(
+            f"{'minutes':>7} {'path':<7} {'wall s':>8} {'speedup':>8} {'jobs':>5} {'peak':>5} "
+            f"{'words':>6} {'word recall':>12} {'spk agree':>10} {'spks':>5}"
+        )
+        for minutes in args.minutes:
+            path = os.path.join(tmp, f"call-{minutes:g}min.flac")
+            script = synthesize(minutes, path)
+
+            single_wall = None
+            for label, local_path in (("single", None), ("split", path)):
+                standin = TranscribeStandIn(tmp, args.quota, args.rtf, args.overhead, args.time_scale)
+                for name in (
+                    "start_transcription_job", "wait_for_job", "fetch_transcript", "delete_job",
+                    "upload_file_to_s3", "delete_from_s3",
+                ):
+                    setattr(pipeline, name, getattr(standin, name))
+                uri = standin.upload_file_to_s3(path, f"uploads/{os.path.basename(path)}")
+
+                t0 = time.perf_counter()
+                _, timeline = pipeline.transcribe(uri, "flac", ticket=scheduler.submit("interactive"), local_path=local_path)
+                wall = time.perf_counter() - t0
+                single_wall = single_wall or wall
+                acc = accuracy(script, timeline)
+                print(
+                    f"{minutes:>7g} {label:<7} {wall:>8.2f} {single_wall / wall:>7.2f}x {standin.jobs:>5} "
+                    f"{standin.peak:>5} {len(timeline):>6} {acc['word_recall']:>12.4f} "
+                    f"{acc['speaker_agreement']:>10.4f} {acc['speakers']:>5}"
+                )
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
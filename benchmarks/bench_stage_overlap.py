@@ -0,0 +1,92 @@
+# benchmarks/bench_stage_overlap.py
+"""
+Critical path of a call with and without the prefetch stage graph
+(pipeline.prepare_call): RAG warm-up, company index load and the agents'
+fixed RAG queries running while Transcribe does, vs all of it after.
+
+Each configuration runs in a fresh interpreter so the first call pays the
+real cold costs (model / index load). Transcribe is a stand-in that sleeps
+--transcribe-seconds and returns the sample transcript. Per call:
+- total:      analyze_call() wall clock
+- after:      time from the transcript being ready to the result, i.e. what
+              is left on the critical path once Transcribe is done
+
+Usage:
+    python -m benchmarks.bench_stage_overlap [--rag-mode lexical] [--company signiance]
+        [--transcribe-seconds 2] [--calls 3]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+CHILD = r"""
+import json, sys, time
+calls, transcribe_seconds, company = int(sys.argv[1]), float(sys.argv[2]), sys.argv[3] or None
+from backend import pipeline
+
+with open(pipeline.MOCK_TRANSCRIPT_PATH, "r", encoding="utf-8") as f:
+    text = f.read()
+ready = {}
+
+def transcribe(media_s3_uri, media_format, ticket=None, cancel=None, local_path=None):
+    time.sleep(transcribe_seconds)
+    ready["t"] = time.perf_counter()
+    return text, None
+
+pipeline.transcribe = transcribe
+rows = []
+for i in range(calls):
+    t0 = time.perf_counter()
+    pipeline.analyze_call("s3://bench/call.flac", "flac", "call.flac", company=company)
+    end = time.perf_counter()
+    rows.append({"total_ms": (end - t0) * 1000, "after_ms": (end - ready["t"]) * 1000})
+print(json.dumps(rows))
+"""
+
+
+def run(prefetch: bool, args, db_dir: str) -> list:
+    env = {
+        **os.environ,
+        "AWS_REGION": os.getenv("AWS_REGION", "us-east-1"),
+        "S3_BUCKET": os.getenv("S3_BUCKET", "bench"),
+        "BEDROCK_MODEL_ID": os.getenv("BEDROCK_MODEL_ID", "bench"),
+        "RAG_MODE": args.rag_mode,
+        "USE_FAKE_RAG": "false",
+        "AGENT_MEMO_ENABLED": "false",
+        "PIPELINE_PREFETCH": "true" if prefetch else "false",
+        "CALL_STORE_URL": f"sqlite:///{os.path.join(db_dir, f'calls-{int(prefetch)}.db')}",
+    }
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, str(args.calls), str(args.transcribe_seconds), args.company or ""],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rag-mode", default="lexical")
+    parser.add_argument("--company", default=None)
+    parser.add_argument("--transcribe-seconds", type=float, default=2.0)
+    parser.add_argument("--calls", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"RAG_MODE={args.rag_mode} company={args.company or '-'} "
+        f"Transcribe stand-in={args.transcribe_seconds}s, {args.calls} calls per process"
+    )
+    print(f"{'prefetch':<9} {'call':>4} {'total ms':>10} {'after ms':>10}")
+    with tempfile.TemporaryDirectory() as db_dir:
+        for prefetch in (False, True):
+            for i, r in enumerate(run(prefetch, args, db_dir)):
+                label = "cold" if i == 0 else "warm"
+                print(f"{'on' if prefetch else 'off':<9} {label:>4} {r['total_ms']:>10.1f} {r['after_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# benchmarks/bench_transcript_fetch.py
+"""
+Transcript download + parse: json.loads of the whole document vs the
+streaming/pooled fetch in backend.aws.transcribe_utils.
+
+Each measurement runs in a fresh subprocess so peak RSS is not polluted by
+earlier runs. Synthetic Transcribe documents are served from a local HTTP
+server.
+
+Usage:
+    python -m benchmarks.bench_transcript_fetch --words 20000 200000 600000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ["pricing", "demo", "budget", "team", "we", "currently", "use", "the", "next", "step", "okay", "sure"]
+
+
+def write_synthetic_transcript(path: str, n_words: int, seed: int = 7) -> int:
+    """
+    Writes a Transcribe-shaped document with speaker segments and word items.
+    Returns the file size in bytes.
+    """
+    rng = random.Random(seed)
+    t = 0.0
+    words, segments, seg_items = [], [], []
+    speaker = 0
+    seg_start = 0.0
+
+    for i in range(n_words):
+        w = rng.choice(WORDS)
+        start, end = t, t + 0.3
+        item = {
+            "start_time": f"{start:.3f}",
+            "end_time": f"{end:.3f}",
+            "alternatives": [{"confidence": f"{rng.uniform(0.8, 1):.4f}", "content": w}],
+            "type": "pronunciation",
+        }
+        words.append(item)
+        seg_items.append({"start_time": item["start_time"], "end_time": item["end_time"], "speaker_label": f"spk_{speaker}"})
+        t += 0.4
+
+        if rng.random() < 0.08:
+            words.append({"alternatives": [{"confidence": "0.0", "content": "."}], "type": "punctuation"})
+            segments.append({"start_time": f"{seg_start:.3f}", "speaker_label": f"spk_{speaker}", "end_time": f"{end:.3f}", "items": seg_items})
+            seg_items = []
+            speaker ^= 1
+            t += rng.choice([-0.2, 0.3, 0.8])
+            seg_start = t
+
+    if seg_items:
+        segments.append({"start_time": f"{seg_start:.3f}", "speaker_label": f"spk_{speaker}", "end_time": f"{t:.3f}", "items": seg_items})
+
+    doc = {
+        "jobName": "bench",
+        "accountId": "000000000000",
+        "results": {
+            "transcripts": [{"transcript": " ".join(w["alternatives"][0]["content"] for w in words)}],
+            "speaker_labels": {"speakers": 2, "segments": segments},
+            "items": words,
+        },
+        "status": "COMPLETED",
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f)
+    return os.path.getsize(path)
+
+
+def _rss_mb() -> float:
+    """
+    Peak RSS of this process. VmHWM is reset on exec, unlike ru_maxrss which
+    inherits the (large) parent's peak through fork.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _worker(mode: str, url: str) -> None:
+    if mode == "baseline":
+        import urllib.request
+        from backend.transcript.timeline import timeline_from_transcribe_json
+
+        def fetch():
+            with urllib.request.urlopen(url) as f:
+                data = json.loads(f.read().decode("utf-8"))
+            return data["results"]["transcripts"][0]["transcript"], timeline_from_transcribe_json(data)
+    else:
+        from backend.aws.transcribe_utils import fetch_transcript
+
+        def fetch():
+            return fetch_transcript(url)
+
+    rss_before = _rss_mb()
+    t0 = time.perf_counter()
+    text, timeline = fetch()
+    elapsed = time.perf_counter() - t0
+
+    print(json.dumps({
+        "mode": mode,
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(_rss_mb(), 1),
+        "peak_rss_delta_mb": round(_rss_mb() - rss_before, 1),
+        "words": len(timeline),
+        "text_chars": len(text),
+    }))
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _serve(directory: str) -> ThreadingHTTPServer:
+    handler = partial(_QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, nargs="+", default=[20000, 200000, 600000])
+    parser.add_argument("--worker", choices=["baseline", "streaming"])
+    parser.add_argument("--url")
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.url)
+        return
+
+    env = dict(os.environ)
+    env.setdefault("AWS_REGION", "us-east-1")
+    env.setdefault("AWS_DEFAULT_REGION", env["AWS_REGION"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = _serve(tmp)
+        port = server.server_address[1]
+
+        print(f"{'words':>8} {'json MB':>8} {'mode':>10} {'seconds':>8} {'peak RSS MB':>12} {'+MB vs import':>14}")
+        for n in args.words:
+            name = f"transcript_{n}.json"
+            size = write_synthetic_transcript(os.path.join(tmp, name), n)
+            url = f"http://127.0.0.1:{port}/{name}"
+
+            for mode in ("baseline", "streaming"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_transcript_fetch", "--worker", mode, "--url", url],
+                    capture_output=True, text=True, env=env, check=True,
+                )
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(
+                    f"{n:>8} {size / 1e6:>8.1f} {mode:>10} {r['seconds']:>8.3f} "
+                    f"{r['peak_rss_mb']:>12.1f} {r['peak_rss_delta_mb']:>14.1f}"
+                )
+
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# gunicorn.conf.py
+#
+# Preload-before-fork server mode:
+#   PRELOAD_RAG=true gunicorn -c gunicorn.conf.py backend.main:app
+#
+# The app (and, with PRELOAD_RAG=true, the embedding model + FAISS index) is
+# imported once in the master. Workers are forked afterwards and share those
+# pages copy-on-write instead of each loading their own copy.
+import gc
+import os
+
+from backend.memory_report import format_breakdown, memory_breakdown
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "360"))
+
+
+def when_ready(server):
+    # Move everything allocated so far into the permanent GC generation so the
+    # cyclic collector in each worker never writes to (and un-shares) those pages.
+    gc.freeze()
+    server.log.info(format_breakdown("master", memory_breakdown()))
+
+
+def post_worker_init(worker):
+    worker.log.info(format_breakdown("worker", memory_breakdown()))